@@ -0,0 +1,140 @@
+"""Compare the access-control querysets against the former OR-join versions.
+
+Populates 10k characters and 2k parties, then prints the SQLite query plan
+and the latency of `Character.objects.managed_by/friendly_to` and
+`Party.objects.related_to/played_or_mastered_by`, both for the EXISTS-based
+implementation and for the previous OR-join + DISTINCT one.
+
+    python -m benchmarks.access_querysets
+"""
+
+import random
+
+from benchmarks.utils import format_stats, measure, setup_django
+
+CHARACTERS = 10_000
+PARTIES = 2_000
+USERS = 2_500
+MEMBERS_PER_PARTY = 5
+INVITES_PER_PARTY = 2
+
+
+def populate() -> None:
+    from character.models import Character, Profile, Race, RacialCapability
+    from common.models import User
+    from party.models import Party
+
+    rng = random.Random(42)  # noqa: S311
+    race = Race.objects.create(name="Humain")
+    profile = Profile.objects.create(name="Guerrier", life_dice=10)
+    racial_capability = RacialCapability.objects.create(name="Polyvalent", race=race)
+    users = User.objects.bulk_create(
+        User(username=f"user{index}") for index in range(USERS)
+    )
+    characters = Character.objects.bulk_create(
+        Character(
+            name=f"character{index}",
+            player=users[index % USERS],
+            race=race,
+            profile=profile,
+            racial_capability=racial_capability,
+            age=20,
+            height=180,
+            weight=80,
+            value_strength=10,
+            value_dexterity=10,
+            value_constitution=10,
+            value_intelligence=10,
+            value_wisdom=10,
+            value_charisma=10,
+            health_max=10,
+            health_remaining=10,
+            luck_points_remaining=3,
+        )
+        for index in range(CHARACTERS)
+    )
+    parties = Party.objects.bulk_create(
+        Party(name=f"party{index}", game_master=rng.choice(users))
+        for index in range(PARTIES)
+    )
+    members, invites = [], []
+    for party in parties:
+        picked = rng.sample(characters, MEMBERS_PER_PARTY + INVITES_PER_PARTY)
+        members += [
+            Party.characters.through(party=party, character=character)
+            for character in picked[:MEMBERS_PER_PARTY]
+        ]
+        invites += [
+            Party.invited_characters.through(party=party, character=character)
+            for character in picked[MEMBERS_PER_PARTY:]
+        ]
+    Party.characters.through.objects.bulk_create(members)
+    Party.invited_characters.through.objects.bulk_create(invites)
+
+
+def legacy_querysets(user) -> dict:
+    """Querysets as they were written before the EXISTS rewrite."""
+    from django.db.models import Q
+
+    from character.models import Character
+    from party.models import Party
+
+    owned = Character.objects.filter(player=user)
+    related_parties = Party.objects.filter(
+        Q(game_master=user) | Q(characters__in=owned) | Q(invited_characters__in=owned),
+    ).distinct()
+    return {
+        "Character.managed_by": Character.objects.filter(
+            Q(player=user) | Q(parties__in=Party.objects.filter(game_master=user)),
+        ),
+        "Character.friendly_to": Character.objects.filter(
+            Q(player=user)
+            | Q(parties__in=related_parties)
+            | Q(invites__in=related_parties),
+        ).distinct(),
+        "Party.related_to": related_parties,
+        "Party.played_or_mastered_by": Party.objects.filter(
+            Q(game_master=user) | Q(characters__in=owned),
+        ).distinct(),
+    }
+
+
+def current_querysets(user) -> dict:
+    from character.models import Character
+    from party.models import Party
+
+    return {
+        "Character.managed_by": Character.objects.managed_by(user),
+        "Character.friendly_to": Character.objects.friendly_to(user),
+        "Party.related_to": Party.objects.related_to(user),
+        "Party.played_or_mastered_by": Party.objects.played_or_mastered_by(user),
+    }
+
+
+def main() -> None:
+    setup_django()
+    populate()
+
+    from party.models import Party
+
+    party = Party.objects.order_by("?").first()
+    game_master = party.game_master
+    character = party.characters.first()
+    for label, querysets in [
+        ("legacy OR-join", legacy_querysets(game_master)),
+        ("EXISTS", current_querysets(game_master)),
+    ]:
+        print(f"===== {label} =====")  # noqa: T201
+        for name, queryset in querysets.items():
+            lookup_pk = party.pk if name.startswith("Party") else character.pk
+            lookup = queryset.filter(pk=lookup_pk)
+            listing = measure(lambda qs=queryset: list(qs.all()))
+            single = measure(lambda qs=lookup: list(qs.all()))
+            print(f"--- {name} ({queryset.count()} rows)")  # noqa: T201
+            print(queryset.explain())  # noqa: T201
+            print(format_stats("listing", listing))  # noqa: T201
+            print(format_stats("pk lookup", single))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
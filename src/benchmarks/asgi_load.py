@@ -0,0 +1,163 @@
+"""Compare the throughput of the WSGI and ASGI workers under concurrent clients.
+
+Starts gunicorn with `charasheet.gunicorn_conf`, once with the threaded WSGI
+workers and once with `GUNICORN_ASGI=true`, on a database holding the
+rulebook. For each run, 200 clients, each on its own keep-alive connection,
+hammer the endpoints used during a fight: counter changes, state toggles and
+effects rounds. Prints the throughput, the latency percentiles and the number
+of failed requests.
+
+    python -m benchmarks.asgi_load
+"""
+
+import http.client
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.preload import wait_for_server
+from benchmarks.utils import setup_django
+
+BIND = "127.0.0.1:8765"
+CLIENTS = 200
+REQUESTS_PER_CLIENT = 20
+
+
+def populate() -> tuple[list[str], str]:
+    """Create a party of characters, return the hot URLs and a session cookie."""
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+    from django.urls import reverse
+    from model_bakery import baker
+
+    from character.models import Character, HarmfulState, Profile, Race
+    from common.models import User
+    from party.models import BattleEffect, Party
+
+    # Readers don't block the writer, only the writers queue on the lock.
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    call_command("loaddata", "initial_data", verbosity=0)
+    call_command("collectstatic", "--noinput", verbosity=0)
+    game_master = User.objects.create_user("game_master")
+    characters = baker.make(
+        Character,
+        player=game_master,
+        race=Race.objects.first(),
+        profile=Profile.objects.first(),
+        luck_points_max=10,
+        luck_points_remaining=5,
+        _quantity=4,
+    )
+    party = baker.make(Party, game_master=game_master, characters=characters)
+    baker.make(BattleEffect, party=party, created_by=game_master, _quantity=3)
+    state = HarmfulState.objects.first()
+    urls = [reverse("party:increase_rounds", kwargs={"pk": party.pk})]
+    for character in characters:
+        kwargs = {"pk": character.pk}
+        urls += [
+            reverse("character:luck_points_change", kwargs=kwargs) + "?value=1",
+            reverse("character:luck_points_change", kwargs=kwargs) + "?value=-1",
+            reverse("character:add_state", kwargs={**kwargs, "state_pk": state.pk}),
+        ]
+    client = Client()
+    client.force_login(game_master)
+    cookie = client.cookies["sessionid"]
+    return urls, f"sessionid={cookie.value}"
+
+
+def client_session(urls: list[str], cookie: str, offset: int) -> list[float | None]:
+    """Request the URLs in turn, return the latencies, None for the failures."""
+    host, port = BIND.split(":")
+    connection = http.client.HTTPConnection(host, int(port), timeout=60)
+    latencies = []
+    for i in range(REQUESTS_PER_CLIENT):
+        url = urls[(offset + i) % len(urls)]
+        start = time.perf_counter()
+        try:
+            connection.request("GET", url, headers={"Cookie": cookie})
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            latencies.append(None)
+            continue
+        latency = time.perf_counter() - start
+        latencies.append(latency if response.status == http.client.OK else None)
+    connection.close()
+    return latencies
+
+
+def load(urls: list[str], cookie: str) -> tuple[float, list[float | None]]:
+    barrier = threading.Barrier(CLIENTS)
+
+    def session(offset: int) -> list[float | None]:
+        barrier.wait()
+        return client_session(urls, cookie, offset)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CLIENTS) as executor:
+        results = list(executor.map(session, range(CLIENTS)))
+    elapsed = time.perf_counter() - start
+    return elapsed, [latency for latencies in results for latency in latencies]
+
+
+def run(urls: list[str], cookie: str, *, asgi: bool) -> None:
+    env = {
+        **os.environ,
+        "GUNICORN_BIND": BIND,
+        "GUNICORN_ASGI": str(asgi).lower(),
+        "ALLOWED_HOSTS": "127.0.0.1",
+    }
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--config=python:charasheet.gunicorn_conf",
+            "--log-level=warning",
+        ],
+        env=env,
+    )
+    try:
+        wait_for_server()
+        time.sleep(1)  # Let every worker boot.
+        elapsed, latencies = load(urls, cookie)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+    succeeded = sorted(latency for latency in latencies if latency is not None)
+    percentiles = statistics.quantiles(succeeded, n=100)
+    print(f"===== {'ASGI' if asgi else 'WSGI'}, {CLIENTS} clients =====")  # noqa: T201
+    print(  # noqa: T201
+        f"{len(succeeded) / elapsed:8.1f} req/s"
+        f"  p50={percentiles[49] * 1000:7.1f}ms"
+        f"  p95={percentiles[94] * 1000:7.1f}ms"
+        f"  p99={percentiles[98] * 1000:7.1f}ms"
+        f"  max={succeeded[-1] * 1000:7.1f}ms"
+        f"  failed={len(latencies) - len(succeeded)}",
+    )
+
+
+def main() -> None:
+    workdir = Path(tempfile.mkdtemp(prefix="charasheet-bench-"))
+    os.environ["STATIC_ROOT"] = str(workdir / "static")
+    os.environ["RULEBOOK_GENERATION_FILE"] = str(workdir / "rulebook-generation")
+    setup_django(workdir / "db.sqlite3")
+    # Writers wait for the lock instead of failing to upgrade a read.
+    os.environ["DATABASE_URL"] += "?timeout=20&transaction_mode=IMMEDIATE"
+    urls, cookie = populate()
+    for asgi in [False, True]:
+        run(urls, cookie, asgi=asgi)
+
+
+if __name__ == "__main__":
+    main()
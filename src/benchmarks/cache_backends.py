@@ -0,0 +1,87 @@
+"""Compare the tiered cache with the SQLite `DatabaseCache` it replaces.
+
+Measures reads of a session-sized value, hits and misses, and writes, first
+against a `DatabaseCache` on the SQLite database of the application, then
+against `common.cache.TieredCache` with and without its shared tier. Reads
+are measured twice on the tiered cache: as a worker that wrote the value, and
+as another worker, reading it from the shared tier first.
+
+    python -m benchmarks.cache_backends
+"""
+
+import tempfile
+from pathlib import Path
+
+from benchmarks.utils import format_stats, measure, setup_django
+
+REPEAT = 2000
+VALUE = {
+    "_auth_user_id": "1",
+    "_auth_user_backend": "django.contrib.auth.backends.ModelBackend",
+    "_auth_user_hash": "0" * 64,
+    "_messages": "[]",
+}
+
+
+def database_cache():
+    from django.core.cache.backends.db import DatabaseCache
+    from django.core.management.commands.createcachetable import Command
+
+    command = Command()
+    command.verbosity = 0
+    command.create_table("default", "cache_table", dry_run=False)
+    return DatabaseCache("cache_table", {"OPTIONS": {"MAX_ENTRIES": 1000}})
+
+
+def tiered_cache(location: Path, *, shared: bool):
+    from common.cache import TieredCache
+
+    return TieredCache(
+        str(location),
+        {"OPTIONS": {"MAX_ENTRIES": 1000, "SHARED": shared}},
+    )
+
+
+def run(name: str, cache, other_worker=None) -> None:
+    print(f"===== {name} =====")  # noqa: T201
+    counter = iter(range(10**9))
+    print(  # noqa: T201
+        format_stats(
+            "set",
+            measure(lambda: cache.set(f"key-{next(counter)}", VALUE), repeat=REPEAT),
+        ),
+    )
+    cache.set("hit", VALUE)
+    print(  # noqa: T201
+        format_stats("get hit", measure(lambda: cache.get("hit"), repeat=REPEAT)),
+    )
+    print(  # noqa: T201
+        format_stats("get miss", measure(lambda: cache.get("miss"), repeat=REPEAT)),
+    )
+    if other_worker is not None:
+        print(  # noqa: T201
+            format_stats(
+                "get hit, other worker",
+                measure(lambda: other_worker.get("hit"), repeat=REPEAT),
+            ),
+        )
+    stats = getattr(other_worker or cache, "stats", None)
+    if stats:
+        print(" ".join(f"{key}={value}" for key, value in stats.items()))  # noqa: T201
+
+
+def main() -> None:
+    workdir = Path(tempfile.mkdtemp(prefix="charasheet-bench-"))
+    setup_django(workdir / "db.sqlite3")
+    run("DatabaseCache", database_cache())
+    location = workdir / "cache"
+    run(
+        "TieredCache",
+        tiered_cache(location, shared=True),
+        tiered_cache(location, shared=True),
+    )
+    run("TieredCache, local only", tiered_cache(workdir / "local", shared=False))
+
+
+if __name__ == "__main__":
+    main()
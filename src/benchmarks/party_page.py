@@ -0,0 +1,87 @@
+"""Measure the rendering of a party page holding 6 character cards.
+
+Populates a party of 6 characters with weapons and harmful states, then
+prints the latency and query count of the whole `party:details` request as
+seen by the game master, and the latency of rendering the template alone
+from an already fetched party. Cards are served from the fragment cache
+after the first request, see `character.fragments`.
+
+    python -m benchmarks.party_page
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from benchmarks.utils import format_stats, measure, setup_django
+
+CHARACTERS = 6
+
+
+def populate():
+    from django.core.management import call_command
+    from model_bakery import baker
+
+    from character.models import Character, HarmfulState, Profile, Race, Weapon
+    from common.models import User
+    from party.models import Party
+
+    call_command("loaddata", "initial_data", verbosity=0)
+    call_command("collectstatic", "--noinput", verbosity=0)
+    game_master = User.objects.create_user("game_master")
+    party = baker.make(Party, game_master=game_master)
+    for index in range(CHARACTERS):
+        character = baker.make(
+            Character,
+            player=User.objects.create_user(f"player{index}"),
+            race=Race.objects.order_by("?").first(),
+            profile=Profile.objects.order_by("?").first(),
+            level=5,
+            health_max=30,
+            health_remaining=20,
+        )
+        character.weapons.set(Weapon.objects.order_by("?")[:3])
+        character.states.set(HarmfulState.objects.order_by("?")[:2])
+        character.save()
+        party.characters.add(character)
+    return party
+
+
+def main() -> None:
+    workdir = Path(tempfile.mkdtemp(prefix="charasheet-bench-"))
+    os.environ.setdefault("ALLOWED_HOSTS", "localhost")
+    os.environ["STATIC_ROOT"] = str(workdir / "static")
+    os.environ["RULEBOOK_GENERATION_FILE"] = str(workdir / "rulebook-generation")
+    setup_django(workdir / "db.sqlite3")
+    party = populate()
+
+    from django.db import connection
+    from django.template.loader import render_to_string
+    from django.test import Client, RequestFactory
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+
+    from character.models import HarmfulState
+    from character.rulebook import get_rulebook
+
+    client = Client(HTTP_HOST="localhost")
+    client.force_login(party.game_master)
+    url = reverse("party:details", kwargs={"pk": party.pk})
+    for cache in ["cold", "warm"]:
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url)
+        print(f"{url}: {len(queries)} queries, {cache} fragments")  # noqa: T201
+    print(format_stats("request", measure(lambda: client.get(url))))  # noqa: T201
+
+    request = RequestFactory().get(url)
+    request.user = party.game_master
+    context = {"party": party, "all_states": get_rulebook().all(HarmfulState)}
+    render_to_string("party/party_details.html", context, request)
+    stats = measure(
+        lambda: render_to_string("party/party_details.html", context, request),
+    )
+    print(format_stats("template only", stats))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
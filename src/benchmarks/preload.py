@@ -0,0 +1,143 @@
+"""Measure the effect of the gunicorn preload warmup on memory and latency.
+
+Starts gunicorn with `charasheet.gunicorn_conf`, once without preloading and
+once with the pre-fork warmup, on a database holding the rulebook. For each
+run, prints the latency of the first request and of the following ones on a
+character page, then the RSS, PSS and private (unshared) memory of each worker
+read from `/proc/<pid>/smaps_rollup`, so Linux only.
+
+    python -m benchmarks.preload
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from benchmarks.utils import format_stats, measure, setup_django
+
+BIND = "127.0.0.1:8765"
+WORKERS = 2
+SMAPS_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Private_Clean": "private",
+    "Private_Dirty": "private",
+}
+
+
+def populate() -> tuple[str, str]:
+    """Create a character, return its URL and a logged-in session cookie."""
+    from django.core.management import call_command
+    from django.test import Client
+    from model_bakery import baker
+
+    from character.models import Character, Profile, Race
+    from common.models import User
+
+    call_command("loaddata", "initial_data", verbosity=0)
+    call_command("collectstatic", "--noinput", verbosity=0)
+    player = User.objects.create_user("player")
+    character = baker.make(
+        Character,
+        player=player,
+        race=Race.objects.first(),
+        profile=Profile.objects.first(),
+    )
+    client = Client()
+    client.force_login(player)
+    cookie = client.cookies["sessionid"]
+    return character.get_absolute_url(), f"sessionid={cookie.value}"
+
+
+def wait_for_server(timeout: float = 30) -> None:
+    host, port = BIND.split(":")
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, int(port)), timeout=1).close()
+        except OSError:
+            time.sleep(0.1)
+        else:
+            return
+    msg = "gunicorn didn't start."
+    raise RuntimeError(msg)
+
+
+def get(url: str, cookie: str) -> None:
+    request = urllib.request.Request(
+        f"http://{BIND}{url}",
+        headers={"Cookie": cookie},
+    )
+    with urllib.request.urlopen(request) as response:  # noqa: S310
+        response.read()
+
+
+def worker_pids(master_pid: int) -> list[int]:
+    children = Path(f"/proc/{master_pid}/task/{master_pid}/children").read_text()
+    return [int(pid) for pid in children.split()]
+
+
+def memory(pid: int) -> dict[str, int]:
+    """Return the memory of a process in kB."""
+    values = dict.fromkeys(SMAPS_FIELDS.values(), 0)
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+        name, _, value = line.partition(":")
+        if name in SMAPS_FIELDS:
+            values[SMAPS_FIELDS[name]] += int(value.split()[0])
+    return values
+
+
+def run(url: str, cookie: str, *, preload: bool) -> None:
+    env = {
+        **os.environ,
+        "GUNICORN_BIND": BIND,
+        "GUNICORN_WORKERS": str(WORKERS),
+        "GUNICORN_PRELOAD": str(preload).lower(),
+        "ALLOWED_HOSTS": "127.0.0.1",
+    }
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--config=python:charasheet.gunicorn_conf",
+            "--log-level=warning",
+        ],
+        env=env,
+    )
+    try:
+        wait_for_server()
+        time.sleep(1)  # Let every worker boot.
+        first = measure(lambda: get(url, cookie), repeat=1)["max"]
+        following = measure(lambda: get(url, cookie))
+        print(f"===== preload={preload} =====")  # noqa: T201
+        print(format_stats("first request", {"latency": first}))  # noqa: T201
+        print(format_stats("following requests", following))  # noqa: T201
+        for pid in worker_pids(server.pid):
+            values = " ".join(
+                f"{key}={value:7d}kB" for key, value in memory(pid).items()
+            )
+            print(f"worker {pid:<33} {values}")  # noqa: T201
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+
+def main() -> None:
+    workdir = Path(tempfile.mkdtemp(prefix="charasheet-bench-"))
+    os.environ["STATIC_ROOT"] = str(workdir / "static")
+    os.environ["RULEBOOK_GENERATION_FILE"] = str(workdir / "rulebook-generation")
+    setup_django(workdir / "db.sqlite3")
+    url, cookie = populate()
+    for preload in [False, True]:
+        run(url, cookie, preload=preload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Compare the full-text search of the rulebook with the LIKE searches of the admin.
+
+Loads the rulebook, copied `COPIES` times to stand for a larger one, then
+measures a few queries: first as the `LIKE '%...%'` of every `search_fields`
+of the admin, over the 5 indexed models, then with `character.search`, the
+ranked results of the rulebook page, and the filter of an admin page.
+
+    python -m benchmarks.rulebook_search
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from benchmarks.utils import format_stats, measure, setup_django
+
+COPIES = 20
+QUERIES = ["feu", "attaque", "epee"]
+SEARCH_FIELDS = {
+    "Capability": ["name", "description"],
+    "Path": ["name"],
+    "RacialCapability": ["name", "description"],
+    "Weapon": ["name", "special", "damage"],
+    "HarmfulState": ["name"],
+}
+
+
+def populate() -> None:
+    from django.core.management import call_command
+
+    from character import search
+    from character.models import Capability, Path
+
+    call_command("loaddata", "initial_data", verbosity=0)
+    paths = list(Path.objects.prefetch_related("capabilities"))
+    for copy in range(COPIES):
+        copies = Path.objects.bulk_create(
+            Path(
+                name=f"{path.name} {copy}",
+                category=path.category,
+                profile_id=path.profile_id,
+                race_id=path.race_id,
+                notes=path.notes,
+            )
+            for path in paths
+        )
+        Capability.objects.bulk_create(
+            Capability(
+                name=capability.name,
+                path=path_copy,
+                rank=capability.rank,
+                description=capability.description,
+            )
+            for path, path_copy in zip(paths, copies, strict=True)
+            for capability in path.capabilities.all()
+        )
+    search.rebuild()
+
+
+def like_search(query: str) -> list:
+    from django.apps import apps
+    from django.db.models import Q
+
+    results = []
+    for model_name, fields in SEARCH_FIELDS.items():
+        model = apps.get_model("character", model_name)
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f"{field}__icontains": query})
+        results += model.objects.filter(condition)
+    return results
+
+
+def admin_page(queryset) -> list:
+    """Count and fetch the first page, like the changelist of the admin."""
+    queryset.count()
+    return list(queryset.order_by("-pk")[:100])
+
+
+def main() -> None:
+    workdir = Path(tempfile.mkdtemp(prefix="charasheet-bench-"))
+    os.environ["RULEBOOK_GENERATION_FILE"] = str(workdir / "rulebook-generation")
+    setup_django(workdir / "db.sqlite3")
+    populate()
+
+    from django.db.models import Q
+
+    from character import search
+    from character.models import Capability
+
+    print(f"{Capability.objects.count()} capabilities")  # noqa: T201
+    for query in QUERIES:
+        print(f"===== {query!r} =====")  # noqa: T201
+        print(  # noqa: T201
+            f"{len(like_search(query))} LIKE results, "
+            f"{len(search.search(query, limit=1000))} full-text results",
+        )
+        print(  # noqa: T201
+            format_stats("LIKE, all models", measure(lambda q=query: like_search(q))),
+        )
+        print(  # noqa: T201
+            format_stats(
+                "full-text, 20 best",
+                measure(lambda q=query: search.search(q)),
+            ),
+        )
+        print(  # noqa: T201
+            format_stats(
+                "LIKE, capabilities admin page",
+                measure(
+                    lambda q=query: admin_page(
+                        Capability.objects.filter(
+                            Q(name__icontains=q) | Q(description__icontains=q),
+                        ),
+                    ),
+                ),
+            ),
+        )
+        print(  # noqa: T201
+            format_stats(
+                "full-text, capabilities admin page",
+                measure(
+                    lambda q=query: admin_page(
+                        search.filter_matching(Capability.objects.all(), q),
+                    ),
+                ),
+            ),
+        )
+
+
+if __name__ == "__main__":
+    main()
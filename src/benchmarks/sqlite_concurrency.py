@@ -0,0 +1,184 @@
+"""Compare the SQLite configurations under concurrency.
+
+Runs the database work of a busy session on a populated SQLite file: sheets
+being read, counters clicked and states toggled. The default backend is
+compared with `SQLITE_PRODUCTION`, then with the writes going through the
+writer thread of `SQLITE_WRITE_QUEUE` as well. Like gunicorn, several
+processes each run several threads, and every operation ends as a request
+would, closing the connection unless it is persistent. Each configuration runs on
+a fresh copy of the same database. Prints the throughput, the latency of the
+operations, and how many failed with `database is locked`.
+
+    python -m benchmarks.sqlite_concurrency
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.utils import format_stats, setup_django
+
+PROCESSES = 2
+THREADS = 4
+OPERATIONS_PER_THREAD = 200
+CHARACTERS = 8
+CONFIGURATIONS = {
+    "default": {},
+    "production": {"SQLITE_PRODUCTION": "true"},
+    "production + write queue": {
+        "SQLITE_PRODUCTION": "true",
+        "SQLITE_WRITE_QUEUE": "true",
+    },
+}
+
+
+def populate() -> None:
+    from django.core.management import call_command
+    from model_bakery import baker
+
+    from character.models import Character, Profile, Race
+
+    call_command("loaddata", "initial_data", verbosity=0)
+    baker.make(
+        Character,
+        race=Race.objects.first(),
+        profile=Profile.objects.first(),
+        luck_points_max=10,
+        luck_points_remaining=5,
+        _quantity=CHARACTERS,
+    )
+
+
+def operations() -> list:
+    """Return the operations of a session, as callables of a character pk."""
+    from character import counters
+    from character.models import Character, HarmfulState
+    from common import writer
+
+    state = HarmfulState.objects.first()
+
+    def read_sheet(pk: int) -> None:
+        character = Character.objects.select_related("race", "profile").get(pk=pk)
+        list(character.states.all())
+        list(character.capabilities.all())
+
+    def click_counter(pk: int) -> None:
+        counters.update_counter(
+            Character.objects.filter(pk=pk),
+            counters.LUCK_POINTS,
+            1 if time.monotonic_ns() % 2 else -1,
+        )
+
+    def toggle_state(pk: int) -> None:
+        # Reads the existing rows before inserting, in a transaction.
+        character = Character.objects.get(pk=pk)
+        if character.states.filter(pk=state.pk).exists():
+            writer.write(character.states.remove, state)
+        else:
+            writer.write(character.states.add, state)
+
+    return [read_sheet, read_sheet, click_counter, toggle_state]
+
+
+def worker() -> None:
+    """Run the sessions of a process, print their results as JSON."""
+    import django
+
+    django.setup()
+    from django.db import OperationalError, close_old_connections
+
+    from character.models import Character
+
+    session_operations = operations()
+    pks = list(Character.objects.values_list("pk", flat=True))
+    close_old_connections()
+    results = {"latencies": [], "failed": 0}
+    lock = threading.Lock()
+
+    def session(thread: int) -> None:
+        latencies, failed = [], 0
+        for i in range(OPERATIONS_PER_THREAD):
+            operation = session_operations[i % len(session_operations)]
+            start = time.perf_counter()
+            try:
+                operation(pks[(thread + i) % len(pks)])
+            except OperationalError:
+                failed += 1
+            else:
+                latencies.append((time.perf_counter() - start) * 1000)
+            finally:
+                close_old_connections()
+        with lock:
+            results["latencies"] += latencies
+            results["failed"] += failed
+
+    threads = [
+        threading.Thread(target=session, args=(thread,)) for thread in range(THREADS)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results["elapsed"] = time.perf_counter() - start
+    print(json.dumps(results))  # noqa: T201
+
+
+def run(database: Path, name: str, settings: dict[str, str]) -> None:
+    env = {
+        **os.environ,
+        **settings,
+        "DATABASE_URL": f"sqlite:///{database}",
+        "SQLITE_WRITE_LOCK_FILE": f"{database}.lock",
+    }
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.sqlite_concurrency", "worker"],
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        for _ in range(PROCESSES)
+    ]
+    latencies, failed, elapsed = [], 0, 0
+    for process in processes:
+        results = json.loads(process.communicate()[0])
+        latencies += results["latencies"]
+        failed += results["failed"]
+        elapsed = max(elapsed, results["elapsed"])
+    latencies.sort()
+    stats = {
+        "median": latencies[len(latencies) // 2],
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "max": latencies[-1],
+    }
+    print(f"===== {name}, {PROCESSES}x{THREADS} threads =====")  # noqa: T201
+    print(format_stats("operations", stats))  # noqa: T201
+    print(  # noqa: T201
+        f"{len(latencies) / elapsed:8.1f} op/s, "
+        f"{failed} failed with database is locked",
+    )
+
+
+def main() -> None:
+    workdir = Path(tempfile.mkdtemp(prefix="charasheet-bench-"))
+    database = setup_django(workdir / "db.sqlite3")
+    populate()
+    for i, (name, settings) in enumerate(CONFIGURATIONS.items()):
+        copy = workdir / f"db-{i}.sqlite3"
+        shutil.copy(database, copy)
+        run(copy, name, settings)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["worker"]:
+        worker()
+    else:
+        main()
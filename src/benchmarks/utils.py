@@ -0,0 +1,52 @@
+"""Helpers shared by the benchmark scripts.
+
+Benchmarks run against a throw-away SQLite database so they never touch
+the development or production data. Run them from the `src` directory,
+for instance `python -m benchmarks.access_querysets`.
+"""
+
+import os
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+
+def setup_django(database_path: Path | None = None) -> Path:
+    """Configure Django on a fresh, migrated SQLite database and return its path."""
+    if database_path is None:
+        database_path = (
+            Path(tempfile.mkdtemp(prefix="charasheet-bench-")) / "db.sqlite3"
+        )
+    os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "charasheet.settings")
+    os.environ.setdefault("DEBUG", "false")
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command("migrate", verbosity=0)
+    return database_path
+
+
+def measure(func: Callable[[], object], *, repeat: int = 50) -> dict[str, float]:
+    """Call `func` `repeat` times and return latency statistics in milliseconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    return {
+        "min": durations[0],
+        "median": statistics.median(durations),
+        "p95": durations[int(len(durations) * 0.95) - 1],
+        "max": durations[-1],
+    }
+
+
+def format_stats(name: str, stats: dict[str, float]) -> str:
+    values = " ".join(f"{key}={value:8.3f}ms" for key, value in stats.items())
+    return f"{name:<40} {values}"
@@ -1,11 +1,20 @@
 from django.contrib import admin
 from django.forms import ModelForm
 
-from character import models
+from character import models, search
+
+
+class RulebookSearchMixin:
+    """Search in the full-text index of the rulebook, see `character.search`."""
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not search.available():
+            return super().get_search_results(request, queryset, search_term)
+        return search.filter_matching(queryset, search_term), False
 
 
 @admin.register(models.Capability)
-class CapabilityAdmin(admin.ModelAdmin):
+class CapabilityAdmin(RulebookSearchMixin, admin.ModelAdmin):
     list_display = ["name", "path", "rank", "limited", "spell"]
     list_filter = ["path", "path__profile", "path__race", "rank", "limited", "spell"]
     search_fields = ["name", "description"]
@@ -24,7 +33,7 @@ class CapabilityInline(admin.TabularInline):
 
 
 @admin.register(models.Path)
-class PathAdmin(admin.ModelAdmin):
+class PathAdmin(RulebookSearchMixin, admin.ModelAdmin):
     list_display = ["name", "category", "related_to"]
     list_filter = ["category"]
     search_fields = ["name"]
@@ -49,7 +58,7 @@ class PathAdmin(admin.ModelAdmin):
 
 
 @admin.register(models.RacialCapability)
-class RacialCapabilityAdmin(admin.ModelAdmin):
+class RacialCapabilityAdmin(RulebookSearchMixin, admin.ModelAdmin):
     list_display = ["name", "race"]
     list_filter = ["race"]
     search_fields = ["name", "description"]
@@ -212,12 +221,12 @@ class CharacterAdmin(admin.ModelAdmin):
 
 
 @admin.register(models.Weapon)
-class WeaponAdmin(admin.ModelAdmin):
+class WeaponAdmin(RulebookSearchMixin, admin.ModelAdmin):
     list_display = ["name", "damage"]
     search_fields = ["name", "special", "damage"]
 
 
 @admin.register(models.HarmfulState)
-class HarmfulStateAdmin(admin.ModelAdmin):
+class HarmfulStateAdmin(RulebookSearchMixin, admin.ModelAdmin):
     list_display = ["name", "description"]
     search_fields = ["name"]
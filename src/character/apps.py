@@ -5,3 +5,12 @@ class CharacterConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "character"
     verbose_name = "Personnages"
+
+    def ready(self) -> None:
+        from character import fragments, magic_stats, rulebook, search, thumbnails
+
+        fragments.connect_signals()
+        magic_stats.connect_signals()
+        rulebook.connect_signals()
+        search.connect_signals()
+        thumbnails.connect_signals()
@@ -0,0 +1,100 @@
+"""
+Conditional GET of the pages and snippets showing characters and parties.
+
+The ETag of a response is derived from change tokens read in a single query,
+such as `Character.version`, and from everything else the rendering depends
+on: the deployed templates and static files, the rulebook generation, the
+viewer, their rights on the character and their CSRF secret. An unchanged page is answered with a
+`304 Not Modified` before any template is rendered or related object loaded.
+"""
+
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
+from django.apps import apps
+from django.contrib import messages
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+from character.models import Character
+from character.permissions import get_character_permissions
+from character.rulebook import get_rulebook
+from party.models import Party
+
+
+def make_etag(request, *tokens) -> str | None:
+    """Return the ETag of a response to the request rendered from the tokens."""
+    if len(messages.get_messages(request)):
+        # Messages are displayed once, with the next rendered page.
+        return None
+    parts = (
+        release(),
+        get_rulebook().generation,
+        request.user.pk,
+        request.META.get("CSRF_COOKIE"),
+        *tokens,
+    )
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def release() -> str:
+    """Return a digest of the templates and static files being served."""
+    digest = hashlib.blake2b(digest_size=16)
+    for app_config in apps.get_app_configs():
+        templates = Path(app_config.path) / "templates"
+        for path in sorted(templates.rglob("*.html")):
+            digest.update(path.read_bytes())
+    digest.update(getattr(staticfiles_storage, "manifest_hash", "").encode())
+    return digest.hexdigest()
+
+
+def character_token(queryset, pk: int) -> int | None:
+    """Return the version of the character, or None if not in the queryset."""
+    return queryset.filter(pk=pk).values_list("version", flat=True).first()
+
+
+def party_token(queryset, pk: int) -> tuple[int, ...] | None:
+    """Return the versions of the party and its members, see `with_change_token`."""
+    return (
+        queryset.with_change_token()
+        .filter(pk=pk)
+        .values_list("version", "characters_version", "invites_version")
+        .first()
+    )
+
+
+def permissions_token(user, pk: int) -> tuple[bool, bool]:
+    """
+    Return whether the user owns and masters the character.
+
+    The sections shown depend on them, and the game master of a party can
+    change without the character: the permissions are read anyway to render.
+    """
+    permissions = get_character_permissions(user)
+    character = Character(pk=pk)
+    return permissions.owns(character), permissions.masters(character)
+
+
+def character_etag(request, pk: int) -> str | None:
+    user = request.user
+    token = character_token(Character.objects.friendly_to(user), pk)
+    if token is None:
+        return None
+    party = None
+    if party_pk := request.GET.get("party"):
+        party = party_token(Party.objects.related_to(user), party_pk)
+        if party is None:
+            return None
+    permissions = permissions_token(user, pk)
+    return make_etag(request, "character", pk, token, party, permissions)
+
+
+def managed_character_etag(request, pk: int) -> str | None:
+    token = character_token(Character.objects.managed_by(request.user), pk)
+    return token and make_etag(request, request.resolver_match.view_name, pk, token)
+
+
+def party_etag(request, pk: int) -> str | None:
+    token = party_token(Party.objects.related_to(request.user), pk)
+    return token and make_etag(request, "party", pk, token)
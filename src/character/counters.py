@@ -0,0 +1,136 @@
+"""
+Atomic updates of the +/- counters of characters and pets.
+
+Each click is applied with a single statement::
+
+    UPDATE ... SET x = MAX(0, MIN(<max>, x + delta)) WHERE ... RETURNING x
+
+The maximum is read from the row itself, so concurrent clicks of a player and
+their game master can never overwrite each other.
+"""
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from typing import Literal
+
+from django.db import connections, transaction
+from django.db.models import Expression, F, QuerySet, Value
+from django.db.models.functions import Greatest, Least
+from django.db.models.sql import UpdateQuery
+
+from common import writer
+from common.models import VersionedModel
+
+Change = int | Literal["ko", "max"]
+
+
+@dataclass(frozen=True)
+class Counter:
+    field: str
+    maximum: Expression | None = None
+
+    def parse(self, value: str) -> Change:
+        """Parse a change sent by the counter buttons: a delta, "ko" or "max"."""
+        if value == "ko" or (value == "max" and self.maximum is not None):
+            return value
+        return int(value)
+
+    def expression(self, change: Change) -> Expression:
+        if change == "ko":
+            value = Value(0)
+        elif change == "max":
+            if self.maximum is None:
+                msg = f"{self.field} has no maximum."
+                raise ValueError(msg)
+            value = self.maximum
+        else:
+            value = F(self.field) + Value(change)
+            if self.maximum is not None:
+                value = Least(self.maximum, value)
+        return Greatest(Value(0), value)
+
+
+def update_counters(
+    queryset: QuerySet,
+    changes: Mapping[Counter, Change],
+    *,
+    returning: Iterable[str] = (),
+) -> dict[str, int] | None:
+    """
+    Apply the changes to the single row selected by the queryset.
+
+    Return the new values by field name, along with the `returning` fields,
+    or None if no row matched. Runs in the writer thread when enabled, see
+    `common.writer`.
+    """
+    return writer.write(_update_counters, queryset, changes, returning)
+
+
+async def aupdate_counters(
+    queryset: QuerySet,
+    changes: Mapping[Counter, Change],
+    *,
+    returning: Iterable[str] = (),
+) -> dict[str, int] | None:
+    """Async version of `update_counters`."""
+    return await writer.awrite(_update_counters, queryset, changes, returning)
+
+
+def _update_counters(
+    queryset: QuerySet,
+    changes: Mapping[Counter, Change],
+    returning: Iterable[str],
+) -> dict[str, int] | None:
+    opts = queryset.model._meta  # noqa: SLF001
+    query = queryset.query.chain(UpdateQuery)
+    values = {
+        opts.get_field(counter.field): counter.expression(change)
+        for counter, change in changes.items()
+    }
+    if issubclass(queryset.model, VersionedModel):
+        values[opts.get_field("version")] = F("version") + 1
+    query.add_update_fields(
+        (field, None, expression) for field, expression in values.items()
+    )
+    fields = [*(counter.field for counter in changes), *returning]
+    connection = connections[queryset.db]
+    if connection.vendor not in {"sqlite", "postgresql"}:
+        return _update_then_select(queryset, query, fields)
+
+    sql, params = query.get_compiler(queryset.db).as_sql()
+    columns = ", ".join(
+        connection.ops.quote_name(opts.get_field(field).column) for field in fields
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f"{sql} RETURNING {columns}", params)
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    return dict(zip(fields, row, strict=True))
+
+
+def update_counter(queryset: QuerySet, counter: Counter, change: Change) -> int | None:
+    """Apply a single change, see `update_counters`."""
+    values = update_counters(queryset, {counter: change})
+    return values and values[counter.field]
+
+
+def _update_then_select(queryset, query, fields) -> dict[str, int] | None:
+    # Backends without UPDATE ... RETURNING: the update stays atomic,
+    # reading the result back costs a second query in the same transaction.
+    with transaction.atomic(using=queryset.db):
+        if not query.get_compiler(queryset.db).execute_sql():
+            return None
+        return queryset.values(*fields).get()
+
+
+HEALTH = Counter("health_remaining", maximum=F("health_max"))
+MANA = Counter("mana_remaining", maximum=F("mana_max"))
+LUCK_POINTS = Counter("luck_points_remaining", maximum=F("luck_points_max"))
+RECOVERY_POINTS = Counter("recovery_points_remaining", maximum=Value(5))
+DEFENSE_MISC = Counter("defense_misc")
+SHIELD = Counter("shield")
+ARMOR = Counter("armor")
+INITIATIVE_MISC = Counter("initiative_misc")
+
+PET_HEALTH = Counter("health_remaining", maximum=F("health_max"))
@@ -1,9 +1,74 @@
 from django import forms
 from django.core.exceptions import ValidationError
-from django.db.models import Q
+from django.forms.models import ModelChoiceIterator
 
-from character.models import Character, Path, RacialCapability
+from character.models import Character, Path
 from character.models.pet import Pet
+from character.rulebook import get_rulebook
+
+
+class RulebookChoiceIterator(ModelChoiceIterator):
+    """Iterate over the choices of a rulebook field without querying."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in self.field.get_objects():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(self.field.get_objects()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.get_objects())
+
+
+class RulebookFieldMixin:
+    """
+    Take the choices of a model choice field from the rulebook cache.
+
+    The choices are every object of the model, unless `objects` is set to a
+    subset of them.
+    """
+
+    iterator = RulebookChoiceIterator
+    objects: list | None = None
+
+    def get_objects(self) -> list:
+        if self.objects is not None:
+            return self.objects
+        return get_rulebook().all(self.queryset.model)
+
+    def get_objects_by_pk(self, values) -> dict:
+        objects = {obj.pk: obj for obj in self.get_objects()}
+        objects_by_pk = {}
+        for value in values:
+            try:
+                objects_by_pk[value] = objects[int(value)]
+            except (KeyError, TypeError, ValueError):
+                raise ValidationError(
+                    self.error_messages["invalid_choice"],
+                    code="invalid_choice",
+                    params={"value": value},
+                ) from None
+        return objects_by_pk
+
+
+class RulebookChoiceField(RulebookFieldMixin, forms.ModelChoiceField):
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        return self.get_objects_by_pk([value])[value]
+
+
+class RulebookMultipleChoiceField(RulebookFieldMixin, forms.ModelMultipleChoiceField):
+    def _check_values(self, value) -> list:
+        if isinstance(value, str | bytes):
+            raise ValidationError(
+                self.error_messages["invalid_list"],
+                code="invalid_list",
+            )
+        return list(self.get_objects_by_pk(dict.fromkeys(value)).values())
 
 
 class EquipmentForm(forms.ModelForm):
@@ -13,12 +78,12 @@ class EquipmentForm(forms.ModelForm):
 
 
 class AddPathForm(forms.Form):
-    character_path = forms.ModelChoiceField(
+    character_path = RulebookChoiceField(
         Path.objects.none(),
         required=False,
         empty_label="----- Voies liées au personnage -----",
     )
-    other_path = forms.ModelChoiceField(
+    other_path = RulebookChoiceField(
         Path.objects.none(),
         required=False,
         empty_label="----- Autres voies -----",
@@ -26,20 +91,31 @@ class AddPathForm(forms.Form):
 
     def __init__(self, character: Character, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
-        paths = {cap.path_id for cap in character.capabilities.all()}
-        paths = (
-            Path.objects.exclude(pk__in=paths)
-            .order_by("profile__name", "race__name")
-            .select_related("profile", "race")
+        known = {
+            progress.path.pk
+            for progress in character.capability_tree
+            if progress.known_capabilities
+        }
+        paths = sorted(
+            (path for path in get_rulebook().all(Path) if path.pk not in known),
+            key=lambda path: (
+                path.profile is not None,
+                path.profile.name if path.profile else "",
+                path.race is not None,
+                path.race.name if path.race else "",
+            ),
         )
-        character_paths = paths.filter(
-            Q(profile=character.profile) | Q(race=character.race),
-        )
-        self.fields["character_path"].queryset = character_paths
+        character_paths = [
+            path
+            for path in paths
+            if (path.profile_id and path.profile_id == character.profile_id)
+            or (path.race_id and path.race_id == character.race_id)
+        ]
+        self.fields["character_path"].objects = character_paths
         self.fields["character_path"].widget.attrs["class"] = "form-select"
-        self.fields["other_path"].queryset = paths.exclude(
-            pk__in={path.pk for path in character_paths},
-        )
+        self.fields["other_path"].objects = [
+            path for path in paths if path not in character_paths
+        ]
         self.fields["other_path"].widget.attrs["class"] = "form-select"
 
     def clean(self):
@@ -54,9 +130,6 @@ class AddPathForm(forms.Form):
 class CharacterForm(forms.ModelForm):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
-        self.fields["racial_capability"].queryset = (
-            RacialCapability.objects.select_related("race")
-        )
         self.fields["damage_reduction"].widget.attrs.update({"rows": 2})
         self.fields["equipment"].widget.attrs.update({"rows": 3})
 
@@ -99,6 +172,12 @@ class CharacterForm(forms.ModelForm):
             "damage_reduction",
             "notes",
         ]
+        field_classes = {
+            "race": RulebookChoiceField,
+            "profile": RulebookChoiceField,
+            "racial_capability": RulebookChoiceField,
+            "weapons": RulebookMultipleChoiceField,
+        }
 
 
 class PetForm(forms.ModelForm):
@@ -0,0 +1,52 @@
+"""
+Versioned cache of the rendered fragments of characters.
+
+Character cards and sheet sections are cached with the `{% cache %}` template
+tag under the character's `version`, the role of the viewer and the rulebook
+generation. Any write bumps the version, so a cached fragment never needs
+invalidating: it just stops being looked up. The keys being self-validating,
+fragments are kept in a cache local to each process, where a hit costs
+neither a query nor template work.
+"""
+
+from django.db.models.signals import post_delete, post_save
+
+from character.models import Character
+from character.models.pet import Pet
+from character.permissions import get_character_permissions
+from common import versions
+
+OWNER = "owner"
+MANAGER = "manager"
+OBSERVER = "observer"
+
+# Relations shown on the character sheet and cards, on both ends.
+VERSIONED_RELATIONS = (
+    Character.states,
+    Character.capabilities,
+    Character.paths,
+    Character.weapons,
+    Character.parties,
+    Character.invites,
+)
+
+
+def viewer_role(character: Character, user) -> str:
+    """Return the role of the user on the character, to vary fragments on."""
+    permissions = get_character_permissions(user)
+    if permissions.owns(character):
+        return OWNER
+    if permissions.manages(character):
+        return MANAGER
+    return OBSERVER
+
+
+def _on_pet_change(instance: Pet, **kwargs) -> None:  # noqa: ARG001
+    # Pets are shown on the sheet of their owner.
+    Character.objects.filter(pk=instance.owner_id).touch()
+
+
+def connect_signals() -> None:
+    versions.connect_relations(*VERSIONED_RELATIONS)
+    post_save.connect(_on_pet_change, sender=Pet)
+    post_delete.connect(_on_pet_change, sender=Pet)
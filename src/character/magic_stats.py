@@ -0,0 +1,35 @@
+"""
+Keep the stored magic stats of the characters in step with their profile.
+
+`modifier_magic`, `attack_magic` and `mana_max` are computed by
+`Character.save()` from the character's own fields, and in SQL by
+`CharacterQuerySet.update_magic_stats` when the profile changes. The latter is
+run on `post_save`, raw saves of `loaddata` included: for each saved profile,
+and for each character loaded raw, once its profile exists.
+
+Writes sending no signal leave the stats stale: `Profile.objects.update()`,
+raw SQL, or migrations editing profiles. Run `update_magic_stats` after them.
+"""
+
+from django.db.models import Exists, OuterRef
+from django.db.models.signals import post_save
+
+from character.models import Character, Profile
+
+
+def _on_profile_save(instance, **kwargs) -> None:  # noqa: ARG001
+    instance.characters.all().update_magic_stats()
+
+
+def _on_character_save(instance, raw, **kwargs) -> None:  # noqa: ARG001
+    # Otherwise computed by `save()`. Loaded raw, its profile may come later.
+    if raw:
+        Character.objects.filter(
+            Exists(Profile.objects.filter(pk=OuterRef("profile_id"))),
+            pk=instance.pk,
+        ).update_magic_stats()
+
+
+def connect_signals() -> None:
+    post_save.connect(_on_profile_save, sender=Profile)
+    post_save.connect(_on_character_save, sender=Character)
@@ -0,0 +1,38 @@
+from django.core.management import BaseCommand
+
+from character import thumbnails
+from character.models import Character
+
+
+class Command(BaseCommand):
+    help = "Store the variants of the profile pictures uploaded before them."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Also store again the variants of the pictures already processed.",
+        )
+
+    def handle(self, *args, **options) -> None:  # noqa: ARG002
+        characters = Character.objects.exclude(profile_picture="").exclude(
+            profile_picture__isnull=True,
+        )
+        if not options["all"]:
+            characters = characters.filter(profile_picture_width__isnull=True)
+        processed = 0
+        for character in characters.only("profile_picture").iterator():
+            picture = character.profile_picture
+            try:
+                width, height = thumbnails.generate(picture)
+            except OSError as e:
+                self.stderr.write(f"{picture.name}: {type(e)}: {e}")
+                continue
+            # Bumps the version, for the cached fragments to show the variants.
+            Character.objects.filter(pk=character.pk).update(
+                profile_picture_width=width,
+                profile_picture_height=height,
+            )
+            processed += 1
+            self.stdout.write(self.style.SUCCESS(f"Processed {picture.name}"))
+        self.stdout.write(f"Finished processing {processed} pictures.")
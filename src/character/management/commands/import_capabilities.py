@@ -5,6 +5,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 
 from character.models import Capability, Path
+from character.rulebook import invalidate as invalidate_rulebook
 
 
 class Command(BaseCommand):
@@ -25,6 +26,7 @@ class Command(BaseCommand):
                 self.import_capability(card)
             except Exception as e:
                 self.stderr.write(f"{type(e)}: {e}")
+        invalidate_rulebook()
         self.stdout.write(f"Finished processing {len(cards)} caps.")
 
     def import_capability(self, card: WebElement):
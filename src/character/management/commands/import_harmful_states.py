@@ -4,6 +4,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 
 from character.models.character import HarmfulState
+from character.rulebook import invalidate as invalidate_rulebook
 
 
 class Command(BaseCommand):
@@ -17,6 +18,7 @@ class Command(BaseCommand):
                 self.import_row(url, state)
             except Exception as e:
                 self.stderr.write(f"{type(e)}: {e}")
+        invalidate_rulebook()
         self.stdout.write(f"Finished processing {len(states)} states.")
 
     def import_row(self, url: str, state_row: WebElement) -> None:
@@ -4,6 +4,7 @@ from selenium.webdriver import Keys
 from selenium.webdriver.common.by import By
 
 from character.models import Path, Profile, Race
+from character.rulebook import invalidate as invalidate_rulebook
 
 
 class Command(BaseCommand):
@@ -25,6 +26,7 @@ class Command(BaseCommand):
                 self.import_path(url)
             except Exception as e:
                 self.stderr.write(f"{type(e)}: {e}")
+        invalidate_rulebook()
         self.stdout.write(f"Finished processing {len(urls)} paths.")
 
     def import_path(self, url: str):
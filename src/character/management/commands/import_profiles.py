@@ -4,6 +4,7 @@ from selenium.webdriver.common.by import By
 
 from character.models import Profile
 from character.models.dice import Dice
+from character.rulebook import invalidate as invalidate_rulebook
 
 
 class Command(BaseCommand):
@@ -18,6 +19,7 @@ class Command(BaseCommand):
                 self.import_profile(url)
             except Exception as e:
                 self.stderr.write(f"{type(e)}: {e}")
+        invalidate_rulebook()
 
     def import_profile(self, url: str) -> None:
         self.selenium.get(url)
@@ -3,6 +3,7 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 
 from character.models import Race, RacialCapability
+from character.rulebook import invalidate as invalidate_rulebook
 
 
 class Command(BaseCommand):
@@ -17,6 +18,7 @@ class Command(BaseCommand):
                 self.import_race(url)
             except Exception as e:
                 self.stderr.write(f"{type(e)}: {e}")
+        invalidate_rulebook()
         self.stdout.write(f"Finished processing {len(urls)} races.")
 
     def import_race(self, url: str) -> None:
@@ -0,0 +1,11 @@
+from django.core.management import BaseCommand
+
+from character import search
+
+
+class Command(BaseCommand):
+    help = "Index every rulebook object again in the full-text search."
+
+    def handle(self, *args, **options) -> None:  # noqa: ARG002
+        search.rebuild()
+        self.stdout.write("Rebuilt the rulebook search index.")
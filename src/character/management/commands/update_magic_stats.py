@@ -0,0 +1,11 @@
+from django.core.management import BaseCommand
+
+from character.models import Character
+
+
+class Command(BaseCommand):
+    help = "Compute the magic stats of every character again, from their profile."
+
+    def handle(self, *args, **options) -> None:  # noqa: ARG002
+        updated = Character.objects.update_magic_stats()
+        self.stdout.write(f"Updated the magic stats of {updated} characters.")
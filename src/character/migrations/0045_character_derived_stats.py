@@ -0,0 +1,614 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:56
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+import django.db.models.lookups
+from django.db import migrations, models
+
+MAGICAL_ABILITIES = {"INT": "intelligence", "SAG": "wisdom", "CHA": "charisma"}
+
+
+def modifier(value):
+    if not value:
+        return 0
+    if 1 < value < 10:  # noqa: PLR2004
+        value -= 1
+    value -= 10
+    return int(value / 2)
+
+
+def compute_magic_stats(apps, schema_editor):  # noqa: ARG001
+    Character = apps.get_model("character", "Character")
+    characters = list(Character.objects.select_related("profile"))
+    for character in characters:
+        ability = MAGICAL_ABILITIES.get(character.profile.magical_strength)
+        character.modifier_magic = 0
+        if ability is not None:
+            character.modifier_magic = modifier(
+                getattr(character, f"value_{ability}"),
+            ) + getattr(character, f"bonus_{ability}")
+        character.attack_magic = character.level + character.modifier_magic
+        character.mana_max = character.profile.mana_max_compute * character.level
+        if character.mana_max:
+            character.mana_max += character.modifier_magic
+    Character.objects.bulk_update(
+        characters,
+        ["modifier_magic", "attack_magic", "mana_max"],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("character", "0044_character_bonus_charisma_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="character",
+            name="attack_magic",
+            field=models.SmallIntegerField(
+                default=0,
+                editable=False,
+                verbose_name="attaque magique",
+            ),
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="attack_melee",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.expressions.CombinedExpression(
+                    models.F("level"),
+                    "+",
+                    django.db.models.expressions.CombinedExpression(
+                        models.Case(
+                            models.When(
+                                django.db.models.lookups.Exact(
+                                    models.F("value_strength"),
+                                    0,
+                                ),
+                                then=models.Value(0),
+                            ),
+                            models.When(
+                                django.db.models.lookups.Range(
+                                    models.F("value_strength"),
+                                    (2, 9),
+                                ),
+                                then=django.db.models.expressions.CombinedExpression(
+                                    django.db.models.expressions.CombinedExpression(
+                                        models.F("value_strength"),
+                                        "-",
+                                        models.Value(11),
+                                    ),
+                                    "/",
+                                    models.Value(2),
+                                ),
+                            ),
+                            default=django.db.models.expressions.CombinedExpression(
+                                django.db.models.expressions.CombinedExpression(
+                                    models.F("value_strength"),
+                                    "-",
+                                    models.Value(10),
+                                ),
+                                "/",
+                                models.Value(2),
+                            ),
+                        ),
+                        "+",
+                        models.F("bonus_strength"),
+                    ),
+                ),
+                output_field=models.SmallIntegerField(),
+                verbose_name="attaque au contact",
+            ),
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="attack_range",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.expressions.CombinedExpression(
+                    models.F("level"),
+                    "+",
+                    django.db.models.expressions.CombinedExpression(
+                        models.Case(
+                            models.When(
+                                django.db.models.lookups.Exact(
+                                    models.F("value_dexterity"),
+                                    0,
+                                ),
+                                then=models.Value(0),
+                            ),
+                            models.When(
+                                django.db.models.lookups.Range(
+                                    models.F("value_dexterity"),
+                                    (2, 9),
+                                ),
+                                then=django.db.models.expressions.CombinedExpression(
+                                    django.db.models.expressions.CombinedExpression(
+                                        models.F("value_dexterity"),
+                                        "-",
+                                        models.Value(11),
+                                    ),
+                                    "/",
+                                    models.Value(2),
+                                ),
+                            ),
+                            default=django.db.models.expressions.CombinedExpression(
+                                django.db.models.expressions.CombinedExpression(
+                                    models.F("value_dexterity"),
+                                    "-",
+                                    models.Value(10),
+                                ),
+                                "/",
+                                models.Value(2),
+                            ),
+                        ),
+                        "+",
+                        models.F("bonus_dexterity"),
+                    ),
+                ),
+                output_field=models.SmallIntegerField(),
+                verbose_name="attaque à distance",
+            ),
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="defense",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.expressions.CombinedExpression(
+                    django.db.models.expressions.CombinedExpression(
+                        django.db.models.expressions.CombinedExpression(
+                            django.db.models.expressions.CombinedExpression(
+                                models.Value(10),
+                                "+",
+                                models.F("armor"),
+                            ),
+                            "+",
+                            models.F("shield"),
+                        ),
+                        "+",
+                        django.db.models.expressions.CombinedExpression(
+                            models.Case(
+                                models.When(
+                                    django.db.models.lookups.Exact(
+                                        models.F("value_dexterity"),
+                                        0,
+                                    ),
+                                    then=models.Value(0),
+                                ),
+                                models.When(
+                                    django.db.models.lookups.Range(
+                                        models.F("value_dexterity"),
+                                        (2, 9),
+                                    ),
+                                    then=django.db.models.expressions.CombinedExpression(
+                                        django.db.models.expressions.CombinedExpression(
+                                            models.F("value_dexterity"),
+                                            "-",
+                                            models.Value(11),
+                                        ),
+                                        "/",
+                                        models.Value(2),
+                                    ),
+                                ),
+                                default=django.db.models.expressions.CombinedExpression(
+                                    django.db.models.expressions.CombinedExpression(
+                                        models.F("value_dexterity"),
+                                        "-",
+                                        models.Value(10),
+                                    ),
+                                    "/",
+                                    models.Value(2),
+                                ),
+                            ),
+                            "+",
+                            models.F("bonus_dexterity"),
+                        ),
+                    ),
+                    "+",
+                    models.F("defense_misc"),
+                ),
+                output_field=models.SmallIntegerField(),
+                verbose_name="défense",
+            ),
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="luck_points_max",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.functions.comparison.Greatest(
+                    models.Value(0),
+                    django.db.models.expressions.CombinedExpression(
+                        models.Value(3),
+                        "+",
+                        django.db.models.expressions.CombinedExpression(
+                            models.Case(
+                                models.When(
+                                    django.db.models.lookups.Exact(
+                                        models.F("value_charisma"),
+                                        0,
+                                    ),
+                                    then=models.Value(0),
+                                ),
+                                models.When(
+                                    django.db.models.lookups.Range(
+                                        models.F("value_charisma"),
+                                        (2, 9),
+                                    ),
+                                    then=django.db.models.expressions.CombinedExpression(
+                                        django.db.models.expressions.CombinedExpression(
+                                            models.F("value_charisma"),
+                                            "-",
+                                            models.Value(11),
+                                        ),
+                                        "/",
+                                        models.Value(2),
+                                    ),
+                                ),
+                                default=django.db.models.expressions.CombinedExpression(
+                                    django.db.models.expressions.CombinedExpression(
+                                        models.F("value_charisma"),
+                                        "-",
+                                        models.Value(10),
+                                    ),
+                                    "/",
+                                    models.Value(2),
+                                ),
+                            ),
+                            "+",
+                            models.F("bonus_charisma"),
+                        ),
+                    ),
+                ),
+                output_field=models.SmallIntegerField(),
+                verbose_name="points de chance max",
+            ),
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="mana_max",
+            field=models.SmallIntegerField(
+                default=0,
+                editable=False,
+                verbose_name="mana max",
+            ),
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="modifier_charisma",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.expressions.CombinedExpression(
+                    models.Case(
+                        models.When(
+                            django.db.models.lookups.Exact(
+                                models.F("value_charisma"),
+                                0,
+                            ),
+                            then=models.Value(0),
+                        ),
+                        models.When(
+                            django.db.models.lookups.Range(
+                                models.F("value_charisma"),
+                                (2, 9),
+                            ),
+                            then=django.db.models.expressions.CombinedExpression(
+                                django.db.models.expressions.CombinedExpression(
+                                    models.F("value_charisma"),
+                                    "-",
+                                    models.Value(11),
+                                ),
+                                "/",
+                                models.Value(2),
+                            ),
+                        ),
+                        default=django.db.models.expressions.CombinedExpression(
+                            django.db.models.expressions.CombinedExpression(
+                                models.F("value_charisma"),
+                                "-",
+                                models.Value(10),
+                            ),
+                            "/",
+                            models.Value(2),
+                        ),
+                    ),
+                    "+",
+                    models.F("bonus_charisma"),
+                ),
+                output_field=models.SmallIntegerField(),
+                verbose_name="mod. charisme",
+            ),
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="modifier_constitution",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.expressions.CombinedExpression(
+                    models.Case(
+                        models.When(
+                            django.db.models.lookups.Exact(
+                                models.F("value_constitution"),
+                                0,
+                            ),
+                            then=models.Value(0),
+                        ),
+                        models.When(
+                            django.db.models.lookups.Range(
+                                models.F("value_constitution"),
+                                (2, 9),
+                            ),
+                            then=django.db.models.expressions.CombinedExpression(
+                                django.db.models.expressions.CombinedExpression(
+                                    models.F("value_constitution"),
+                                    "-",
+                                    models.Value(11),
+                                ),
+                                "/",
+                                models.Value(2),
+                            ),
+                        ),
+                        default=django.db.models.expressions.CombinedExpression(
+                            django.db.models.expressions.CombinedExpression(
+                                models.F("value_constitution"),
+                                "-",
+                                models.Value(10),
+                            ),
+                            "/",
+                            models.Value(2),
+                        ),
+                    ),
+                    "+",
+                    models.F("bonus_constitution"),
+                ),
+                output_field=models.SmallIntegerField(),
+                verbose_name="mod. constitution",
+            ),
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="modifier_dexterity",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.expressions.CombinedExpression(
+                    models.Case(
+                        models.When(
+                            django.db.models.lookups.Exact(
+                                models.F("value_dexterity"),
+                                0,
+                            ),
+                            then=models.Value(0),
+                        ),
+                        models.When(
+                            django.db.models.lookups.Range(
+                                models.F("value_dexterity"),
+                                (2, 9),
+                            ),
+                            then=django.db.models.expressions.CombinedExpression(
+                                django.db.models.expressions.CombinedExpression(
+                                    models.F("value_dexterity"),
+                                    "-",
+                                    models.Value(11),
+                                ),
+                                "/",
+                                models.Value(2),
+                            ),
+                        ),
+                        default=django.db.models.expressions.CombinedExpression(
+                            django.db.models.expressions.CombinedExpression(
+                                models.F("value_dexterity"),
+                                "-",
+                                models.Value(10),
+                            ),
+                            "/",
+                            models.Value(2),
+                        ),
+                    ),
+                    "+",
+                    models.F("bonus_dexterity"),
+                ),
+                output_field=models.SmallIntegerField(),
+                verbose_name="mod. dextérité",
+            ),
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="modifier_initiative",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.expressions.CombinedExpression(
+                    django.db.models.expressions.CombinedExpression(
+                        models.Case(
+                            models.When(
+                                django.db.models.lookups.Exact(
+                                    models.F("value_dexterity"),
+                                    0,
+                                ),
+                                then=models.Value(0),
+                            ),
+                            models.When(
+                                django.db.models.lookups.Range(
+                                    models.F("value_dexterity"),
+                                    (2, 9),
+                                ),
+                                then=django.db.models.expressions.CombinedExpression(
+                                    django.db.models.expressions.CombinedExpression(
+                                        models.F("value_dexterity"),
+                                        "-",
+                                        models.Value(11),
+                                    ),
+                                    "/",
+                                    models.Value(2),
+                                ),
+                            ),
+                            default=django.db.models.expressions.CombinedExpression(
+                                django.db.models.expressions.CombinedExpression(
+                                    models.F("value_dexterity"),
+                                    "-",
+                                    models.Value(10),
+                                ),
+                                "/",
+                                models.Value(2),
+                            ),
+                        ),
+                        "+",
+                        models.F("bonus_dexterity"),
+                    ),
+                    "+",
+                    models.F("initiative_misc"),
+                ),
+                output_field=models.SmallIntegerField(),
+                verbose_name="initiative",
+            ),
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="modifier_intelligence",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.expressions.CombinedExpression(
+                    models.Case(
+                        models.When(
+                            django.db.models.lookups.Exact(
+                                models.F("value_intelligence"),
+                                0,
+                            ),
+                            then=models.Value(0),
+                        ),
+                        models.When(
+                            django.db.models.lookups.Range(
+                                models.F("value_intelligence"),
+                                (2, 9),
+                            ),
+                            then=django.db.models.expressions.CombinedExpression(
+                                django.db.models.expressions.CombinedExpression(
+                                    models.F("value_intelligence"),
+                                    "-",
+                                    models.Value(11),
+                                ),
+                                "/",
+                                models.Value(2),
+                            ),
+                        ),
+                        default=django.db.models.expressions.CombinedExpression(
+                            django.db.models.expressions.CombinedExpression(
+                                models.F("value_intelligence"),
+                                "-",
+                                models.Value(10),
+                            ),
+                            "/",
+                            models.Value(2),
+                        ),
+                    ),
+                    "+",
+                    models.F("bonus_intelligence"),
+                ),
+                output_field=models.SmallIntegerField(),
+                verbose_name="mod. intelligence",
+            ),
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="modifier_magic",
+            field=models.SmallIntegerField(
+                default=0,
+                editable=False,
+                verbose_name="mod. magique",
+            ),
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="modifier_strength",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.expressions.CombinedExpression(
+                    models.Case(
+                        models.When(
+                            django.db.models.lookups.Exact(
+                                models.F("value_strength"),
+                                0,
+                            ),
+                            then=models.Value(0),
+                        ),
+                        models.When(
+                            django.db.models.lookups.Range(
+                                models.F("value_strength"),
+                                (2, 9),
+                            ),
+                            then=django.db.models.expressions.CombinedExpression(
+                                django.db.models.expressions.CombinedExpression(
+                                    models.F("value_strength"),
+                                    "-",
+                                    models.Value(11),
+                                ),
+                                "/",
+                                models.Value(2),
+                            ),
+                        ),
+                        default=django.db.models.expressions.CombinedExpression(
+                            django.db.models.expressions.CombinedExpression(
+                                models.F("value_strength"),
+                                "-",
+                                models.Value(10),
+                            ),
+                            "/",
+                            models.Value(2),
+                        ),
+                    ),
+                    "+",
+                    models.F("bonus_strength"),
+                ),
+                output_field=models.SmallIntegerField(),
+                verbose_name="mod. force",
+            ),
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="modifier_wisdom",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.expressions.CombinedExpression(
+                    models.Case(
+                        models.When(
+                            django.db.models.lookups.Exact(models.F("value_wisdom"), 0),
+                            then=models.Value(0),
+                        ),
+                        models.When(
+                            django.db.models.lookups.Range(
+                                models.F("value_wisdom"),
+                                (2, 9),
+                            ),
+                            then=django.db.models.expressions.CombinedExpression(
+                                django.db.models.expressions.CombinedExpression(
+                                    models.F("value_wisdom"),
+                                    "-",
+                                    models.Value(11),
+                                ),
+                                "/",
+                                models.Value(2),
+                            ),
+                        ),
+                        default=django.db.models.expressions.CombinedExpression(
+                            django.db.models.expressions.CombinedExpression(
+                                models.F("value_wisdom"),
+                                "-",
+                                models.Value(10),
+                            ),
+                            "/",
+                            models.Value(2),
+                        ),
+                    ),
+                    "+",
+                    models.F("bonus_wisdom"),
+                ),
+                output_field=models.SmallIntegerField(),
+                verbose_name="mod. sagesse",
+            ),
+        ),
+        migrations.RunPython(compute_magic_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:05
+
+import markdown
+from django.db import migrations, models
+
+
+def render_notes(apps, schema_editor):  # noqa: ARG001
+    Character = apps.get_model("character", "Character")
+    md = markdown.Markdown(extensions=["extra", "nl2br"])
+    characters = list(Character.objects.only("notes", "gm_notes"))
+    for character in characters:
+        character.notes_html = md.reset().convert(character.notes)
+        character.gm_notes_html = md.reset().convert(character.gm_notes)
+    Character.objects.bulk_update(
+        characters,
+        ["notes_html", "gm_notes_html"],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("character", "0045_character_derived_stats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="character",
+            name="gm_notes_html",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="notes_html",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(render_notes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("character", "0046_character_rendered_notes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="character",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
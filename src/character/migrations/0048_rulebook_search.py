@@ -0,0 +1,47 @@
+from django.db import migrations
+
+TABLE = "character_rulebook_search"
+# Source of the rows of each model, and their code in the rowid.
+SOURCES = [
+    ("character_capability", 1, "description"),
+    ("character_path", 2, "notes"),
+    ("character_racialcapability", 3, "description"),
+    ("character_weapon", 4, "damage || ' ' || special"),
+    ("character_harmfulstate", 5, "description"),
+]
+
+
+def create_search_table(apps, schema_editor) -> None:  # noqa: ARG001
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE "{TABLE}" USING fts5('
+        "name, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3');",
+    )
+    for table, code, body in SOURCES:
+        schema_editor.execute(
+            f'INSERT INTO "{TABLE}" (rowid, name, body) '  # noqa: S608
+            f'SELECT id * 8 + {code}, name, {body} FROM "{table}";',
+        )
+
+
+def drop_search_table(apps, schema_editor) -> None:  # noqa: ARG001
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f'DROP TABLE "{TABLE}";')
+
+
+class Migration(migrations.Migration):
+    """
+    Full-text index of the rulebook, see `character.search`.
+
+    An FTS5 table, only created on SQLite. Each row is a rulebook object:
+    its rowid is the pk of the object times 8, plus the code of its model.
+    """
+
+    dependencies = [
+        ("character", "0047_character_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("character", "0048_rulebook_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="character",
+            name="profile_picture_height",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="profile_picture_width",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import hashlib
+
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django_extensions.db.models import TimeStampedModel
@@ -66,19 +68,22 @@ class Path(DocumentedModel, UniquelyNamedModel, TimeStampedModel, models.Model):
         return None
 
     def get_next_capability(self, character) -> Capability:
-        next_rank = self.max_rank(character) + 1
-        return self.capabilities.get(rank=next_rank)
+        progress = character.capability_tree.get(self.pk)
+        next_capability = progress and progress.next_capability
+        if next_capability is None:
+            msg = f"{character} has no next capability in {self}."
+            raise Capability.DoesNotExist(msg)
+        return next_capability
 
     def has_next_capability(self, character) -> bool:
-        try:
-            self.get_next_capability(character)
-        except Capability.DoesNotExist:
-            return False
-        else:
-            return True
+        progress = character.capability_tree.get(self.pk)
+        return progress is not None and progress.has_next_capability
 
     def max_rank(self, character) -> int:
-        return character.capabilities.filter(path=self).count()
+        progress = character.capability_tree.get(self.pk)
+        if progress is None:
+            return 0
+        return progress.max_rank
 
 
 class CapabilityManager(models.Manager):
@@ -134,6 +139,11 @@ class Capability(DocumentedModel, TimeStampedModel, models.Model):
             return 1
         return 2
 
+    @property
+    def description_hash(self) -> str:
+        """Identify the description, for its URL to be cached, see the view."""
+        return hashlib.sha256(self.description.encode()).hexdigest()[:12]
+
 
 class RacialCapabilityManager(models.Manager):
     def get_by_natural_key(self, name: str, race_id: int):
@@ -1,21 +1,37 @@
-import collections
-from collections.abc import Iterable
+import threading
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
-from functools import partial
+from functools import cached_property, lru_cache, partial
 
 import markdown
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import Q
-from django.db.models.functions import Lower
+from django.db.models import (
+    Case,
+    Exists,
+    Expression,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Concat, Greatest, Lower
+from django.db.models.lookups import Exact, Range
 from django.urls import reverse
 from django_extensions.db.models import TimeStampedModel
 
+from character import thumbnails
 from character.models import Capability, Path
 from character.models.dice import Dice
 from character.models.equipment import Weapon
-from character.models.utils import cache_on_instance
-from common.models import DocumentedModel, UniquelyNamedModel
+from common.models import (
+    DocumentedModel,
+    UniquelyNamedModel,
+    VersionedModel,
+    VersionedQuerySet,
+)
 
 
 class Profile(  # noqa: DJ008
@@ -91,12 +107,116 @@ def modifier(value: int) -> int:
     return int(value / 2)
 
 
+def modifier_expression(ability: str, ref: type[F] = F) -> Expression:
+    """Compute `Character.modifier_<ability>` in SQL."""
+    value = ref(f"value_{ability}")
+    return Case(
+        When(Exact(value, 0), then=Value(0)),
+        When(Range(value, (2, 9)), then=(value - 11) / 2),
+        default=(value - 10) / 2,
+    ) + ref(f"bonus_{ability}")
+
+
+MAGICAL_ABILITIES = {
+    Profile.MagicalStrength.INTELLIGENCE: "intelligence",
+    Profile.MagicalStrength.WISDOM: "wisdom",
+    Profile.MagicalStrength.CHARISMA: "charisma",
+}
+
+
+def _modifier_magic_case() -> Expression:
+    return Case(
+        *(
+            When(
+                magical_strength=strength,
+                then=modifier_expression(ability, ref=OuterRef),
+            )
+            for strength, ability in MAGICAL_ABILITIES.items()
+        ),
+        default=Value(0),
+    )
+
+
+def _from_profile(**expressions) -> Subquery:
+    return Subquery(
+        Profile.objects.filter(pk=OuterRef("profile_id"))
+        .order_by()
+        .values(**expressions),
+    )
+
+
+def modifier_magic_expression() -> Expression:
+    """Compute `Character.modifier_magic` in SQL, in one subquery on the profile."""
+    return _from_profile(modifier_magic=_modifier_magic_case())
+
+
+def mana_max_expression() -> Expression:
+    """Compute `Character.mana_max` in SQL, in one subquery on the profile."""
+    modifier_magic = _modifier_magic_case()
+    mana_max = Case(
+        When(mana_max_compute=Profile.ManaMax.NO_MANA, then=Value(0)),
+        When(
+            mana_max_compute=Profile.ManaMax.LEVEL,
+            then=OuterRef("level") + modifier_magic,
+        ),
+        default=2 * OuterRef("level") + modifier_magic,
+    )
+    return _from_profile(mana_max=mana_max)
+
+
+def luck_points_max_expression() -> Expression:
+    """Compute `Character.luck_points_max` in SQL."""
+    return Greatest(Value(0), 3 + modifier_expression("charisma"))
+
+
+def _stat_field(expression: Expression, verbose_name: str) -> models.GeneratedField:
+    return models.GeneratedField(
+        expression=expression,
+        output_field=models.SmallIntegerField(),
+        db_persist=True,
+        verbose_name=verbose_name,
+    )
+
+
+# Fields the stats depending on the profile are computed from, and these stats.
+MAGIC_STATS_SOURCES = {
+    "level",
+    "profile",
+    "profile_id",
+    *(f"value_{ability}" for ability in MAGICAL_ABILITIES.values()),
+    *(f"bonus_{ability}" for ability in MAGICAL_ABILITIES.values()),
+}
+MAGIC_STATS = {"modifier_magic", "attack_magic", "mana_max"}
+# Markdown fields, and the column in which their rendered HTML is stored.
+RENDERED_FIELDS = {"notes": "notes_html", "gm_notes": "gm_notes_html"}
+PROFILE_PICTURE_SIZE = {"profile_picture_width", "profile_picture_height"}
+
+_markdown = threading.local()
+
+
+@lru_cache(maxsize=256)
+def render_markdown(text: str) -> str:
+    """Render markdown notes to HTML, with a Markdown instance per thread."""
+    md = getattr(_markdown, "md", None)
+    if md is None:
+        md = _markdown.md = markdown.Markdown(extensions=["extra", "nl2br"])
+    return md.reset().convert(text)
+
+
 class CharacterManager(models.Manager):
     def get_by_natural_key(self, name: str, player_id: int):
         return self.get(name=name, player_id=player_id)
 
 
-class CharacterQuerySet(models.QuerySet):
+class CharacterQuerySet(VersionedQuerySet):
+    def with_rulebook(self):
+        """Resolve profile, race and racial capability from the rulebook cache."""
+        from character.rulebook import RulebookIterable
+
+        clone = self._chain()
+        clone._iterable_class = RulebookIterable  # noqa: SLF001
+        return clone
+
     def managed_by(self, user):
         """
         Return characters managed by the given user.
@@ -104,22 +224,51 @@ class CharacterQuerySet(models.QuerySet):
         Characters are managed by a user if they own the character
         or if they are the game master for a group in which the character plays.
         """
-        from party.models import Party
-
-        return self.filter(
-            Q(player=user) | Q(parties__in=Party.objects.managed_by(user)),
-        )
+        return self.filter(Q(player=user) | _plays_in(party__game_master=user))
 
     def mastered_by(self, user):
         """Return characters in groups where the given user is the game master."""
-        from party.models import Party
-
-        return self.filter(parties__in=Party.objects.managed_by(user))
+        return self.filter(_plays_in(party__game_master=user))
 
     def owned_by(self, user):
         """Return characters either owned by the given user."""
         return self.filter(player=user)
 
+    def name_starts_with(self, prefix: str):
+        """
+        Return characters whose name starts with the prefix, ignoring case.
+
+        The prefix is a range of lowercased names, ordered like the index of
+        the `unique_character_player` constraint, which thus serves it. The
+        LIKE of `istartswith` would scan the table on SQLite.
+        """
+        lower_prefix = Lower(Value(prefix))
+        return (
+            self.alias(lower_name=Lower("name"))
+            .filter(
+                lower_name__gte=lower_prefix,
+                lower_name__lt=Concat(lower_prefix, Value(chr(0x10FFFF))),
+            )
+            .order_by("lower_name", "player")
+        )
+
+    def reset_stats(self) -> int:
+        """Restore health, mana, luck and recovery points in a single UPDATE."""
+        return self.update(
+            health_remaining=F("health_max"),
+            mana_remaining=Greatest(Value(0), F("mana_max")),
+            luck_points_remaining=F("luck_points_max"),
+            recovery_points_remaining=Value(5),
+        )
+
+    def update_magic_stats(self) -> int:
+        """Recompute the stats depending on the profile in a single UPDATE."""
+        return self.update(
+            modifier_magic=modifier_magic_expression(),
+            attack_magic=F("level") + modifier_magic_expression(),
+            mana_max=mana_max_expression(),
+        )
+
     def friendly_to(self, user):
         """
         Return characters friendly to the given users.
@@ -129,11 +278,36 @@ class CharacterQuerySet(models.QuerySet):
         """
         from party.models import Party
 
+        related_parties = Party.objects.related_to(user).values("pk")
         return self.filter(
             Q(player=user)
-            | Q(parties__in=Party.objects.related_to(user))
-            | Q(invites__in=Party.objects.related_to(user)),
-        ).distinct()
+            | _plays_in(party__in=related_parties)
+            | _is_invited_in(party__in=related_parties),
+        )
+
+
+def _plays_in(**party_filters) -> Exists:
+    """Correlated EXISTS over the parties in which the outer character plays."""
+    from party.models import Party
+
+    return Exists(
+        Party.characters.through.objects.filter(
+            character_id=OuterRef("pk"),
+            **party_filters,
+        ),
+    )
+
+
+def _is_invited_in(**party_filters) -> Exists:
+    """Correlated EXISTS over the parties to which the outer character is invited."""
+    from party.models import Party
+
+    return Exists(
+        Party.invited_characters.through.objects.filter(
+            character_id=OuterRef("pk"),
+            **party_filters,
+        ),
+    )
 
 
 DEFAULT_NOTES = """
@@ -161,6 +335,140 @@ class CharacterCapability:
     known: bool = False
 
 
+@dataclass
+class PathProgress:
+    """A path of the capability tree, with every capability of the path."""
+
+    path: Path
+    capabilities: list[CharacterCapability]
+
+    @property
+    def known_capabilities(self) -> list[Capability]:
+        return [cap.capability for cap in self.capabilities if cap.known]
+
+    @property
+    def known_ranks(self) -> list[int]:
+        return [capability.rank for capability in self.known_capabilities]
+
+    @property
+    def max_rank(self) -> int:
+        return len(self.known_capabilities)
+
+    @property
+    def next_capability(self) -> Capability | None:
+        next_rank = self.max_rank + 1
+        for character_capability in self.capabilities:
+            if character_capability.capability.rank == next_rank:
+                return character_capability.capability
+        return None
+
+    @property
+    def has_next_capability(self) -> bool:
+        return self.next_capability is not None
+
+    @property
+    def last_known_capability(self) -> Capability | None:
+        known = self.known_capabilities
+        if not known:
+            return None
+        return max(known, key=lambda capability: capability.rank)
+
+    @property
+    def capability_points_used(self) -> int:
+        return sum(cap.capability_points_cost for cap in self.known_capabilities)
+
+    @property
+    def next_capability_cost(self) -> int | None:
+        next_capability = self.next_capability
+        if next_capability is None:
+            return None
+        return next_capability.capability_points_cost
+
+
+class CapabilityTree:
+    """
+    Paths & capabilities of a character, computed from a single query.
+
+    Paths are sorted by name and their capabilities by rank.
+    """
+
+    def __init__(self, character: "Character", paths: list[PathProgress]) -> None:
+        self.character = character
+        self.paths = paths
+        self._paths_by_pk = {progress.path.pk: progress for progress in paths}
+
+    def __iter__(self) -> Iterator[PathProgress]:
+        return iter(self.paths)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def get(self, path_pk: int) -> PathProgress | None:
+        return self._paths_by_pk.get(path_pk)
+
+    @property
+    def capability_points_used(self) -> int:
+        return sum(progress.capability_points_used for progress in self.paths)
+
+    @property
+    def capability_points_remaining(self) -> int:
+        return self.character.capability_points_max - self.capability_points_used
+
+
+class StatBlock:
+    """
+    Stats of a character computed in Python, once per character instance.
+
+    The other derived stats are stored columns of the character. Only
+    `FIELDS` are read, so that fragments can be rendered from partial rows,
+    and the block is computed again once any of them changes on the character.
+    """
+
+    FIELDS = (
+        "level",
+        "height",
+        "weight",
+        "health_max",
+        "health_remaining",
+        "mana_max",
+        "mana_remaining",
+        "attack_melee",
+        "attack_range",
+    )
+    __slots__ = (
+        "capability_points_max",
+        "health_remaining_percent",
+        "height_m",
+        "imc",
+        "mana_remaining_percent",
+        "weapon_modifiers",
+    )
+
+    def __init__(self, character: "Character") -> None:
+        self.health_remaining_percent = _percent(
+            character.health_remaining,
+            character.health_max,
+        )
+        self.mana_remaining_percent = _percent(
+            character.mana_remaining,
+            character.mana_max,
+        )
+        self.height_m = round((character.height or 0) / 100, 2)
+        self.imc = character.weight / self.height_m**2 if self.height_m else 0
+        self.capability_points_max = 2 * character.level
+        self.weapon_modifiers = {
+            Weapon.Category.MELEE: character.attack_melee,
+            Weapon.Category.RANGE: character.attack_range,
+            Weapon.Category.NONE: character.level,
+        }
+
+
+def _percent(value: int, maximum: int) -> float:
+    if maximum == 0:
+        return 0
+    return value / maximum * 100
+
+
 def validate_image(fieldfile_obj, megabytes_limit: float):
     filesize = fieldfile_obj.file.size
     if filesize > megabytes_limit * 1024 * 1024:
@@ -168,7 +476,7 @@ def validate_image(fieldfile_obj, megabytes_limit: float):
         raise ValidationError(msg)
 
 
-class Character(models.Model):
+class Character(VersionedModel, models.Model):
     class Gender(models.TextChoices):
         MALE = "M", "Mâle"
         FEMALE = "F", "Femelle"
@@ -188,6 +496,18 @@ class Character(models.Model):
         null=True,
         validators=[partial(validate_image, megabytes_limit=2)],
     )
+    # Size of the profile picture, once its variants are stored, see
+    # `character.thumbnails`.
+    profile_picture_width = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    profile_picture_height = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+    )
 
     race = models.ForeignKey(
         "character.Race",
@@ -305,6 +625,8 @@ class Character(models.Model):
 
     notes = models.TextField(blank=True, verbose_name="notes", default=DEFAULT_NOTES)
     gm_notes = models.TextField(blank=True, verbose_name="notes MJ")
+    notes_html = models.TextField(blank=True, editable=False)
+    gm_notes_html = models.TextField(blank=True, editable=False)
     damage_reduction = models.TextField(blank=True, verbose_name="réduction de dégâts")
 
     states = models.ManyToManyField(HarmfulState, blank=True, related_name="characters")
@@ -316,6 +638,64 @@ class Character(models.Model):
         blank=True,
     )
 
+    # Derived stats, stored to be sorted and filtered on in SQL.
+    modifier_strength = _stat_field(modifier_expression("strength"), "mod. force")
+    modifier_dexterity = _stat_field(
+        modifier_expression("dexterity"),
+        "mod. dextérité",
+    )
+    modifier_constitution = _stat_field(
+        modifier_expression("constitution"),
+        "mod. constitution",
+    )
+    modifier_intelligence = _stat_field(
+        modifier_expression("intelligence"),
+        "mod. intelligence",
+    )
+    modifier_wisdom = _stat_field(modifier_expression("wisdom"), "mod. sagesse")
+    modifier_charisma = _stat_field(modifier_expression("charisma"), "mod. charisme")
+    modifier_initiative = _stat_field(
+        modifier_expression("dexterity") + F("initiative_misc"),
+        "initiative",
+    )
+    attack_melee = _stat_field(
+        F("level") + modifier_expression("strength"),
+        "attaque au contact",
+    )
+    attack_range = _stat_field(
+        F("level") + modifier_expression("dexterity"),
+        "attaque à distance",
+    )
+    defense = _stat_field(
+        Value(10)
+        + F("armor")
+        + F("shield")
+        + modifier_expression("dexterity")
+        + F("defense_misc"),
+        "défense",
+    )
+    luck_points_max = _stat_field(
+        luck_points_max_expression(),
+        "points de chance max",
+    )
+    # These depend on the profile: computed on save, and by
+    # `CharacterQuerySet.update_magic_stats` when a profile changes, see
+    # `character.magic_stats`.
+    modifier_magic = models.SmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="mod. magique",
+    )
+    attack_magic = models.SmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="attaque magique",
+    )
+    mana_max = models.SmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="mana max",
+    )
     objects = CharacterManager.from_queryset(CharacterQuerySet)()
 
     class Meta:
@@ -332,187 +712,193 @@ class Character(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs) -> None:
+        update_fields = kwargs.get("update_fields")
+        deferred = set() if self._state.adding else self.get_deferred_fields()
+        if update_fields is None and deferred:
+            # Only the loaded fields are written, as Django does, and only the
+            # fields computed from them: computing the others would load their
+            # sources one by one, and then write them over concurrent updates.
+            update_fields = kwargs["update_fields"] = {
+                field.attname
+                for field in self._meta.concrete_fields
+                if field.attname not in deferred and not field.primary_key
+            }
+        computed = set()
+        if update_fields is None or not MAGIC_STATS_SOURCES.isdisjoint(update_fields):
+            self.compute_magic_stats()
+            computed |= MAGIC_STATS
+        for field, rendered_field in RENDERED_FIELDS.items():
+            if update_fields is None or field in update_fields:
+                setattr(self, rendered_field, render_markdown(getattr(self, field)))
+                computed.add(rendered_field)
+        if update_fields is None or "profile_picture" in update_fields:
+            self.store_profile_picture()
+            computed |= PROFILE_PICTURE_SIZE
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, *computed}
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse("character:view", kwargs={"pk": self.pk})
 
     def natural_key(self):
         return (self.name, self.player_id)
 
-    @property
-    def modifier_strength(self) -> int:
-        return modifier(self.value_strength) + self.bonus_strength
-
-    @property
-    def modifier_dexterity(self) -> int:
-        return modifier(self.value_dexterity) + self.bonus_dexterity
-
-    @property
-    def modifier_constitution(self) -> int:
-        return modifier(self.value_constitution) + self.bonus_constitution
-
-    @property
-    def modifier_intelligence(self) -> int:
-        return modifier(self.value_intelligence) + self.bonus_intelligence
-
-    @property
-    def modifier_wisdom(self) -> int:
-        return modifier(self.value_wisdom) + self.bonus_wisdom
-
-    @property
-    def modifier_charisma(self) -> int:
-        return modifier(self.value_charisma) + self.bonus_charisma
-
-    @property
-    def modifier_initiative(self) -> int:
-        return self.modifier_dexterity + self.initiative_misc
-
-    @property
-    def attack_melee(self) -> int:
-        return self.level + self.modifier_strength
-
-    @property
-    def attack_range(self) -> int:
-        return self.level + self.modifier_dexterity
-
-    @property
-    def attack_magic(self) -> int:
-        return self.level + self.modifier_magic
-
-    @property
-    def modifier_magic(self) -> int:
-        modifier_map = {
-            Profile.MagicalStrength.INTELLIGENCE: self.modifier_intelligence,
-            Profile.MagicalStrength.WISDOM: self.modifier_wisdom,
-            Profile.MagicalStrength.CHARISMA: self.modifier_charisma,
-            Profile.MagicalStrength.NONE: 0,
-        }
-        return modifier_map.get(
-            Profile.MagicalStrength(self.profile.magical_strength),
-            0,
-        )
-
-    @property
-    def defense(self) -> int:
-        return (
-            10 + self.armor + self.shield + self.modifier_dexterity + self.defense_misc
-        )
-
-    @property
-    def mana_max(self) -> int:
-        mana_max_compute = self.profile.mana_max_compute
-        if mana_max_compute == Profile.ManaMax.NO_MANA:
-            return 0
-        if mana_max_compute == Profile.ManaMax.LEVEL:
-            return self.level + self.modifier_magic
-        return 2 * self.level + self.modifier_magic
+    def store_profile_picture(self) -> None:
+        """Store a new profile picture with its variants, see `character.thumbnails`."""
+        picture = self.profile_picture
+        if not picture:
+            self.profile_picture_width = self.profile_picture_height = None
+        elif not picture._committed:  # noqa: SLF001
+            # Stored here rather than by `pre_save`, to be resized right away.
+            picture.save(picture.name, picture.file, save=False)
+            self.profile_picture_width, self.profile_picture_height = (
+                thumbnails.generate(picture)
+            )
 
-    @property
-    def height_m(self) -> float:
-        return round(self.height / 100, 2)
+    def compute_magic_stats(self) -> None:
+        """Compute the stats depending on the profile, see `update_magic_stats`."""
+        ability = MAGICAL_ABILITIES.get(self.profile.magical_strength)
+        self.modifier_magic = 0
+        if ability is not None:
+            self.modifier_magic = modifier(getattr(self, f"value_{ability}")) + getattr(
+                self,
+                f"bonus_{ability}",
+            )
+        self.attack_magic = self.level + self.modifier_magic
+        # Branch for branch like `mana_max_expression`, level 0 included.
+        if self.profile.mana_max_compute == Profile.ManaMax.NO_MANA:
+            self.mana_max = 0
+        elif self.profile.mana_max_compute == Profile.ManaMax.LEVEL:
+            self.mana_max = self.level + self.modifier_magic
+        else:
+            self.mana_max = 2 * self.level + self.modifier_magic
 
     @property
-    def imc(self) -> float:
-        return self.weight / (self.height_m**2)
+    def stats(self) -> StatBlock:
+        # Computed again once the values it was computed from are changed.
+        sources = tuple(map(self.__dict__.get, StatBlock.FIELDS))
+        cached = self.__dict__.get("_stats")
+        if cached is None or cached[0] != sources:
+            stats = StatBlock(self)
+            # Read after the block, which loads the deferred fields it reads.
+            sources = tuple(map(self.__dict__.get, StatBlock.FIELDS))
+            cached = self.__dict__["_stats"] = (sources, stats)
+        return cached[1]
 
     @property
     def recovery_points_max(self) -> int:
         return 5
 
-    @property
-    def luck_points_max(self) -> int:
-        return max([3 + self.modifier_charisma, 0])
-
-    @property
-    def health_remaining_percent(self) -> float:
-        if self.health_max == 0:
-            return 0
-        return self.health_remaining / self.health_max * 100
-
-    @property
-    def mana_remaining_percent(self) -> float:
-        if self.mana_max == 0:
-            return 0
-        return self.mana_remaining / self.mana_max * 100
-
     @property
     def capability_points_max(self) -> int:
-        return 2 * self.level
+        return self.stats.capability_points_max
 
     @property
     def capability_points_used(self) -> int:
-        return sum(
-            cap.capability_points_cost
-            for cap in self.capabilities.select_related("path").only(
-                "rank",
-                "path__category",
-            )
-        )
+        return self.capability_tree.capability_points_used
 
     @property
     def capability_points_remaining(self) -> int:
         return self.capability_points_max - self.capability_points_used
 
     def get_modifier_for_weapon(self, weapon: Weapon) -> int:
-        modifier_map = {
-            Weapon.Category.RANGE: self.modifier_dexterity,
-            Weapon.Category.MELEE: self.modifier_strength,
-            Weapon.Category.NONE: 0,
-        }
-        return modifier_map.get(Weapon.Category(weapon.category), 0) + self.level
+        return self.stats.weapon_modifiers.get(weapon.category, self.level)
 
-    def get_capabilities_by_path(self) -> dict[Path, list[CharacterCapability]]:
-        capabilities_by_path = collections.defaultdict(list)
-        character_capabilities = set(self.capabilities.all())
-        character_paths = {
-            capability.path for capability in character_capabilities
-        } | set(self.paths.all())
-        for path in character_paths:
-            for capability in path.capabilities.all():
-                capabilities_by_path[capability.path].append(
-                    CharacterCapability(
-                        capability,
-                        known=capability in character_capabilities,
-                    ),
-                )
-
-        return dict(
-            sorted(
-                (
-                    (path, sorted(capabilities, key=lambda x: x.capability.rank))
-                    for path, capabilities in capabilities_by_path.items()
-                ),
-                key=lambda x: x[0].name,
-            ),
+    def get_capability_tree(self) -> CapabilityTree:
+        """
+        Build the capability tree of the character in a single query.
+
+        The tree contains every capability of the paths the character either
+        explicitly added or in which they know at least one capability. Only
+        the ids of those are queried, paths and capabilities come from the
+        rulebook cache.
+        """
+        from character.rulebook import get_rulebook
+
+        rulebook = get_rulebook()
+        known = (
+            Character.capabilities.through.objects.filter(character_id=self.pk)
+            .annotate(known=Value(value=True, output_field=models.BooleanField()))
+            .values_list("capability_id", "known")
         )
+        added = (
+            Character.paths.through.objects.filter(character_id=self.pk)
+            .annotate(known=Value(value=False, output_field=models.BooleanField()))
+            .values_list("path_id", "known")
+        )
+        known_ids, path_ids = set(), set()
+        for pk, is_capability in known.union(added, all=True):
+            if is_capability:
+                known_ids.add(pk)
+                capability = rulebook.get(Capability, pk)
+                if capability is not None:
+                    path_ids.add(capability.path_id)
+            else:
+                path_ids.add(pk)
+
+        paths = [
+            PathProgress(
+                path,
+                [
+                    CharacterCapability(capability, known=capability.pk in known_ids)
+                    for capability in rulebook.capabilities_of(path.pk)
+                ],
+            )
+            for path in rulebook.all(Path)
+            if path.pk in path_ids
+        ]
+        return CapabilityTree(self, paths)
+
+    @cached_property
+    def capability_tree(self) -> CapabilityTree:
+        return self.get_capability_tree()
+
+    def get_capabilities_by_path(self) -> dict[Path, list[CharacterCapability]]:
+        return {
+            progress.path: progress.capabilities for progress in self.capability_tree
+        }
 
     def get_formatted_notes(self) -> str:
-        md = markdown.Markdown(extensions=["extra", "nl2br"])
-        return md.convert(self.notes)
+        return self.notes_html
 
     def get_formatted_gm_notes(self) -> str:
-        md = markdown.Markdown(extensions=["extra", "nl2br"])
-        return md.convert(self.gm_notes)
+        return self.gm_notes_html
 
     def get_missing_states(self) -> Iterable[HarmfulState]:
-        return HarmfulState.objects.exclude(
-            pk__in=self.states.all().values_list("pk", flat=True),
-        )
+        from character.rulebook import get_rulebook
 
-    @cache_on_instance()
-    def managed_by(self, user):
-        return self in Character.objects.managed_by(user)
+        states = {state.pk for state in self.states.all()}
+        return [
+            state
+            for state in get_rulebook().all(HarmfulState)
+            if state.pk not in states
+        ]
 
-    @cache_on_instance()
-    def mastered_by(self, user):
-        return self in Character.objects.mastered_by(user)
+    def managed_by(self, user) -> bool:
+        from character.permissions import get_character_permissions
 
-    @cache_on_instance()
-    def owned_by(self, user):
-        return self in Character.objects.owned_by(user)
+        return get_character_permissions(user).manages(self)
+
+    def mastered_by(self, user) -> bool:
+        from character.permissions import get_character_permissions
+
+        return get_character_permissions(user).masters(self)
+
+    def owned_by(self, user) -> bool:
+        from character.permissions import get_character_permissions
+
+        return get_character_permissions(user).owns(self)
 
     def reset_stats(self):
-        self.health_remaining = self.health_max
-        self.mana_remaining = self.mana_max
-        self.luck_points_remaining = self.luck_points_max
-        self.recovery_points_remaining = self.recovery_points_max
-        self.save()
+        Character.objects.filter(pk=self.pk).reset_stats()
+        self.refresh_from_db(
+            fields=[
+                "health_remaining",
+                "mana_remaining",
+                "luck_points_remaining",
+                "recovery_points_remaining",
+                "version",
+            ],
+        )
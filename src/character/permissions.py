@@ -0,0 +1,87 @@
+from django.db.models import BooleanField, Value
+
+from character.models import Character
+
+_CACHE_ATTRIBUTE = "_character_permissions"
+
+
+class CharacterPermissions:
+    """
+    Access rights of a user on characters, resolved in at most two queries.
+
+    Characters are owned by their player, mastered by the game masters of
+    the parties they play in, and friendly to anyone related to one of
+    the parties they play in or are invited to.
+    """
+
+    def __init__(
+        self,
+        *,
+        owned_ids: frozenset[int] = frozenset(),
+        mastered_ids: frozenset[int] = frozenset(),
+        friendly_ids: frozenset[int] = frozenset(),
+    ) -> None:
+        self.owned_ids = owned_ids
+        self.mastered_ids = mastered_ids
+        self.managed_ids = owned_ids | mastered_ids
+        self.friendly_ids = friendly_ids | self.managed_ids
+
+    @classmethod
+    def for_user(cls, user) -> "CharacterPermissions":
+        from party.models import Party
+
+        if not user.is_authenticated:
+            return cls()
+
+        owned_ids = frozenset(
+            Character.objects.filter(player=user).values_list("pk", flat=True),
+        )
+
+        related_parties = Party.objects.related_to(user).values("pk")
+        members = (
+            Party.characters.through.objects.filter(party__in=related_parties)
+            .annotate(member=Value(value=True, output_field=BooleanField()))
+            .values_list("character_id", "member", "party__game_master_id")
+        )
+        invites = (
+            Party.invited_characters.through.objects.filter(party__in=related_parties)
+            .annotate(member=Value(value=False, output_field=BooleanField()))
+            .values_list("character_id", "member", "party__game_master_id")
+        )
+        mastered_ids, friendly_ids = set(), set()
+        for character_id, member, game_master_id in members.union(invites, all=True):
+            friendly_ids.add(character_id)
+            if member and game_master_id == user.pk:
+                mastered_ids.add(character_id)
+
+        return cls(
+            owned_ids=owned_ids,
+            mastered_ids=frozenset(mastered_ids),
+            friendly_ids=frozenset(friendly_ids),
+        )
+
+    def owns(self, character: Character) -> bool:
+        return character.pk in self.owned_ids
+
+    def masters(self, character: Character) -> bool:
+        return character.pk in self.mastered_ids
+
+    def manages(self, character: Character) -> bool:
+        return character.pk in self.managed_ids
+
+    def is_friendly(self, character: Character) -> bool:
+        return character.pk in self.friendly_ids
+
+
+def get_character_permissions(user) -> CharacterPermissions:
+    """
+    Return the permissions of the given user, computed once per user instance.
+
+    The request user is the same instance for the whole request, so every
+    template filter and view check shares the same resolver.
+    """
+    permissions = getattr(user, _CACHE_ATTRIBUTE, None)
+    if permissions is None:
+        permissions = CharacterPermissions.for_user(user)
+        setattr(user, _CACHE_ATTRIBUTE, permissions)
+    return permissions
@@ -0,0 +1,160 @@
+"""
+Process-local cache of the rulebook.
+
+The rulebook is made of the reference tables imported from the game rules,
+which almost never change. The whole rulebook is loaded in a handful of
+queries and kept in memory as an immutable snapshot, keyed by a global
+generation number. The generation is the modification time of a file shared
+by every worker of the host: changing a rulebook object touches it, and each
+worker notices the new generation with a single `stat()` the next time it
+reads the rulebook.
+"""
+
+import os
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path as FilePath
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.query import ModelIterable
+from django.db.models.signals import post_delete, post_save
+
+from character.models import (
+    Capability,
+    HarmfulState,
+    Path,
+    Profile,
+    Race,
+    RacialCapability,
+    Weapon,
+)
+
+RULEBOOK_MODELS = (
+    HarmfulState,
+    Profile,
+    Race,
+    Path,
+    Capability,
+    RacialCapability,
+    Weapon,
+)
+
+
+class Rulebook:
+    """Immutable snapshot of every rulebook object, with relations attached."""
+
+    def __init__(self, generation: int) -> None:
+        self.generation = generation
+        self._objects: dict[type[models.Model], dict[int, models.Model]] = {
+            model: {obj.pk: obj for obj in model.objects.all()}
+            for model in RULEBOOK_MODELS
+        }
+        self._capabilities_by_path: dict[int, list[Capability]] = {}
+        for path in self.all(Path):
+            _attach(path, "profile", self.get(Profile, path.profile_id))
+            _attach(path, "race", self.get(Race, path.race_id))
+        for capability in sorted(self.all(Capability), key=lambda cap: cap.rank):
+            _attach(capability, "path", self.get(Path, capability.path_id))
+            self._capabilities_by_path.setdefault(capability.path_id, []).append(
+                capability,
+            )
+        for racial_capability in self.all(RacialCapability):
+            _attach(
+                racial_capability,
+                "race",
+                self.get(Race, racial_capability.race_id),
+            )
+
+    def all(self, model: type[models.Model]) -> list:
+        """Return every object of the model, in the default ordering of the model."""
+        return list(self._objects[model].values())
+
+    def get(self, model: type[models.Model], pk: int | None):
+        """Return the object of the model with the given pk, or None."""
+        return self._objects[model].get(pk)
+
+    def capabilities_of(self, path_pk: int) -> list[Capability]:
+        """Return the capabilities of a path, sorted by rank."""
+        return self._capabilities_by_path.get(path_pk, [])
+
+    def attach(self, character) -> None:
+        """Resolve the rulebook foreign keys of a character from the cache."""
+        _attach(character, "profile", self.get(Profile, character.profile_id))
+        _attach(character, "race", self.get(Race, character.race_id))
+        _attach(
+            character,
+            "racial_capability",
+            self.get(RacialCapability, character.racial_capability_id),
+        )
+
+
+def _attach(obj: models.Model, field_name: str, value: models.Model | None) -> None:
+    if value is not None:
+        obj._meta.get_field(field_name).set_cached_value(obj, value)  # noqa: SLF001
+
+
+_lock = threading.Lock()
+_rulebook: Rulebook | None = None
+
+
+def get_rulebook() -> Rulebook:
+    """Return the rulebook, reloading it if another process changed it."""
+    global _rulebook  # noqa: PLW0603
+    generation = _read_generation()
+    rulebook = _rulebook
+    if rulebook is None or rulebook.generation != generation:
+        with _lock:
+            rulebook = _rulebook
+            if rulebook is None or rulebook.generation != generation:
+                rulebook = _rulebook = Rulebook(generation)
+    return rulebook
+
+
+def forget() -> None:
+    """Drop the rulebook of the current process only."""
+    global _rulebook  # noqa: PLW0603
+    _rulebook = None
+
+
+def invalidate() -> None:
+    """Drop the rulebook of every process by bumping the generation."""
+    forget()
+    path = _generation_file()
+    path.touch()
+    now = max(time.time_ns(), path.stat().st_mtime_ns + 1)
+    os.utime(path, ns=(now, now))
+
+
+def _generation_file() -> FilePath:
+    return FilePath(settings.RULEBOOK_GENERATION_FILE)
+
+
+def _read_generation() -> int:
+    try:
+        return _generation_file().stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def _on_rulebook_change(**kwargs) -> None:  # noqa: ARG001
+    # Other processes must only reload once the change is visible to them.
+    forget()
+    transaction.on_commit(invalidate)
+
+
+def connect_signals() -> None:
+    for model in RULEBOOK_MODELS:
+        post_save.connect(_on_rulebook_change, sender=model)
+        post_delete.connect(_on_rulebook_change, sender=model)
+
+
+class RulebookIterable(ModelIterable):
+    """Yield characters with their rulebook foreign keys resolved from the cache."""
+
+    def __iter__(self) -> Iterator[models.Model]:
+        rulebook = get_rulebook()
+        for character in super().__iter__():
+            rulebook.attach(character)
+            yield character
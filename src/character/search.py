@@ -0,0 +1,186 @@
+"""
+Full-text search of the rulebook.
+
+Capabilities, paths, racial capabilities, weapons and harmful states are
+indexed in `character_rulebook_search`, an FTS5 table of SQLite created by the
+`0048_rulebook_search` migration. The text is tokenized by `unicode61` without
+diacritics, so "epee" finds "épée", and every word of a query is a prefix.
+Results are ranked by BM25, a match in the name weighing more than in the
+description.
+
+The rowid of a row is the pk of its object times 8, plus the code of its model
+in `SEARCHED_MODELS`. Rows are kept in sync by signals, like the rulebook cache
+(see `character.rulebook`): objects changed without signals, with
+`QuerySet.update()` or `bulk_create()`, need a `rebuild()`, or the
+`rebuild_rulebook_search` command. On other databases, nothing is indexed and
+the searches find nothing.
+"""
+
+import re
+from dataclasses import dataclass
+
+from django.db import connection, connections, models
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.safestring import SafeString, mark_safe
+
+from character.models import Capability, HarmfulState, Path, RacialCapability, Weapon
+from character.rulebook import get_rulebook
+
+SEARCH_TABLE = "character_rulebook_search"
+SEARCHED_MODELS: dict[type[models.Model], int] = {
+    Capability: 1,
+    Path: 2,
+    RacialCapability: 3,
+    Weapon: 4,
+    HarmfulState: 5,
+}
+MODELS_BY_CODE = {code: model for model, code in SEARCHED_MODELS.items()}
+BODY_FIELDS = {
+    Capability: ["description"],
+    Path: ["notes"],
+    RacialCapability: ["description"],
+    Weapon: ["damage", "special"],
+    HarmfulState: ["description"],
+}
+# Relative weights of the name and the body in the ranking.
+NAME_WEIGHT, BODY_WEIGHT = 10.0, 1.0
+SNIPPET_TOKENS = 16
+# Private use characters marking the matches, replaced once escaped.
+MATCH_START, MATCH_END = "\ue000", "\ue001"
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    object: models.Model
+    name: SafeString
+    snippet: SafeString
+
+    @property
+    def kind(self) -> str:
+        return self.object._meta.verbose_name  # noqa: SLF001
+
+    @property
+    def admin_url(self) -> str:
+        meta = self.object._meta  # noqa: SLF001
+        return reverse(
+            f"admin:{meta.app_label}_{meta.model_name}_change",
+            args=[self.object.pk],
+        )
+
+
+def available(using: str = "default") -> bool:
+    return connections[using].vendor == "sqlite"
+
+
+def match_expression(query: str) -> str:
+    """Return the FTS5 query matching every word of the query, as a prefix."""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", query))
+
+
+def search(query: str, *, limit: int = 20, offset: int = 0) -> list[SearchResult]:
+    """Return the rulebook objects matching the query, best first."""
+    match = match_expression(query)
+    if not match or not available():
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, highlight({SEARCH_TABLE}, 0, %s, %s), "  # noqa: S608
+            f"snippet({SEARCH_TABLE}, 1, %s, %s, '…', %s) "
+            f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s "
+            f"ORDER BY bm25({SEARCH_TABLE}, %s, %s) LIMIT %s OFFSET %s",
+            [
+                MATCH_START,
+                MATCH_END,
+                MATCH_START,
+                MATCH_END,
+                SNIPPET_TOKENS,
+                match,
+                NAME_WEIGHT,
+                BODY_WEIGHT,
+                limit,
+                offset,
+            ],
+        )
+        rows = cursor.fetchall()
+    rulebook = get_rulebook()
+    results = []
+    for rowid, name, snippet in rows:
+        obj = rulebook.get(MODELS_BY_CODE[rowid % 8], rowid // 8)
+        # Unless deleted since the snapshot of the rulebook was taken.
+        if obj is not None:
+            results.append(
+                SearchResult(obj, _highlight(name), _highlight(snippet)),
+            )
+    return results
+
+
+def filter_matching(queryset: models.QuerySet, query: str) -> models.QuerySet:
+    """Filter the rulebook objects of the queryset matching the query."""
+    match = match_expression(query)
+    if not match or not available(queryset.db):
+        return queryset.none()
+    return queryset.filter(
+        pk__in=RawSQL(  # noqa: S611
+            f"SELECT rowid / 8 FROM {SEARCH_TABLE} "  # noqa: S608
+            f"WHERE {SEARCH_TABLE} MATCH %s AND rowid %% 8 = %s",
+            [match, SEARCHED_MODELS[queryset.model]],
+        ),
+    )
+
+
+def rebuild(using: str = "default") -> None:
+    """Index every rulebook object again."""
+    if not available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")  # noqa: S608
+        for model in SEARCHED_MODELS:
+            for obj in model.objects.using(using):
+                _index(cursor, obj)
+
+
+def _highlight(text: str) -> SafeString:
+    return mark_safe(  # noqa: S308
+        escape(text).replace(MATCH_START, "<mark>").replace(MATCH_END, "</mark>"),
+    )
+
+
+def _rowid(obj: models.Model) -> int:
+    return obj.pk * 8 + SEARCHED_MODELS[type(obj)]
+
+
+def _index(cursor, obj: models.Model) -> None:
+    body = " ".join(getattr(obj, field) for field in BODY_FIELDS[type(obj)])
+    cursor.execute(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, name, body) VALUES (%s, %s, %s)",  # noqa: S608
+        [_rowid(obj), obj.name, body],
+    )
+
+
+def _on_save(instance, using, **kwargs) -> None:  # noqa: ARG001
+    if available(using):
+        with connections[using].cursor() as cursor:
+            _unindex(cursor, instance)
+            _index(cursor, instance)
+
+
+def _on_delete(instance, using, **kwargs) -> None:  # noqa: ARG001
+    if available(using):
+        with connections[using].cursor() as cursor:
+            _unindex(cursor, instance)
+
+
+def _unindex(cursor, obj: models.Model) -> None:
+    cursor.execute(
+        f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s",  # noqa: S608
+        [_rowid(obj)],
+    )
+
+
+def connect_signals() -> None:
+    for model in SEARCHED_MODELS:
+        post_save.connect(_on_save, sender=model)
+        post_delete.connect(_on_delete, sender=model)
@@ -0,0 +1,87 @@
+// Coalesce rapid clicks on the counter buttons into a single request.
+//
+// Buttons declare the counter they change with `data-counter`, the change
+// with `data-change` (a delta, "ko" or "max") and the element displaying the
+// value with `data-display`. Deltas are summed and shown optimistically, then
+// sent as one batch to the `data-counters-url` of their container once the
+// clicks stop. The server answers with out of band swaps of the new values.
+(function () {
+    const DELAY = 400;
+
+    function setupAccumulator(container) {
+        const url = container.dataset.countersUrl;
+        const csrfToken = container.dataset.csrfToken;
+        let pending = {};
+        let timer = null;
+
+        function batch() {
+            const values = pending;
+            pending = {};
+            clearTimeout(timer);
+            timer = null;
+            return values;
+        }
+
+        function flush() {
+            const values = batch();
+            if (Object.keys(values).length === 0) {
+                return;
+            }
+            htmx.ajax("POST", url, {
+                source: container,
+                swap: "none",
+                values: values,
+                headers: { "X-CSRFToken": csrfToken },
+            });
+        }
+
+        function flushOnLeave() {
+            const values = batch();
+            if (Object.keys(values).length === 0) {
+                return;
+            }
+            const data = new FormData();
+            data.append("csrfmiddlewaretoken", csrfToken);
+            Object.entries(values).forEach(([field, change]) => data.append(field, change));
+            navigator.sendBeacon(url, data);
+        }
+
+        function add(field, change) {
+            const previous = pending[field];
+            if (change === "ko" || change === "max") {
+                pending[field] = change;
+                flush();
+                return;
+            }
+            if (previous === "ko" || previous === "max") {
+                // An absolute change followed by a delta can't be merged.
+                flush();
+            }
+            pending[field] = (pending[field] || 0) + Number(change);
+            clearTimeout(timer);
+            timer = setTimeout(flush, DELAY);
+        }
+
+        function display(selector, change) {
+            const element = selector && container.querySelector(selector);
+            const value = element && Number(element.textContent);
+            if (Number.isInteger(value) && change !== "ko" && change !== "max") {
+                element.textContent = Math.max(0, value + Number(change));
+            }
+        }
+
+        container.addEventListener("click", function (event) {
+            const button = event.target.closest("[data-counter]");
+            if (!button || !container.contains(button)) {
+                return;
+            }
+            add(button.dataset.counter, button.dataset.change);
+            display(button.dataset.display, button.dataset.change);
+        });
+        addEventListener("pagehide", flushOnLeave);
+    }
+
+    document.addEventListener("DOMContentLoaded", function () {
+        document.querySelectorAll("[data-counters-url]").forEach(setupAccumulator);
+    });
+})();
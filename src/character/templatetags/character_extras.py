@@ -1,6 +1,8 @@
 from django import template
 
+from character import fragments, thumbnails
 from character.models import Character, Path, Weapon
+from character.rulebook import get_rulebook
 from common.models import User
 
 register = template.Library()
@@ -51,3 +53,27 @@ def mastered_by(character: Character, user: User) -> bool:
 @register.filter
 def owned_by(character: Character, user: User) -> bool:
     return character.owned_by(user)
+
+
+@register.filter
+def viewer_role(character: Character, user: User) -> str:
+    return fragments.viewer_role(character, user)
+
+
+@register.simple_tag
+def rulebook_generation() -> int:
+    return get_rulebook().generation
+
+
+@register.inclusion_tag("character/snippets/profile_picture.html")
+def profile_picture(character: Character, css_class: str, display: int) -> dict:
+    """Show the profile picture at most `display` pixels wide and high."""
+    context = {
+        "picture": character.profile_picture,
+        "css_class": css_class,
+        "display": display,
+    }
+    width, height = character.profile_picture_width, character.profile_picture_height
+    if width and height:
+        context |= thumbnails.sources(character.profile_picture, width, height, display)
+    return context
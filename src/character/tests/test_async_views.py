@@ -0,0 +1,79 @@
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+from model_bakery import baker
+
+from character.models import Character, HarmfulState
+from common.models import User
+from party.models import BattleEffect, Party
+
+
+def async_get(user, url, data=None):
+    async def get():
+        client = AsyncClient()
+        await client.aforce_login(user)
+        return await client.get(url, data)
+
+    return async_to_sync(get)()
+
+
+@pytest.mark.django_db
+def test_counter_change():
+    # 3 + the charisma modifier.
+    character = baker.make(Character, value_charisma=14, luck_points_remaining=5)
+    url = reverse("character:luck_points_change", kwargs={"pk": character.pk})
+
+    res = async_get(character.player, url, {"value": "1"})
+
+    assert res.status_code == HTTPStatus.OK
+    character.refresh_from_db()
+    assert character.luck_points_max == 3 + 2
+    assert character.luck_points_remaining == 5
+    res = async_get(character.player, url, {"value": "-1"})
+    character.refresh_from_db()
+    assert character.luck_points_remaining == 4
+
+
+@pytest.mark.django_db
+def test_counter_change_of_unmanaged_character():
+    character = baker.make(Character, value_charisma=14, luck_points_remaining=5)
+    url = reverse("character:luck_points_change", kwargs={"pk": character.pk})
+
+    res = async_get(baker.make(User), url, {"value": "-1"})
+
+    assert res.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_add_and_remove_state():
+    character = baker.make(Character)
+    state = baker.make(HarmfulState, name="Aveuglé")
+    kwargs = {"pk": character.pk, "state_pk": state.pk}
+
+    res = async_get(character.player, reverse("character:add_state", kwargs=kwargs))
+
+    assert res.status_code == HTTPStatus.OK
+    assert list(character.states.all()) == [state]
+    res = async_get(character.player, reverse("character:remove_state", kwargs=kwargs))
+    assert res.status_code == HTTPStatus.OK
+    assert not character.states.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ("name", "remaining_rounds"),
+    [("party:increase_rounds", 3), ("party:decrease_rounds", 1)],
+)
+def test_party_rounds(name, remaining_rounds):
+    party = baker.make(Party)
+    effect = baker.make(BattleEffect, party=party, name="Brûlure", remaining_rounds=2)
+
+    res = async_get(party.game_master, reverse(name, kwargs={"pk": party.pk}))
+
+    assert res.status_code == HTTPStatus.OK
+    assert "Brûlure" in res.content.decode()
+    effect.refresh_from_db()
+    assert effect.remaining_rounds == remaining_rounds
@@ -0,0 +1,115 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+from model_bakery import baker
+
+from character.models import Capability, Character, Path
+from character.rulebook import get_rulebook
+from common.models import User
+
+
+@pytest.mark.django_db
+def test_capability_tree_single_query(initial_data, django_assert_num_queries):
+    character = baker.make(Character)
+    divination = Path.objects.get(name="Voie de la divination")
+    air = Path.objects.get(name="Voie de l'air")
+    character.capabilities.add(*divination.capabilities.filter(rank__in=[1, 2]))
+    character.paths.add(air)
+    get_rulebook()
+
+    with django_assert_num_queries(1):
+        tree = character.get_capability_tree()
+        progresses = list(tree)
+        next_capability = tree.get(divination.pk).next_capability
+
+    assert [progress.path for progress in progresses] == [air, divination]
+    divination_progress = progresses[1]
+    assert divination_progress.known_ranks == [1, 2]
+    assert divination_progress.max_rank == 2
+    assert next_capability == divination.capabilities.get(rank=3)
+    assert divination_progress.capability_points_used == 2
+    assert [cap.capability.rank for cap in divination_progress.capabilities] == [
+        1,
+        2,
+        3,
+        4,
+        5,
+    ]
+
+    air_progress = progresses[0]
+    assert air_progress.max_rank == 0
+    assert air_progress.last_known_capability is None
+    assert air_progress.next_capability == air.capabilities.get(rank=1)
+    assert tree.capability_points_remaining == character.capability_points_max - 2
+
+
+@pytest.mark.django_db
+def test_capability_tree_path_completed(initial_data):
+    character = baker.make(Character)
+    path = Path.objects.get(name="Voie de la divination")
+    character.capabilities.add(*path.capabilities.all())
+
+    progress = character.get_capability_tree().get(path.pk)
+
+    assert progress.max_rank == 5
+    assert not progress.has_next_capability
+    assert progress.last_known_capability == path.capabilities.get(rank=5)
+    with pytest.raises(Capability.DoesNotExist):
+        path.get_next_capability(character)
+
+
+@pytest.mark.django_db
+def test_sheet_does_not_inline_descriptions(client, initial_data):
+    player = User.objects.create_user("player")
+    character = baker.make(Character, player=player)
+    capability = Path.objects.get(name="Voie de l'air").capabilities.get(rank=1)
+    character.capabilities.add(capability)
+    client.force_login(player)
+
+    body = client.get(character.get_absolute_url()).content.decode()
+
+    assert capability.description not in body
+    url = reverse("character:capability_description", kwargs={"pk": capability.pk})
+    assert f"{url}?hash={capability.description_hash}" in body
+
+
+@pytest.mark.django_db
+def test_capability_description(client, django_assert_num_queries):
+    capability = baker.make(Capability, description="Vole <vite>.")
+    get_rulebook()
+    url = reverse("character:capability_description", kwargs={"pk": capability.pk})
+
+    with django_assert_num_queries(0):
+        res = client.get(url, {"hash": capability.description_hash})
+
+    assert res.status_code == HTTPStatus.OK
+    assert res.content.decode().strip() == "Vole &lt;vite&gt;."
+    assert res["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert not res.has_header("Vary")
+    res = client.get(url, {"hash": "0" * 12})
+    assert res["Cache-Control"] == "no-cache"
+    res = client.get(
+        reverse("character:capability_description", kwargs={"pk": capability.pk + 1}),
+    )
+    assert res.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_description_url_follows_content_not_generation(client, settings, tmp_path):
+    settings.RULEBOOK_GENERATION_FILE = tmp_path / "generation"
+    capability = baker.make(Capability, description="Vole.")
+    old_hash = capability.description_hash
+    url = reverse("character:capability_description", kwargs={"pk": capability.pk})
+
+    capability.description = "Vole vite."
+    capability.save()
+    # Like a new container: the generation starts over from scratch.
+    settings.RULEBOOK_GENERATION_FILE.unlink(missing_ok=True)
+
+    assert capability.description_hash != old_hash
+    res = client.get(url, {"hash": old_hash})
+    assert res.content.decode().strip() == "Vole vite."
+    assert res["Cache-Control"] == "no-cache"
+    res = client.get(url, {"hash": capability.description_hash})
+    assert "immutable" in res["Cache-Control"]
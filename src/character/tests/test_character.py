@@ -1,11 +1,19 @@
+import io
+
 import pytest
+from django.core.management import call_command
 from hypothesis import given
 from hypothesis.strategies import integers
+from model_bakery import baker
 
-from character.models.character import Character, Profile
+from character.models.character import Character, Profile, render_markdown
 from character.models.dice import Dice
+from character.models.equipment import Weapon
 from character.tests.utils import ability_values, levels, modifier_test
 
+# Derived stats are computed by the database: the characters are saved.
+pytestmark = pytest.mark.django_db
+
 
 @pytest.mark.parametrize(
     ("value", "expected"),
@@ -38,36 +46,38 @@ from character.tests.utils import ability_values, levels, modifier_test
     ["strength", "dexterity", "constitution", "intelligence", "wisdom", "charisma"],
 )
 def test_modifier_values(value, expected, ability):
-    character = Character()
-    value_attribute = f"value_{ability}"
-    setattr(character, value_attribute, value)
+    character = baker.make(Character, **{f"value_{ability}": value})
     modifier_attribute = f"modifier_{ability}"
     assert getattr(character, modifier_attribute) == expected
 
 
-@given(ability_values(), integers())
+@given(ability_values(), integers(min_value=-100, max_value=100))
 def test_initiative(dex, init_misc):
-    assert (
-        Character(value_dexterity=dex, initiative_misc=init_misc).modifier_initiative
-        == modifier_test(dex) + init_misc
-    )
+    character = baker.make(Character, value_dexterity=dex, initiative_misc=init_misc)
+    assert character.modifier_initiative == modifier_test(dex) + init_misc
 
 
 @given(level=levels(), strength=ability_values())
 def test_attack_melee(level, strength):
-    character = Character(level=level, value_strength=strength)
+    character = baker.make(Character, level=level, value_strength=strength)
     assert character.attack_melee == level + modifier_test(strength)
 
 
 @given(level=levels(), dexterity=ability_values())
 def test_attack_range(level, dexterity):
-    character = Character(level=level, value_dexterity=dexterity)
+    character = baker.make(Character, level=level, value_dexterity=dexterity)
     assert character.attack_range == level + modifier_test(dexterity)
 
 
-@given(armor=integers(), shield=integers(), dexterity=ability_values(), misc=integers())
+@given(
+    armor=integers(min_value=0, max_value=100),
+    shield=integers(min_value=0, max_value=100),
+    dexterity=ability_values(),
+    misc=integers(min_value=-100, max_value=100),
+)
 def test_defense(armor, shield, dexterity, misc):
-    char = Character(
+    char = baker.make(
+        Character,
         armor=armor,
         shield=shield,
         value_dexterity=dexterity,
@@ -78,23 +88,198 @@ def test_defense(armor, shield, dexterity, misc):
 
 @given(level=levels(), intelligence=ability_values())
 def test_mana_max_mage(level, intelligence):
-    profile = Profile(
+    profile, _ = Profile.objects.get_or_create(
         name="Magicien",
         life_dice=Dice.D4,
         magical_strength=Profile.MagicalStrength.INTELLIGENCE,
         mana_max_compute=Profile.ManaMax.DOUBLE_LEVEL,
     )
-    char = Character(level=level, profile=profile, value_intelligence=intelligence)
+    char = baker.make(
+        Character,
+        level=level,
+        profile=profile,
+        value_intelligence=intelligence,
+    )
     assert char.mana_max == 2 * level + modifier_test(intelligence)
 
 
 @given(level=levels(), wisdom=ability_values())
 def test_mana_max_druid(level, wisdom):
-    profile = Profile(
+    profile, _ = Profile.objects.get_or_create(
         name="Druide",
         life_dice=Dice.D4,
         magical_strength=Profile.MagicalStrength.WISDOM,
         mana_max_compute=Profile.ManaMax.LEVEL,
     )
-    char = Character(level=level, profile=profile, value_wisdom=wisdom)
+    char = baker.make(Character, level=level, profile=profile, value_wisdom=wisdom)
     assert char.mana_max == level + modifier_test(wisdom)
+
+
+def test_mana_max_follows_profile_changes():
+    profile = baker.make(
+        Profile,
+        magical_strength=Profile.MagicalStrength.NONE,
+        mana_max_compute=Profile.ManaMax.NO_MANA,
+    )
+    character = baker.make(Character, level=3, profile=profile, value_wisdom=14)
+    assert (character.modifier_magic, character.mana_max) == (0, 0)
+
+    profile.magical_strength = Profile.MagicalStrength.WISDOM
+    profile.mana_max_compute = Profile.ManaMax.DOUBLE_LEVEL
+    profile.save()
+
+    character.refresh_from_db()
+    assert character.modifier_magic == 2
+    assert character.attack_magic == 3 + 2
+    assert character.mana_max == 2 * 3 + 2
+
+
+@pytest.mark.parametrize("mana_max_compute", Profile.ManaMax.values)
+@pytest.mark.parametrize("level", [0, 1, 4])
+def test_magic_stats_match_sql(mana_max_compute, level):
+    character = baker.make(
+        Character,
+        level=level,
+        profile__magical_strength=Profile.MagicalStrength.WISDOM,
+        profile__mana_max_compute=mana_max_compute,
+        value_wisdom=14,
+    )
+    computed = (character.modifier_magic, character.attack_magic, character.mana_max)
+
+    Character.objects.filter(pk=character.pk).update_magic_stats()
+
+    character.refresh_from_db()
+    assert (
+        character.modifier_magic,
+        character.attack_magic,
+        character.mana_max,
+    ) == computed
+
+
+def test_magic_stats_follow_raw_and_unsignaled_profile_writes():
+    character = baker.make(
+        Character,
+        level=3,
+        profile__magical_strength=Profile.MagicalStrength.NONE,
+        profile__mana_max_compute=Profile.ManaMax.NO_MANA,
+    )
+    profile = character.profile
+
+    profile.mana_max_compute = Profile.ManaMax.LEVEL
+    profile.save_base(raw=True)
+    character.refresh_from_db()
+    assert character.mana_max == 3
+
+    Profile.objects.filter(pk=profile.pk).update(
+        mana_max_compute=Profile.ManaMax.DOUBLE_LEVEL,
+    )
+    call_command("update_magic_stats", stdout=io.StringIO())
+    character.refresh_from_db()
+    assert character.mana_max == 2 * 3
+
+    character.mana_max = 0
+    character.save_base(raw=True)
+    character.refresh_from_db()
+    assert character.mana_max == 2 * 3
+
+
+def test_magic_stats_follow_partial_saves():
+    character = baker.make(
+        Character,
+        level=1,
+        profile__magical_strength=Profile.MagicalStrength.INTELLIGENCE,
+        value_intelligence=10,
+    )
+
+    character.value_intelligence = 16
+    character.save(update_fields=["value_intelligence"])
+
+    character.refresh_from_db()
+    assert character.modifier_magic == 3
+    assert character.attack_magic == 1 + 3
+
+
+def test_partial_rows_only_write_loaded_fields(django_assert_num_queries):
+    character = baker.make(Character, level=2, notes="Notes", health_remaining=5)
+    character = Character.objects.only("equipment").get(pk=character.pk)
+    Character.objects.filter(pk=character.pk).update(health_remaining=3)
+
+    character.equipment = "Une corde"
+    with django_assert_num_queries(1):
+        character.save()
+
+    character.refresh_from_db()
+    assert character.equipment == "Une corde"
+    assert character.health_remaining == 3
+    assert character.notes_html == "<p>Notes</p>"
+    assert character.version == 3
+
+
+def test_order_by_derived_stats():
+    slow = baker.make(Character, value_dexterity=8, initiative_misc=0)
+    fast = baker.make(Character, value_dexterity=16, initiative_misc=1)
+
+    assert list(Character.objects.order_by("-modifier_initiative")) == [fast, slow]
+    assert list(Character.objects.filter(defense__gte=slow.defense + 1)) == [fast]
+
+
+def test_stat_block_is_computed_once(django_assert_num_queries):
+    character = baker.make(
+        Character,
+        level=2,
+        health_max=20,
+        health_remaining=5,
+        height=180,
+        weight=81,
+        value_strength=14,
+        value_dexterity=8,
+    )
+    melee = baker.make(Weapon, category=Weapon.Category.MELEE)
+    ranged = baker.make(Weapon, category=Weapon.Category.RANGE)
+
+    with django_assert_num_queries(0):
+        stats = character.stats
+        assert character.stats is stats
+        assert stats.health_remaining_percent == 25
+        assert stats.imc == 81 / 1.8**2
+        assert character.get_modifier_for_weapon(melee) == 2 + 2
+        assert character.get_modifier_for_weapon(ranged) == 2 - 1
+
+
+def test_stat_block_is_dropped_with_stale_values():
+    character = baker.make(Character, health_max=10, health_remaining=2)
+    assert character.stats.health_remaining_percent == 20
+
+    character.reset_stats()
+
+    assert character.stats.health_remaining_percent == 100
+
+
+def test_stat_block_is_dropped_when_its_fields_are_set():
+    character = baker.make(Character, health_max=10, health_remaining=2)
+    stats = character.stats
+    assert stats.health_remaining_percent == 20
+
+    character.name = "Sam"
+    assert character.stats is stats
+    character.health_remaining = 5
+    assert character.stats.health_remaining_percent == 50
+
+
+def test_notes_are_rendered_on_save(django_assert_num_queries):
+    character = baker.make(Character, notes="**Épée**", gm_notes="Un traître[^1]")
+    character.gm_notes = "Un allié"
+    character.save(update_fields=["gm_notes"])
+
+    character = Character.objects.get(pk=character.pk)
+    with django_assert_num_queries(0):
+        assert character.get_formatted_notes() == "<p><strong>Épée</strong></p>"
+        assert character.get_formatted_gm_notes() == "<p>Un allié</p>"
+
+
+def test_render_markdown_resets_its_state():
+    first = render_markdown("Un traître[^1]\n\n[^1]: Le MJ le sait.")
+    second = render_markdown("Rien à signaler[^1]")
+
+    assert "footnote" in first
+    assert second == "<p>Rien à signaler[^1]</p>"
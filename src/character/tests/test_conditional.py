@@ -0,0 +1,140 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.messages import constants
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.test import RequestFactory
+from django.urls import reverse
+from model_bakery import baker
+
+from character.conditional import make_etag
+from character.models import Character, HarmfulState
+from character.models.pet import Pet
+from common.models import User
+from party.models import BattleEffect, Party
+
+
+def assert_not_modified(client, url):
+    client.get(url)  # Sets the CSRF cookie, part of the ETag.
+    etag = client.get(url).headers["ETag"]
+    res = client.get(url, headers={"If-None-Match": etag})
+    assert res.status_code == HTTPStatus.NOT_MODIFIED
+    assert not res.templates
+    return etag
+
+
+def assert_modified(client, url, etag):
+    res = client.get(url, headers={"If-None-Match": etag})
+    assert res.status_code == HTTPStatus.OK
+    assert res.headers["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_character_view_not_modified(client):
+    character = baker.make(Character)
+    client.force_login(character.player)
+    url = character.get_absolute_url()
+
+    etag = assert_not_modified(client, url)
+    character.states.add(baker.make(HarmfulState))
+    assert_modified(client, url, etag)
+
+    etag = assert_not_modified(client, url)
+    pet = baker.make(Pet, owner=character, health_max=10, health_remaining=10)
+    assert_modified(client, url, etag)
+
+    etag = assert_not_modified(client, url)
+    client.get(
+        reverse("character:pet_health_change", kwargs={"pk": pet.pk}),
+        {"value": "-1"},
+    )
+    assert_modified(client, url, etag)
+
+
+@pytest.mark.django_db
+def test_character_view_etag_varies_on_viewer(client):
+    character = baker.make(Character)
+    party = baker.make(Party, characters=[character])
+    client.force_login(character.player)
+    url = character.get_absolute_url()
+    etag = client.get(url).headers["ETag"]
+
+    client.force_login(party.game_master)
+
+    assert_modified(client, url, etag)
+
+
+@pytest.mark.django_db
+def test_character_view_etag_varies_on_game_master(client):
+    character, other = baker.make(Character, _quantity=2)
+    party = baker.make(Party, characters=[character, other])
+    client.force_login(other.player)
+    url = character.get_absolute_url()
+    etag = assert_not_modified(client, url)
+
+    # The character itself is unchanged.
+    party.game_master = other.player
+    party.save()
+
+    assert_modified(client, url, etag)
+
+
+@pytest.mark.django_db
+def test_character_view_not_found_is_not_conditional(client):
+    character = baker.make(Character)
+    client.force_login(baker.make(User))
+
+    res = client.get(character.get_absolute_url(), headers={"If-None-Match": "*"})
+
+    assert res.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", ["get_health_bar", "get_mana_bar"])
+def test_bars_not_modified(client, name):
+    character = baker.make(Character, health_max=10, health_remaining=10)
+    client.force_login(character.player)
+    url = reverse(f"character:{name}", kwargs={"pk": character.pk})
+
+    etag = assert_not_modified(client, url)
+    client.post(
+        reverse("character:health_change", kwargs={"pk": character.pk}),
+        {"action": "ko"},
+    )
+    assert_modified(client, url, etag)
+
+
+@pytest.mark.django_db
+def test_party_details_not_modified(client):
+    character = baker.make(Character)
+    party = baker.make(Party, characters=[character])
+    client.force_login(party.game_master)
+    url = party.get_absolute_url()
+
+    etag = assert_not_modified(client, url)
+    Character.objects.filter(pk=character.pk).update(name="Renamed")
+    assert_modified(client, url, etag)
+
+    etag = assert_not_modified(client, url)
+    party.invited_characters.add(baker.make(Character))
+    assert_modified(client, url, etag)
+
+    etag = assert_not_modified(client, url)
+    baker.make(BattleEffect, party=party, remaining_rounds=2)
+    assert_modified(client, url, etag)
+
+    etag = assert_not_modified(client, url)
+    party.effects.decrease_rounds()
+    assert_modified(client, url, etag)
+
+
+@pytest.mark.django_db
+def test_no_etag_with_pending_messages():
+    request = RequestFactory().get("/")
+    request.user = baker.make(User)
+    request._messages = CookieStorage(request)  # noqa: SLF001
+    assert make_etag(request, 1) is not None
+
+    request._messages.add(constants.SUCCESS, "Enregistré.")  # noqa: SLF001
+
+    assert make_etag(request, 1) is None
@@ -0,0 +1,249 @@
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+from django.db import OperationalError, connection
+from django.urls import reverse
+from model_bakery import baker
+
+from character import counters
+from character.models import Character, Profile
+from character.models.pet import Pet
+from common.models import User
+from party.models import Party
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("mana_max_compute", Profile.ManaMax.values)
+@pytest.mark.parametrize("magical_strength", Profile.MagicalStrength.values)
+@pytest.mark.parametrize("value", [0, 3, 10, 15])
+def test_maximums_match_python(mana_max_compute, magical_strength, value):
+    profile = baker.make(
+        Profile,
+        mana_max_compute=mana_max_compute,
+        magical_strength=magical_strength,
+    )
+    character = baker.make(
+        Character,
+        profile=profile,
+        level=4,
+        value_intelligence=value,
+        value_wisdom=value,
+        value_charisma=value,
+        bonus_intelligence=1,
+        bonus_wisdom=2,
+        bonus_charisma=0,
+    )
+    queryset = Character.objects.filter(pk=character.pk)
+
+    values = counters.update_counters(
+        queryset,
+        {counters.MANA: "max", counters.LUCK_POINTS: "max"},
+    )
+
+    assert values == {
+        "mana_remaining": max(character.mana_max, 0),
+        "luck_points_remaining": character.luck_points_max,
+    }
+
+
+@pytest.mark.django_db
+def test_counter_is_clamped(django_assert_num_queries):
+    character = baker.make(Character, health_max=10, health_remaining=8)
+    queryset = Character.objects.filter(pk=character.pk)
+
+    with django_assert_num_queries(1):
+        assert counters.update_counter(queryset, counters.HEALTH, 5) == 10
+    assert counters.update_counter(queryset, counters.HEALTH, -25) == 0
+    assert counters.update_counter(queryset, counters.HEALTH, "max") == 10
+    assert counters.update_counter(queryset, counters.HEALTH, "ko") == 0
+    assert counters.update_counter(queryset, counters.ARMOR, 40) == 40
+
+
+@pytest.mark.django_db
+def test_counter_outside_queryset():
+    character = baker.make(Character)
+    queryset = Character.objects.exclude(pk=character.pk).filter(pk=character.pk)
+
+    assert counters.update_counter(queryset, counters.HEALTH, 1) is None
+
+
+@pytest.mark.django_db
+def test_clicks_from_stale_pages_are_not_lost(client):
+    game_master = User.objects.create_user("gm")
+    player = User.objects.create_user("player")
+    character = baker.make(Character, player=player, health_max=20, health_remaining=10)
+    party = baker.make(Party, game_master=game_master)
+    party.characters.add(character)
+    url = reverse("character:health_change", kwargs={"pk": character.pk})
+
+    for user, action in [(player, "negative"), (game_master, "negative")]:
+        client.force_login(user)
+        client.post(url, data={"action": action, "value": 3})
+
+    character.refresh_from_db()
+    assert character.health_remaining == 4
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_clicks():
+    character = baker.make(Character, health_max=1000, health_remaining=500)
+    queryset = Character.objects.filter(pk=character.pk)
+    clicks, threads_count = 20, 5
+    barrier = threading.Barrier(threads_count)
+
+    def click(change: int) -> None:
+        barrier.wait()
+        try:
+            for _ in range(clicks):
+                # The shared-cache test database has no busy timeout: a click
+                # refused because the table is locked was not applied, retry it.
+                while True:
+                    try:
+                        counters.update_counter(queryset, counters.HEALTH, change)
+                        break
+                    except OperationalError:
+                        time.sleep(0.001)
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=click, args=(change,)) for change in [1, 1, 1, -1, -2]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    character.refresh_from_db()
+    assert character.health_remaining == 500 + clicks * (1 + 1 + 1 - 1 - 2)
+
+
+@pytest.mark.django_db
+def test_pet_health_change(client):
+    player = User.objects.create_user("player")
+    pet = baker.make(Pet, owner__player=player, health_max=12, health_remaining=10)
+    client.force_login(player)
+    url = reverse("character:pet_health_change", kwargs={"pk": pet.pk})
+
+    res = client.get(url, data={"value": 5})
+
+    assert res.status_code == HTTPStatus.OK
+    assert "PV : 12/12" in res.content.decode()
+
+
+@pytest.mark.django_db
+def test_cant_change_unmanaged_counter(client):
+    player = User.objects.create_user("player")
+    character = baker.make(Character, mana_remaining=0)
+    client.force_login(player)
+    url = reverse("character:mana_change", kwargs={"pk": character.pk})
+
+    res = client.get(url, data={"value": 1})
+
+    assert res.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_counter_response_swaps_dependent_fragments_out_of_band(client):
+    player = User.objects.create_user("player")
+    character = baker.make(
+        Character,
+        player=player,
+        armor=2,
+        shield=1,
+        defense_misc=0,
+        value_dexterity=14,
+        bonus_dexterity=0,
+    )
+    client.force_login(player)
+    url = reverse("character:armor_change", kwargs={"pk": character.pk})
+
+    res = client.get(url, data={"value": 1})
+
+    body = res.content.decode()
+    assert body.startswith("3\n")
+    assert 'id="defense" hx-swap-oob="true"' in body
+    assert ">16</span>" in body
+    assert "refresh_tooltips" in res.headers["HX-Trigger-After-Swap"]
+
+
+@pytest.mark.django_db
+def test_health_change_swaps_health_bar_out_of_band(client):
+    player = User.objects.create_user("player")
+    character = baker.make(Character, player=player, health_max=10, health_remaining=4)
+    client.force_login(player)
+    url = reverse("character:health_change", kwargs={"pk": character.pk})
+
+    res = client.post(url, data={"action": "positive", "value": 1})
+
+    body = res.content.decode()
+    assert body.startswith("5\n")
+    assert f'id="health-bar-{character.pk}" hx-swap-oob="true"' in body
+    assert "PV : 5/10" in body
+
+
+@pytest.mark.django_db
+def test_apply_batch_in_single_update(client, django_assert_num_queries):
+    player = User.objects.create_user("player")
+    character = baker.make(
+        Character,
+        player=player,
+        health_max=10,
+        health_remaining=8,
+        armor=1,
+        luck_points_remaining=0,
+        value_charisma=12,
+        bonus_charisma=0,
+    )
+    client.force_login(player)
+    url = reverse("character:apply", kwargs={"pk": character.pk})
+    client.get(character.get_absolute_url())
+
+    with django_assert_num_queries(1):  # Session and user are cached.
+        res = client.post(
+            url,
+            data={"health_remaining": -3, "armor": 4, "luck_points_remaining": "max"},
+        )
+
+    assert res.status_code == HTTPStatus.OK
+    body = res.content.decode()
+    assert '<span id="health-remaining" hx-swap-oob="true">5</span>' in body
+    assert '<span id="armor" hx-swap-oob="true">5</span>' in body
+    assert '<span id="luck-points-remaining" hx-swap-oob="true">4</span>' in body
+    assert f'id="health-bar-{character.pk}" hx-swap-oob="true"' in body
+    assert 'id="defense" hx-swap-oob="true"' in body
+    character.refresh_from_db()
+    assert (character.health_remaining, character.armor) == (5, 5)
+    assert character.luck_points_remaining == 4
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "data",
+    [{}, {"name": "1"}, {"armor": "max"}, {"health_remaining": "a lot"}],
+)
+def test_apply_rejects_invalid_batch(client, data):
+    player = User.objects.create_user("player")
+    character = baker.make(Character, player=player, armor=1)
+    client.force_login(player)
+    url = reverse("character:apply", kwargs={"pk": character.pk})
+
+    res = client.post(url, data=data)
+
+    assert res.status_code == HTTPStatus.BAD_REQUEST
+    character.refresh_from_db()
+    assert character.armor == 1
+
+
+@pytest.mark.django_db
+def test_cant_apply_to_unmanaged_character(client):
+    player = User.objects.create_user("player")
+    character = baker.make(Character, health_remaining=5)
+    client.force_login(player)
+    url = reverse("character:apply", kwargs={"pk": character.pk})
+
+    res = client.post(url, data={"health_remaining": -1})
+    assert res.status_code == HTTPStatus.NOT_FOUND
+    assert client.get(url).status_code == HTTPStatus.METHOD_NOT_ALLOWED
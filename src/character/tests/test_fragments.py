@@ -0,0 +1,103 @@
+import pytest
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.urls import reverse
+from model_bakery import baker
+
+from character.counters import HEALTH, update_counter
+from character.fragments import MANAGER, OBSERVER, OWNER, viewer_role
+from character.models import Character, HarmfulState
+from common.models import User
+from party.models import Party
+
+
+def version(character: Character) -> int:
+    return Character.objects.values_list("version", flat=True).get(pk=character.pk)
+
+
+@pytest.mark.django_db
+def test_save_bumps_version(django_assert_num_queries):
+    character = baker.make(Character)
+    assert character.version == 1
+
+    character.name = "Renamed"
+    character.save(update_fields=["name"])
+
+    assert version(character) == 2
+    with django_assert_num_queries(1):
+        assert character.version == 2
+
+
+@pytest.mark.django_db
+def test_updates_bump_version():
+    character = baker.make(Character, health_max=10, health_remaining=5)
+    queryset = Character.objects.filter(pk=character.pk)
+
+    queryset.update(armor=2)
+    queryset.reset_stats()
+    update_counter(queryset, HEALTH, -1)
+
+    assert version(character) == 4
+
+
+@pytest.mark.django_db
+def test_many_to_many_changes_bump_version():
+    character, other = baker.make(Character, _quantity=2)
+    state = baker.make(HarmfulState)
+
+    character.states.add(state)
+    assert character.version == 2
+    state.characters.add(other)
+    assert version(other) == 2
+    state.characters.clear()
+    assert version(character) == 3
+    assert version(other) == 3
+    baker.make(Party, characters=[character])
+    assert version(character) == 4
+
+
+@pytest.mark.django_db
+def test_viewer_role():
+    game_master, player, stranger = baker.make(User, _quantity=3)
+    character = baker.make(Character, player=player)
+    baker.make(Party, game_master=game_master, characters=[character])
+
+    assert viewer_role(character, player) == OWNER
+    assert viewer_role(character, game_master) == MANAGER
+    assert viewer_role(character, stranger) == OBSERVER
+
+
+@pytest.mark.django_db
+def test_unchanged_card_is_served_from_cache(django_assert_num_queries):
+    character = baker.make(Character)
+    state = baker.make(HarmfulState)
+    request = RequestFactory().get("/")
+    request.user = character.player
+    context = {"character": character, "all_states": [state], "user": request.user}
+
+    def render() -> str:
+        return render_to_string(
+            "character/snippets/characters_list/character_card.html",
+            context,
+            request,
+        )
+
+    card = render()
+    with django_assert_num_queries(0):
+        assert render() == card
+
+    character.states.add(state)
+    assert "state-enabled" in render()
+
+
+@pytest.mark.django_db
+def test_party_cards_follow_character_changes(client):
+    character = baker.make(Character)
+    party = baker.make(Party, characters=[character])
+    client.force_login(party.game_master)
+    url = reverse("party:details", kwargs={"pk": party.pk})
+    client.get(url)
+
+    Character.objects.filter(pk=character.pk).update(name="Renamed")
+
+    assert "Renamed" in client.get(url).content.decode()
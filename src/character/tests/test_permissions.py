@@ -0,0 +1,54 @@
+import pytest
+from model_bakery import baker
+
+from character.models import Character
+from character.permissions import get_character_permissions
+from common.models import User
+from party.models import Party
+
+
+@pytest.mark.django_db
+def test_permissions_resolved_in_two_queries(django_assert_num_queries):
+    user = User.objects.create_user("user")
+    other = User.objects.create_user("other")
+    owned = baker.make(Character, player=user)
+    mastered = baker.make(Character, player=other)
+    invited_to_mastered = baker.make(Character, player=other)
+    friend = baker.make(Character, player=other)
+    invited_friend = baker.make(Character, player=other)
+    stranger = baker.make(Character, player=other)
+
+    mastered_party = baker.make(Party, game_master=user)
+    mastered_party.characters.add(mastered)
+    mastered_party.invited_characters.add(invited_to_mastered)
+    played_party = baker.make(Party, game_master=other)
+    played_party.characters.add(owned, friend)
+    played_party.invited_characters.add(invited_friend)
+
+    with django_assert_num_queries(2):
+        permissions = get_character_permissions(user)
+        assert get_character_permissions(user) is permissions
+
+    assert permissions.owned_ids == {owned.pk}
+    assert permissions.mastered_ids == {mastered.pk}
+    assert permissions.managed_ids == {owned.pk, mastered.pk}
+    assert permissions.friendly_ids == {
+        owned.pk,
+        mastered.pk,
+        invited_to_mastered.pk,
+        friend.pk,
+        invited_friend.pk,
+    }
+    assert not permissions.is_friendly(stranger)
+
+
+@pytest.mark.django_db
+def test_instance_checks_use_resolver(django_assert_num_queries):
+    user = User.objects.create_user("user")
+    characters = baker.make(Character, _quantity=5, player=user)
+
+    with django_assert_num_queries(2):
+        for character in characters:
+            assert character.managed_by(user)
+            assert character.owned_by(user)
+            assert not character.mastered_by(user)
@@ -0,0 +1,133 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+from model_bakery import baker
+
+from character import rulebook
+from character.forms import AddPathForm, CharacterForm
+from character.models import (
+    Character,
+    HarmfulState,
+    Path,
+    Race,
+    RacialCapability,
+    Weapon,
+)
+from common.models import User
+
+
+@pytest.fixture
+def generation_file(settings, tmp_path):
+    settings.RULEBOOK_GENERATION_FILE = tmp_path / "generation"
+    return settings.RULEBOOK_GENERATION_FILE
+
+
+@pytest.mark.django_db
+def test_warm_rulebook_needs_no_query(initial_data, django_assert_num_queries):
+    rulebook.get_rulebook()
+
+    with django_assert_num_queries(0):
+        book = rulebook.get_rulebook()
+        path = book.all(Path)[0]
+        capabilities = book.capabilities_of(path.pk)
+        str(path)
+        str(capabilities[0])
+
+    assert [cap.rank for cap in capabilities] == [1, 2, 3, 4, 5]
+    assert book.all(Path) == list(Path.objects.all())
+
+
+@pytest.mark.django_db
+def test_rulebook_is_reloaded_after_save_and_delete():
+    state = baker.make(HarmfulState, name="Aveuglé")
+    assert rulebook.get_rulebook().all(HarmfulState) == [state]
+
+    state.name = "Affaibli"
+    state.save()
+    assert rulebook.get_rulebook().get(HarmfulState, state.pk).name == "Affaibli"
+
+    state.delete()
+    assert rulebook.get_rulebook().all(HarmfulState) == []
+
+
+@pytest.mark.django_db
+def test_rulebook_is_reloaded_when_generation_changes(generation_file):
+    book = rulebook.get_rulebook()
+    # Another process changes the rulebook, no signal is received here.
+    HarmfulState.objects.bulk_create([HarmfulState(name="Renversé")])
+    assert rulebook.get_rulebook() is book
+
+    rulebook.invalidate()
+
+    assert generation_file.exists()
+    reloaded = rulebook.get_rulebook()
+    assert reloaded.generation > book.generation
+    assert [state.name for state in reloaded.all(HarmfulState)] == ["Renversé"]
+
+
+@pytest.mark.django_db
+def test_with_rulebook_resolves_foreign_keys(django_assert_num_queries):
+    character = baker.make(Character, _fill_optional=["racial_capability"])
+    rulebook.get_rulebook()
+
+    with django_assert_num_queries(1):
+        character = Character.objects.with_rulebook().get(pk=character.pk)
+        str(character.race)
+        str(character.profile)
+        str(character.racial_capability)
+
+
+@pytest.mark.django_db
+def test_character_form_choices_need_no_query(initial_data, django_assert_num_queries):
+    rulebook.get_rulebook()
+    form = CharacterForm()
+
+    with django_assert_num_queries(0):
+        race_choices = list(form.fields["race"].choices)
+        weapon_choices = list(form.fields["weapons"].choices)
+        racial_choices = list(form.fields["racial_capability"].choices)
+
+    assert len(race_choices) == Race.objects.count() + 1
+    assert len(weapon_choices) == Weapon.objects.count()
+    assert len(racial_choices) == RacialCapability.objects.count() + 1
+
+
+@pytest.mark.django_db
+def test_character_form_rejects_unknown_choices(initial_data):
+    race = Race.objects.first()
+    form = CharacterForm(data={"race": 0, "weapons": [race.pk, "a"]})
+
+    form.is_valid()
+
+    assert "race" in form.errors
+    assert "weapons" in form.errors
+
+
+@pytest.mark.django_db
+def test_add_path_form(initial_data, client):
+    player = User.objects.create_user("player")
+    race = Race.objects.get(name="Elfe Sylvain")
+    character = baker.make(Character, player=player, race=race)
+    rulebook.get_rulebook()
+    form = AddPathForm(character)
+
+    character_paths = [
+        value.instance for value, _ in form.fields["character_path"].choices if value
+    ]
+    other_paths = [
+        value.instance for value, _ in form.fields["other_path"].choices if value
+    ]
+    assert character_paths == list(Path.objects.filter(race=race))
+    assert len(character_paths) + len(other_paths) == Path.objects.count()
+
+    path = Path.objects.filter(race=race).first()
+    client.force_login(player)
+    res = client.post(
+        reverse("character:add_path", kwargs={"pk": character.pk}),
+        data={"character_path": path.pk},
+    )
+
+    assert res.status_code == HTTPStatus.OK
+    assert list(character.paths.all()) == [path]
+    assert path.display_name in res.content.decode()
@@ -0,0 +1,113 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+from model_bakery import baker
+
+from character import search
+from character.models import Capability, HarmfulState, Path, Weapon
+from common.models import User
+
+
+@pytest.mark.django_db
+def test_objects_are_indexed_on_save_and_delete():
+    weapon = baker.make(Weapon, name="Épée longue", damage="1d8", special="")
+
+    assert list(search.filter_matching(Weapon.objects.all(), "epee")) == [weapon]
+    assert list(search.filter_matching(Weapon.objects.all(), "1d8")) == [weapon]
+    assert not search.filter_matching(Path.objects.all(), "epee")
+
+    weapon.name = "Hache"
+    weapon.save()
+    assert not search.filter_matching(Weapon.objects.all(), "epee")
+    assert list(search.filter_matching(Weapon.objects.all(), "hach")) == [weapon]
+
+    weapon.delete()
+    assert not search.filter_matching(Weapon.objects.all(), "hache")
+
+
+@pytest.mark.django_db
+def test_search_is_ranked_with_snippets():
+    in_description = baker.make(
+        Capability,
+        name="Coup puissant",
+        description="Une attaque portée avec une arme <lourde> : la hache du nain.",
+    )
+    in_name = baker.make(HarmfulState, name="Hébété", description="Rien.")
+    baker.make(Capability, name="Soins", description="Soigne un allié.")
+
+    results = search.search("Hache hébét")
+    assert results == []
+
+    results = search.search("hache")
+    assert [result.object for result in results] == [in_description]
+    assert "&lt;lourde&gt;" in results[0].snippet
+    assert "<mark>hache</mark>" in results[0].snippet
+
+    results = search.search("HEBETE")
+    assert [result.object for result in results] == [in_name]
+    assert results[0].name == "<mark>Hébété</mark>"
+    assert results[0].kind == "État préjudiciable"
+
+
+@pytest.mark.django_db
+def test_name_matches_first():
+    in_description = baker.make(HarmfulState, name="Aveuglé", description="Étourdi.")
+    in_name = baker.make(HarmfulState, name="Étourdi", description="Sonné.")
+
+    results = search.search("etourdi")
+
+    assert [result.object for result in results] == [in_name, in_description]
+
+
+@pytest.mark.django_db
+def test_rebuild():
+    weapon = baker.make(Weapon, name="Arc court")
+    Weapon.objects.filter(pk=weapon.pk).update(name="Arbalète")
+
+    search.rebuild()
+
+    assert list(search.filter_matching(Weapon.objects.all(), "arbalete")) == [weapon]
+    assert not search.filter_matching(Weapon.objects.all(), "arc")
+
+
+@pytest.mark.django_db
+def test_query_syntax_is_ignored():
+    baker.make(Weapon, name="Dague")
+
+    assert search.search('"dague" OR NOT*') == []
+    assert len(search.search('dag" -*')) == 1
+    assert search.search("  ") == []
+
+
+@pytest.mark.django_db
+def test_admin_search(admin_client):
+    capability = baker.make(Capability, name="Boule de feu")
+    baker.make(Capability, name="Armure de glace")
+
+    res = admin_client.get(
+        reverse("admin:character_capability_changelist"),
+        {"q": "feu"},
+    )
+
+    assert list(res.context["cl"].result_list) == [capability]
+
+
+@pytest.mark.django_db
+def test_rulebook_search_view(client):
+    client.force_login(User.objects.create_user("player"))
+    baker.make(Weapon, name="Fronde")
+    url = reverse("character:rulebook_search")
+
+    res = client.get(url, {"q": "fron"})
+    assert res.status_code == HTTPStatus.OK
+    assert "<mark>Fronde</mark>" in res.content.decode()
+    assert "<h1>" in res.content.decode()
+
+    res = client.get(url, {"q": "fron"}, headers={"HX-Request": "true"})
+    assert "<mark>Fronde</mark>" in res.content.decode()
+    assert "<h1>" not in res.content.decode()
+
+    res = client.get(url, {"q": "fron", "page": "²"})
+    assert res.status_code == HTTPStatus.OK
+    assert "<mark>Fronde</mark>" in res.content.decode()
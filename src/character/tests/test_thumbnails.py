@@ -0,0 +1,186 @@
+import io
+from http import HTTPStatus
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.urls import reverse
+from model_bakery import baker
+from PIL import Image
+
+from character import thumbnails
+from character.models import Character
+from common.models import User
+
+
+@pytest.fixture(autouse=True)
+def _media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+def make_picture(name: str = "frodo.png", size=(2000, 1000)) -> SimpleUploadedFile:
+    content = io.BytesIO()
+    Image.new("RGBA", size, (255, 0, 0, 128)).save(content, "png")
+    return SimpleUploadedFile(name, content.getvalue(), content_type="image/png")
+
+
+def variant_names(name: str) -> list[str]:
+    return [
+        thumbnails.variant_name(name, variant, image_format)
+        for variant in thumbnails.VARIANTS
+        for image_format in thumbnails.FORMATS
+    ]
+
+
+@pytest.mark.django_db
+def test_variants_are_stored_on_upload():
+    character = baker.make(Character, profile_picture=make_picture())
+    name = character.profile_picture.name
+
+    assert name == "profile_pictures/frodo.png"
+    assert (character.profile_picture_width, character.profile_picture_height) == (
+        2000,
+        1000,
+    )
+    assert all(default_storage.exists(variant) for variant in variant_names(name))
+    with default_storage.open("profile_pictures/frodo.png.small.webp") as small:
+        assert Image.open(small).size == (64, 32)
+    with default_storage.open("profile_pictures/frodo.png.full.jpg") as full:
+        assert Image.open(full).size == (1024, 512)
+
+
+@pytest.mark.django_db
+def test_small_pictures_are_not_enlarged():
+    character = baker.make(Character, profile_picture=make_picture(size=(40, 50)))
+
+    with default_storage.open(
+        thumbnails.variant_name(character.profile_picture.name, "full", "webp"),
+    ) as full:
+        assert Image.open(full).size == (40, 50)
+
+
+@pytest.mark.django_db
+def test_variants_are_deleted_with_the_picture(django_capture_on_commit_callbacks):
+    character = baker.make(Character, profile_picture=make_picture())
+    old_name = character.profile_picture.name
+
+    with django_capture_on_commit_callbacks(execute=True):
+        character.profile_picture = make_picture("sam.png")
+        character.save()
+    new_name = character.profile_picture.name
+    assert not any(default_storage.exists(name) for name in variant_names(old_name))
+    assert all(default_storage.exists(name) for name in variant_names(new_name))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        character.delete()
+    assert not any(default_storage.exists(name) for name in variant_names(new_name))
+
+
+@pytest.mark.django_db
+def test_originals_sharing_a_stem_have_their_own_variants(
+    django_capture_on_commit_callbacks,
+):
+    png = baker.make(Character, profile_picture=make_picture("frodo.png"))
+    jpg = baker.make(
+        Character,
+        profile_picture=make_picture("frodo.jpg", size=(100, 200)),
+    )
+    jpg_variants = variant_names(jpg.profile_picture.name)
+    assert not set(variant_names(png.profile_picture.name)) & set(jpg_variants)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        png.delete()
+
+    assert all(default_storage.exists(variant) for variant in jpg_variants)
+    with default_storage.open("profile_pictures/frodo.jpg.small.webp") as small:
+        assert Image.open(small).size == (32, 64)
+
+
+@pytest.mark.django_db
+def test_equipment_change_keeps_the_picture(client, django_capture_on_commit_callbacks):
+    player = baker.make(User)
+    character = baker.make(Character, player=player, profile_picture=make_picture())
+    client.force_login(player)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        res = client.post(
+            reverse("character:equipment_change", kwargs={"pk": character.pk}),
+            {
+                "equipment": "Une corde",
+                "money_pp": 1,
+                "money_po": 2,
+                "money_pa": 3,
+                "money_pc": 4,
+            },
+        )
+
+    assert res.status_code == HTTPStatus.OK
+    character.refresh_from_db()
+    assert character.equipment == "Une corde"
+    assert character.profile_picture.name == "profile_pictures/frodo.png"
+    assert character.profile_picture_width == 2000
+    assert all(
+        default_storage.exists(name)
+        for name in [
+            "profile_pictures/frodo.png",
+            *variant_names("profile_pictures/frodo.png"),
+        ]
+    )
+
+
+@pytest.mark.django_db
+def test_cleared_picture_has_no_size():
+    character = baker.make(Character, profile_picture=make_picture())
+
+    character.profile_picture = None
+    character.save()
+
+    assert character.profile_picture_width is None
+    assert character.profile_picture_height is None
+
+
+@pytest.mark.django_db
+def test_profile_picture_tag():
+    template = Template(
+        '{% load character_extras %}{% profile_picture character "pic" 240 %}',
+    )
+    character = baker.make(Character, profile_picture=make_picture())
+
+    html = template.render(Context({"character": character}))
+
+    def url(name):
+        return default_storage.url(f"profile_pictures/{name}")
+
+    assert 'width="240" height="120"' in html
+    assert (
+        f'srcset="{url("frodo.png.small.webp")} 64w, '
+        f"{url('frodo.png.medium.webp')} 480w, "
+        f'{url("frodo.png.full.webp")} 1024w"'
+    ) in html
+    assert f'src="{url("frodo.png.medium.jpg")}"' in html
+    assert url("frodo.png.medium.jpg").startswith(
+        "/media/profile_pictures/frodo.png.medium.",
+    )
+
+    Character.objects.filter(pk=character.pk).update(profile_picture_width=None)
+    character.refresh_from_db()
+    html = template.render(Context({"character": character}))
+    assert f'src="{url("frodo.png")}"' in html
+    assert "srcset" not in html
+
+
+@pytest.mark.django_db
+def test_generate_thumbnails_command():
+    name = default_storage.save("profile_pictures/merry.png", make_picture())
+    character = baker.make(Character)
+    Character.objects.filter(pk=character.pk).update(profile_picture=name)
+    baker.make(Character, profile_picture="profile_pictures/missing.png")
+
+    call_command("generate_thumbnails", stdout=io.StringIO(), stderr=io.StringIO())
+
+    character.refresh_from_db()
+    assert character.profile_picture_width == 2000
+    assert character.version == 3
+    assert all(default_storage.exists(variant) for variant in variant_names(name))
@@ -32,4 +32,4 @@ def modifier_test(value: int) -> int:
 
 
 ability_values = partial(integers, min_value=1, max_value=21)
-levels = partial(integers, min_value=1)
+levels = partial(integers, min_value=1, max_value=40)
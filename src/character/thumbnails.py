@@ -0,0 +1,100 @@
+"""
+Resized variants of the profile pictures of the characters.
+
+When a picture is uploaded, it is resized to fit each of `VARIANTS`, never
+enlarged, and encoded in every format of `FORMATS`. The variants are stored
+next to the original, named after its whole name, which the storage keeps
+unique: `profile_pictures/frodo.png.small.webp` for the original
+`profile_pictures/frodo.png`. They are deleted with it by django-cleanup. The
+size of the original is kept on the character: it gives the size of every
+variant, for the `srcset` of the templates, and tells the variants exist.
+Pictures uploaded before the variants are processed by `generate_thumbnails`.
+"""
+
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.db.models.fields.files import FieldFile
+from django_cleanup.signals import cleanup_pre_delete
+from PIL import Image, ImageOps
+
+# Bounding square of each variant, in pixels.
+VARIANTS = {"small": 64, "medium": 480, "full": 1024}
+# Extension and encoder options of each format.
+FORMATS = {
+    "webp": ("webp", {"quality": 80, "method": 4}),
+    "jpeg": ("jpg", {"quality": 82, "progressive": True, "optimize": True}),
+}
+
+
+def fit(width: int, height: int, bound: int) -> tuple[int, int]:
+    """Return the size of a picture shrunk to fit in a square, if larger."""
+    ratio = min(1, bound / max(width, height))
+    return max(1, round(width * ratio)), max(1, round(height * ratio))
+
+
+def variant_name(name: str, variant: str, image_format: str) -> str:
+    path = PurePosixPath(name)
+    extension, _ = FORMATS[image_format]
+    return str(path.with_name(f"{path.name}.{variant}.{extension}"))
+
+
+def generate(picture: FieldFile) -> tuple[int, int]:
+    """Store every variant of the picture, and return the size of the picture."""
+    with picture.open("rb"), Image.open(picture) as original:
+        image = ImageOps.exif_transpose(original)
+        image.load()
+    if image.mode not in {"RGB", "RGBA"}:
+        image = image.convert("RGBA")
+    width, height = image.size
+    for variant, bound in VARIANTS.items():
+        resized = image.resize(fit(width, height, bound), Image.Resampling.LANCZOS)
+        for image_format, (_, options) in FORMATS.items():
+            encoded = resized
+            if image_format == "jpeg" and resized.mode == "RGBA":
+                encoded = Image.new("RGB", resized.size, "white")
+                encoded.paste(resized, mask=resized)
+            content = ContentFile(b"")
+            encoded.save(content, image_format, **options)
+            name = variant_name(picture.name, variant, image_format)
+            # Replaced in place: variants of other originals have other names.
+            picture.storage.delete(name)
+            picture.storage.save(name, content)
+    return width, height
+
+
+def delete(storage: Storage, name: str) -> None:
+    for variant in VARIANTS:
+        for image_format in FORMATS:
+            storage.delete(variant_name(name, variant, image_format))
+
+
+def sources(picture: FieldFile, width: int, height: int, display: int) -> dict:
+    """
+    Return the context of the `<picture>` of a profile picture.
+
+    The `srcset` of each format lists every variant, and the picture is shown
+    at most `display` pixels wide and high.
+    """
+    context = {"srcsets": {}}
+    for image_format in FORMATS:
+        context["srcsets"][image_format] = ", ".join(
+            f"{picture.storage.url(variant_name(picture.name, variant, image_format))} "
+            f"{fit(width, height, bound)[0]}w"
+            for variant, bound in VARIANTS.items()
+        )
+    context["src"] = picture.storage.url(variant_name(picture.name, "medium", "jpeg"))
+    context["width"], context["height"] = fit(width, height, display)
+    return context
+
+
+def _on_cleanup(file, field_name, instance, **kwargs) -> None:  # noqa: ARG001
+    from character.models import Character
+
+    if isinstance(instance, Character) and field_name == "profile_picture":
+        delete(file.storage, file.name)
+
+
+def connect_signals() -> None:
+    cleanup_pre_delete.connect(_on_cleanup)
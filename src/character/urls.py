@@ -6,9 +6,16 @@ app_name = "character"
 urlpatterns = [
     path("", views.characters_list, name="list"),
     path("create/", views.character_create, name="create"),
+    path("rulebook/", views.rulebook_search, name="rulebook_search"),
+    path(
+        "capability/<int:pk>/description/",
+        views.capability_description,
+        name="capability_description",
+    ),
     path("<int:pk>/", views.character_view, name="view"),
     path("<int:pk>/change/", views.character_change, name="change"),
     path("<int:pk>/delete/", views.character_delete, name="delete"),
+    path("<int:pk>/apply/", views.character_apply, name="apply"),
     path(
         "<int:pk>/health_change/",
         views.character_health_change,
@@ -1,28 +1,96 @@
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404, redirect, render
+from django.db.models import aprefetch_related_objects
+from django.http import Http404, HttpResponseBadRequest
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect, render
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET, require_POST
 from django_htmx.http import trigger_client_event
 
+from character import counters, search
+from character.conditional import character_etag, managed_character_etag
 from character.forms import AddPathForm, CharacterForm, EquipmentForm, PetForm
 from character.models import Capability, Character, HarmfulState, Path
+from character.models.character import StatBlock
 from character.models.pet import Pet
-from character.templatetags.character_extras import modifier
+from character.permissions import get_character_permissions
+from character.rulebook import get_rulebook
+from common import writer
+from common.http import get_page
+from party import events
 from party.models import Party
 
 
 @login_required
 def characters_list(request):
     context = {
-        "characters": Character.objects.owned_by(request.user).select_related(
-            "race",
-            "profile",
-        ),
-        "all_states": HarmfulState.objects.all(),
+        "characters": Character.objects.owned_by(request.user).with_rulebook(),
+        "all_states": get_rulebook().all(HarmfulState),
     }
     return render(request, "character/characters_list.html", context)
 
 
+RULEBOOK_SEARCH_PAGE_SIZE = 20
+# The URLs of the descriptions change with their content.
+CAPABILITY_DESCRIPTION_MAX_AGE = 365 * 24 * 60 * 60
+
+
+@login_required
+def rulebook_search(request):
+    """Search the rulebook, see `character.search`: the results only with htmx."""
+    query = request.GET.get("q", "").strip()
+    page = get_page(request)
+    results = search.search(
+        query,
+        limit=RULEBOOK_SEARCH_PAGE_SIZE + 1,
+        offset=(page - 1) * RULEBOOK_SEARCH_PAGE_SIZE,
+    )
+    context = {
+        "query": query,
+        "results": results[:RULEBOOK_SEARCH_PAGE_SIZE],
+        "next_page": page + 1 if len(results) > RULEBOOK_SEARCH_PAGE_SIZE else None,
+    }
+    template = "character/rulebook_search.html"
+    if request.htmx:
+        template = "character/snippets/rulebook_search_results.html"
+    return render(request, template, context)
+
+
+@require_GET
+def capability_description(request, pk: int):
+    """
+    Return the description of a capability, fetched when expanded on a sheet.
+
+    Like the rulebook it comes from, it is public, and cached for a year when
+    requested for the hash of the description it serves: a URL never gets
+    another text, whichever process or host answers it.
+    """
+    rulebook = get_rulebook()
+    capability = rulebook.get(Capability, pk)
+    if capability is None:
+        msg = "No Capability matches the given query."
+        raise Http404(msg)
+    response = render(
+        request,
+        "character/snippets/character_details/capability_description.html",
+        {"capability": capability},
+    )
+    if request.GET.get("hash") == capability.description_hash:
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=CAPABILITY_DESCRIPTION_MAX_AGE,
+            immutable=True,
+        )
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
 @login_required
 def character_create(request):
     if request.method == "POST":
@@ -30,11 +98,11 @@ def character_create(request):
         if form.is_valid():
             character = form.save(commit=False)
             character.player = request.user
-            character.recovery_points_remaining = character.recovery_points_max
-            character.luck_points_remaining = character.luck_points_max
-            character.mana_remaining = character.mana_max
-            character.health_remaining = character.health_max
+            # The maxima are only known once saved, see `reset_stats`.
+            character.luck_points_remaining = 0
+            character.health_remaining = 0
             character.save()
+            character.reset_stats()
             form.save_m2m()
             messages.success(request, f"{character.name} a été créé.")
             return redirect("character:list")
@@ -72,18 +140,20 @@ def character_delete(request, pk: int):
 
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=character_etag)
 def character_view(request, pk: int):
     character = get_object_or_404(
         Character.objects.friendly_to(request.user)
-        .select_related("player", "racial_capability", "profile", "race")
-        .prefetch_related("capabilities__path", "weapons"),
+        .select_related("player")
+        .with_rulebook(),
         pk=pk,
     )
     add_path_form = AddPathForm(character)
     context = {
         "character": character,
         "add_path_form": add_path_form,
-        "all_states": HarmfulState.objects.all(),
+        "all_states": get_rulebook().all(HarmfulState),
     }
     party_pk = request.GET.get("party")
     if party_pk:
@@ -96,7 +166,10 @@ def character_view(request, pk: int):
 
 @login_required
 def add_path(request, pk: int):
-    character = get_object_or_404(Character.objects.managed_by(request.user), pk=pk)
+    character = get_object_or_404(
+        Character.objects.managed_by(request.user).with_rulebook(),
+        pk=pk,
+    )
     form = AddPathForm(character, request.POST)
     context = {"character": character}
     if form.is_valid():
@@ -104,6 +177,7 @@ def add_path(request, pk: int):
             "other_path",
         )
         character.paths.add(path)
+        del character.capability_tree  # Built by the form, before the new path.
         context["add_path_form"] = AddPathForm(character)
     else:
         context["add_path_form"] = form
@@ -114,226 +188,246 @@ def add_path(request, pk: int):
     )
 
 
-@login_required
-def character_health_change(request, pk: int):
-    character = get_object_or_404(
-        Character.objects.managed_by(request.user).only(
-            "health_max",
-            "health_remaining",
+DEFENSE_FIELDS = ["defense"]
+INITIATIVE_FIELDS = ["initiative_misc", "modifier_dexterity", "modifier_initiative"]
+SNIPPETS = "character/snippets/character_details"
+
+
+@dataclass(frozen=True)
+class CounterDisplay:
+    """Where a counter is displayed and which fragments depend on its value."""
+
+    counter: counters.Counter
+    element_id: str
+    fragments: tuple[str, ...] = ()
+    returning: tuple[str, ...] = ()
+
+
+COUNTER_DISPLAYS = {
+    display.counter.field: display
+    for display in [
+        CounterDisplay(
+            counters.HEALTH,
+            "health-remaining",
+            fragments=(f"{SNIPPETS}/health_bar.html",),
+            returning=StatBlock.FIELDS,
         ),
-        pk=pk,
-    )
-    value = post_updated_value(
-        request,
-        character.health_remaining,
-        character.health_max,
-    )
-    character.health_remaining = value
-    character.save(update_fields=["health_remaining"])
-    response = HttpResponse(value)
-    return trigger_client_event(response, "refresh_health_bar")
+        CounterDisplay(
+            counters.MANA,
+            "mana-remaining",
+            fragments=(f"{SNIPPETS}/mana_bar.html",),
+            returning=StatBlock.FIELDS,
+        ),
+        CounterDisplay(counters.RECOVERY_POINTS, "recovery-points-remaining"),
+        CounterDisplay(counters.LUCK_POINTS, "luck-points-remaining"),
+        *(
+            CounterDisplay(
+                counter,
+                element_id,
+                fragments=(f"{SNIPPETS}/defense.html",),
+                returning=tuple(DEFENSE_FIELDS),
+            )
+            for counter, element_id in [
+                (counters.ARMOR, "armor"),
+                (counters.SHIELD, "shield"),
+                (counters.DEFENSE_MISC, "defense-misc"),
+            ]
+        ),
+        CounterDisplay(
+            counters.INITIATIVE_MISC,
+            "initiative-misc",
+            fragments=(f"{SNIPPETS}/initiative.html",),
+            returning=tuple(INITIATIVE_FIELDS),
+        ),
+    ]
+}
 
 
 @login_required
-def character_mana_change(request, pk: int):
-    character = get_object_or_404(
-        Character.objects.managed_by(request.user)
-        .only("mana_remaining", "level", "value_intelligence", "profile")
-        .select_related("profile"),
-        pk=pk,
-    )
-    value = get_updated_value(request, character.mana_remaining, character.mana_max)
-    character.mana_remaining = value
-    character.save(update_fields=["mana_remaining"])
-    response = HttpResponse(value)
-    return trigger_client_event(response, "refresh_mana_bar")
+async def character_health_change(request, pk: int):
+    action = request.POST.get("action")
+    if action in {"ko", "max"}:
+        change = action
+    else:
+        multiplier = {"positive": 1, "negative": -1}.get(action, 0)
+        change = int(request.POST.get("value")) * multiplier
+    return await _counter_change(request, pk, "health_remaining", change)
 
 
 @login_required
-def character_recovery_points_change(request, pk: int):
-    character = get_object_or_404(
-        Character.objects.managed_by(request.user).only("recovery_points_remaining"),
-        pk=pk,
-    )
-    value = get_updated_value(
-        request,
-        character.recovery_points_remaining,
-        character.recovery_points_max,
-    )
-    character.recovery_points_remaining = value
-    character.save(update_fields=["recovery_points_remaining"])
-    return HttpResponse(value)
+async def character_mana_change(request, pk: int):
+    return await _counter_change(request, pk, "mana_remaining")
 
 
 @login_required
-def character_defense_misc_change(request, pk: int):
-    character = get_object_or_404(
-        Character.objects.managed_by(request.user).only("defense_misc"),
-        pk=pk,
-    )
-    value = get_updated_value(request, character.defense_misc, float("inf"))
-    character.defense_misc = value
-    character.save(update_fields=["defense_misc"])
-    response = HttpResponse(value)
-    return trigger_client_event(response, "update_defense")
+async def character_recovery_points_change(request, pk: int):
+    return await _counter_change(request, pk, "recovery_points_remaining")
 
 
 @login_required
-def character_shield_change(request, pk: int):
-    character = get_object_or_404(
-        Character.objects.managed_by(request.user).only("shield"),
-        pk=pk,
-    )
-    value = get_updated_value(request, character.shield, float("inf"))
-    character.shield = value
-    character.save(update_fields=["shield"])
-    response = HttpResponse(value)
-    return trigger_client_event(response, "update_defense")
+async def character_defense_misc_change(request, pk: int):
+    return await _counter_change(request, pk, "defense_misc")
 
 
 @login_required
-def character_armor_change(request, pk: int):
-    character = get_object_or_404(
-        Character.objects.managed_by(request.user).only("armor"),
-        pk=pk,
-    )
-    value = get_updated_value(request, character.armor, float("inf"))
-    character.armor = value
-    character.save(update_fields=["armor"])
-    response = HttpResponse(value)
-    return trigger_client_event(response, "update_defense")
+async def character_shield_change(request, pk: int):
+    return await _counter_change(request, pk, "shield")
 
 
 @login_required
-def character_initiative_misc_change(request, pk: int):
-    character = get_object_or_404(
-        Character.objects.managed_by(request.user).only("initiative_misc"),
-        pk=pk,
-    )
-    value = get_updated_value(request, character.initiative_misc, float("inf"))
-    character.initiative_misc = value
-    character.save(update_fields=["initiative_misc"])
-    response = HttpResponse(value)
-    return trigger_client_event(response, "update_initiative")
+async def character_armor_change(request, pk: int):
+    return await _counter_change(request, pk, "armor")
 
 
 @login_required
-def character_luck_points_change(request, pk: int):
-    character = get_object_or_404(
-        Character.objects.managed_by(request.user).only(
-            "luck_points_remaining",
-            "value_charisma",
+async def character_initiative_misc_change(request, pk: int):
+    return await _counter_change(request, pk, "initiative_misc")
+
+
+@login_required
+async def character_luck_points_change(request, pk: int):
+    return await _counter_change(request, pk, "luck_points_remaining")
+
+
+@login_required
+@require_POST
+async def character_apply(request, pk: int):
+    """
+    Apply a batch of counter changes in a single statement.
+
+    The body maps counter fields to a delta, "ko" or "max", e.g.
+    `health_remaining=-3&mana_remaining=max`. Every changed value and the
+    fragments depending on it are swapped out of band.
+    """
+    try:
+        changes = {
+            COUNTER_DISPLAYS[field]: COUNTER_DISPLAYS[field].counter.parse(value)
+            for field, value in request.POST.items()
+            if field != "csrfmiddlewaretoken"
+        }
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest()
+    if not changes:
+        return HttpResponseBadRequest()
+
+    character = await _apply_counters(request, pk, changes)
+    context = {
+        "character": character,
+        "values": [
+            (display.element_id, getattr(character, display.counter.field))
+            for display in changes
+        ],
+        "fragments": list(
+            dict.fromkeys(
+                fragment for display in changes for fragment in display.fragments
+            ),
         ),
-        pk=pk,
-    )
-    value = get_updated_value(
+    }
+    response = await sync_to_async(render)(
         request,
-        character.luck_points_remaining,
-        character.luck_points_max,
+        f"{SNIPPETS}/counters_applied.html",
+        context,
     )
-    character.luck_points_remaining = value
-    character.save(update_fields=["luck_points_remaining"])
-    return HttpResponse(value)
+    return trigger_client_event(response, "refresh_tooltips", after="swap")
 
 
-def post_updated_value(
+async def _counter_change(
     request,
-    remaining_value: float,
-    max_value: float,
-) -> int:
-    action = request.POST.get("action")
-    if action == "ko":
-        return 0
-    if action == "max":
-        return int(max_value)
-
-    multiplier = 0
-    if action == "positive":
-        multiplier = 1
-    elif action == "negative":
-        multiplier = -1
-
-    form_value = int(request.POST.get("value"))
-    remaining_value += form_value * multiplier
-    remaining_value = min([max_value, remaining_value])
-    remaining_value = max([0, remaining_value])
-
-    return int(remaining_value)
+    pk: int,
+    field: str,
+    change: counters.Change | None = None,
+):
+    """Apply the change (read from `?value=` by default) and render the new value."""
+    display = COUNTER_DISPLAYS[field]
+    if change is None:
+        change = display.counter.parse(request.GET.get("value"))
+    character = await _apply_counters(request, pk, {display: change})
+    context = {
+        "value": getattr(character, field),
+        "character": character,
+        "fragments": display.fragments,
+    }
+    response = await sync_to_async(render)(
+        request,
+        f"{SNIPPETS}/counter_change.html",
+        context,
+    )
+    if display.fragments:
+        response = trigger_client_event(response, "refresh_tooltips", after="swap")
+    return response
 
 
-def get_updated_value(
+async def _apply_counters(
     request,
-    remaining_value: float,
-    max_value: float,
-) -> int:
-    form_value = request.GET.get("value")
-    if form_value == "ko":
-        remaining_value = 0
-    elif form_value == "max":
-        remaining_value = max_value
-    else:
-        form_value = int(form_value)
-        remaining_value += form_value
-        remaining_value = min([max_value, remaining_value])
-        remaining_value = max([0, remaining_value])
-    return int(remaining_value)
+    pk: int,
+    changes: dict[CounterDisplay, counters.Change],
+) -> Character:
+    """
+    Apply the changes to a character managed by the user.
+
+    Return an unsaved character holding the new values and the fields needed
+    to render the dependent fragments.
+    """
+    user = await request.auser()
+    values = await counters.aupdate_counters(
+        Character.objects.managed_by(user).filter(pk=pk),
+        {display.counter: change for display, change in changes.items()},
+        returning=list(
+            dict.fromkeys(field for display in changes for field in display.returning),
+        ),
+    )
+    if values is None:
+        msg = "No Character matches the given query."
+        raise Http404(msg)
+    await sync_to_async(events.publish_character_change)(
+        pk,
+        [display.counter.field for display in changes],
+    )
+    return Character(pk=pk, **values)
 
 
 @login_required
 def character_get_defense(request, pk: int):
     character = get_object_or_404(
-        Character.objects.managed_by(request.user).only(
-            "defense_misc",
-            "armor",
-            "shield",
-            "value_dexterity",
-        ),
+        Character.objects.managed_by(request.user).only(*DEFENSE_FIELDS),
         pk=pk,
     )
-    return HttpResponse(character.defense)
+    context = {"character": character}
+    return render(request, f"{SNIPPETS}/defense.html", context)
 
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=managed_character_etag)
 def character_get_health_bar(request, pk: int):
     character = get_object_or_404(
-        Character.objects.managed_by(request.user).only(
-            "health_max",
-            "health_remaining",
-        ),
+        Character.objects.managed_by(request.user).only(*StatBlock.FIELDS),
         pk=pk,
     )
     context = {"character": character}
-    return render(
-        request,
-        "character/snippets/character_details/health_bar.html",
-        context,
-    )
+    return render(request, f"{SNIPPETS}/health_bar.html", context)
 
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=managed_character_etag)
 def character_get_mana_bar(request, pk: int):
     character = get_object_or_404(
-        Character.objects.managed_by(request.user).select_related("profile"),
+        Character.objects.managed_by(request.user).only(*StatBlock.FIELDS),
         pk=pk,
     )
     context = {"character": character}
-    return render(
-        request,
-        "character/snippets/character_details/mana_bar.html",
-        context,
-    )
+    return render(request, f"{SNIPPETS}/mana_bar.html", context)
 
 
 @login_required
 def character_get_initiative(request, pk: int):
     character = get_object_or_404(
-        Character.objects.managed_by(request.user).only(
-            "initiative_misc",
-            "value_dexterity",
-        ),
+        Character.objects.managed_by(request.user).only(*INITIATIVE_FIELDS),
         pk=pk,
     )
-    return HttpResponse(modifier(character.modifier_initiative))
+    context = {"character": character}
+    return render(request, f"{SNIPPETS}/initiative.html", context)
 
 
 @login_required
@@ -350,7 +444,7 @@ def character_gm_notes_change(request, pk: int):
 def character_equipment_change(request, pk: int):
     field = "equipment"
     character = get_object_or_404(
-        Character.objects.managed_by(request.user).only(field),
+        Character.objects.managed_by(request.user).only(*EquipmentForm.Meta.fields),
         pk=pk,
     )
     context = {"character": character}
@@ -362,7 +456,7 @@ def character_equipment_change(request, pk: int):
         )
     form = EquipmentForm(request.POST, instance=character)
     if form.is_valid():
-        form.save()
+        form.instance.save(update_fields=EquipmentForm.Meta.fields)
         return render(
             request,
             f"character/snippets/character_details/{field}_display.html",
@@ -405,12 +499,14 @@ def update_text_field(request, pk, field):
 @login_required
 def add_next_in_path(request, character_pk: int, path_pk: int):
     character = get_object_or_404(
-        Character.objects.managed_by(request.user),
+        Character.objects.managed_by(request.user).with_rulebook(),
         pk=character_pk,
     )
-    path = get_object_or_404(Path, pk=path_pk)
-    capability = path.get_next_capability(character)
-    character.capabilities.add(capability)
+    progress = character.get_capability_tree().get(path_pk)
+    if progress is None or not progress.has_next_capability:
+        msg = "No next capability in this path."
+        raise Http404(msg)
+    character.capabilities.add(progress.next_capability)
     context = {
         "character": character,
         "add_path_form": AddPathForm(character),
@@ -425,24 +521,15 @@ def add_next_in_path(request, character_pk: int, path_pk: int):
 @login_required
 def remove_last_in_path(request, character_pk: int, path_pk: int):
     character = get_object_or_404(
-        Character.objects.managed_by(request.user),
+        Character.objects.managed_by(request.user).with_rulebook(),
         pk=character_pk,
     )
-    capabilities = character.capabilities.filter(path_id=path_pk).values_list(
-        "rank",
-        flat=True,
-    )
-    if len(capabilities) == 0:
+    progress = character.get_capability_tree().get(path_pk)
+    last_capability = progress and progress.last_known_capability
+    if last_capability is None:
         character.paths.remove(path_pk)
     else:
-        last_rank = max(
-            character.capabilities.filter(path_id=path_pk).values_list(
-                "rank",
-                flat=True,
-            ),
-        )
-        cap = Capability.objects.get(path_id=path_pk, rank=last_rank)
-        character.capabilities.remove(cap)
+        character.capabilities.remove(last_capability)
     context = {
         "character": character,
         "add_path_form": AddPathForm(character),
@@ -455,32 +542,39 @@ def remove_last_in_path(request, character_pk: int, path_pk: int):
 
 
 @login_required
-def remove_state(request, pk: int, state_pk: int):
-    character: Character = get_object_or_404(
-        Character.objects.managed_by(request.user),
-        pk=pk,
-    )
-    state = get_object_or_404(HarmfulState, pk=state_pk)
-    character.states.remove(state)
-    context = {"character": character, "all_states": HarmfulState.objects.all()}
-    response = render(
-        request,
-        "character/snippets/character_details/states.html",
-        context,
-    )
-    return trigger_client_event(response, "refresh_tooltips", after="swap")
+async def remove_state(request, pk: int, state_pk: int):
+    return await _change_state(request, pk, state_pk, add=False)
 
 
 @login_required
-def add_state(request, pk: int, state_pk: int):
-    character: Character = get_object_or_404(
-        Character.objects.managed_by(request.user),
+async def add_state(request, pk: int, state_pk: int):
+    return await _change_state(request, pk, state_pk, add=True)
+
+
+async def _change_state(request, pk: int, state_pk: int, *, add: bool):
+    """Add or remove a state, then render the states without further queries."""
+    user = await request.auser()
+    character: Character = await aget_object_or_404(
+        Character.objects.managed_by(user),
         pk=pk,
     )
-    state = get_object_or_404(HarmfulState, pk=state_pk)
-    character.states.add(state)
-    context = {"character": character, "all_states": HarmfulState.objects.all()}
-    response = render(
+    rulebook = await sync_to_async(get_rulebook)()
+    state = rulebook.get(HarmfulState, state_pk)
+    if state is None:
+        msg = "No HarmfulState matches the given query."
+        raise Http404(msg)
+    change = character.states.add if add else character.states.remove
+    await writer.awrite(change, state)
+    await sync_to_async(events.publish_character_change)(pk, ["states"])
+    await character.arefresh_from_db(fields=["version"])
+    await aprefetch_related_objects([character], "states")
+    await sync_to_async(get_character_permissions)(user)
+    context = {
+        "character": character,
+        "all_states": rulebook.all(HarmfulState),
+        "user": user,
+    }
+    response = await sync_to_async(render)(
         request,
         "character/snippets/character_details/states.html",
         context,
@@ -490,13 +584,11 @@ def add_state(request, pk: int, state_pk: int):
 
 @login_required
 def reset_stats(request, pk: int):
-    character: Character = get_object_or_404(
-        Character.objects.managed_by(request.user),
-        pk=pk,
-    )
+    characters = Character.objects.managed_by(request.user).filter(pk=pk)
+    character: Character = get_object_or_404(characters)
     context = {"character": character}
     if request.method == "POST":
-        character.reset_stats()
+        characters.reset_stats()
         messages.success(request, f"Les stats de {character} ont été réinitialisées.")
         return redirect(character)
     return render(request, "character/character_reset_stats.html", context)
@@ -539,20 +631,20 @@ def pet_change(request, pk: int):
 @login_required
 def pet_health_change(request, pk: int):
     potential_owners = Character.objects.managed_by(request.user)
-    pet = get_object_or_404(
-        Pet.objects.filter(owner__in=potential_owners).only(
-            "health_max",
-            "health_remaining",
-        ),
-        pk=pk,
-    )
-    value = get_updated_value(request, pet.health_remaining, pet.health_max)
-    pet.health_remaining = value
-    pet.save(update_fields=["health_remaining"])
+    values = counters.update_counters(
+        Pet.objects.filter(owner__in=potential_owners, pk=pk),
+        {counters.PET_HEALTH: counters.PET_HEALTH.parse(request.GET.get("value"))},
+        returning=["health_max"],
+    )
+    if values is None:
+        msg = "No Pet matches the given query."
+        raise Http404(msg)
+    # Pets are shown on the sheet of their owner.
+    Character.objects.filter(pets=pk).touch()
     return render(
         request,
         "character/snippets/character_details/pet_health_bar.html",
-        {"pet": pet},
+        {"pet": Pet(pk=pk, **values)},
     )
 
 
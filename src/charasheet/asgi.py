@@ -0,0 +1,17 @@
+"""
+ASGI config for charasheet project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Needed by the streaming endpoints, such as the live events of parties.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "charasheet.settings")
+
+application = get_asgi_application()
@@ -0,0 +1,45 @@
+"""
+Gunicorn configuration, used with `gunicorn -c python:charasheet.gunicorn_conf`.
+
+The application is loaded and warmed up once in the master process, then the
+heap is frozen before the workers are forked: the pages holding Django, the
+compiled templates and the rulebook stay shared copy-on-write between them.
+
+With `GUNICORN_ASGI=true`, `charasheet.asgi` is served by uvicorn workers
+instead of the threaded WSGI workers. Each worker then serves many requests
+concurrently on its event loop, including the never ending streams of the
+party events.
+"""
+
+import gc
+import os
+
+asgi = os.getenv("GUNICORN_ASGI", "false").lower() == "true"
+if asgi:
+    wsgi_app = "charasheet.asgi"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "charasheet.wsgi"
+    worker_class = "gthread"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_tmp_dir = "/dev/shm"  # noqa: S108
+graceful_timeout = 5
+errorlog = "-"
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+if preload_app:
+    # Collections before the freeze would touch, and thus copy, shared pages.
+    gc.disable()
+
+
+def when_ready(server) -> None:  # noqa: ARG001
+    if preload_app:
+        from charasheet.warmup import warmup
+
+        warmup()
+        gc.freeze()
+        # Only the frozen startup heap is exempt: the master and the workers
+        # forked from it collect the objects they allocate later.
+        gc.enable()
@@ -1,5 +1,6 @@
 import logging
 import os
+import tempfile
 from pathlib import Path
 
 import environ
@@ -23,6 +24,20 @@ env = environ.Env(
     MAILGUN_API_KEY=(str, ""),
     MAILGUN_SENDER_DOMAIN=(str, ""),
     CSRF_TRUSTED_ORIGINS=(list, ["http://localhost:8000"]),
+    RULEBOOK_GENERATION_FILE=(
+        Path,
+        Path(tempfile.gettempdir()) / "charasheet-rulebook-generation",
+    ),
+    PARTY_EVENTS_DATABASE=(str, ""),
+    CACHE_LOCATION=(Path, Path(tempfile.gettempdir()) / "charasheet-cache"),
+    CACHE_SHARED=(bool, True),
+    SQLITE_PRODUCTION=(bool, False),
+    SQLITE_WRITE_QUEUE=(bool, False),
+    SQLITE_WRITE_LOCK_FILE=(
+        Path,
+        Path(tempfile.gettempdir()) / "charasheet-write.lock",
+    ),
+    MEDIA_ACCEL_REDIRECT=(str, ""),
 )
 
 env_file = os.getenv("ENV_FILE", None)
@@ -127,19 +142,55 @@ WSGI_APPLICATION = "charasheet.wsgi.application"
 
 
 DATABASES = {"default": env.db()}
+if (
+    env("SQLITE_PRODUCTION")
+    and DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3"
+):
+    # WAL, immediate transactions and tuned pragmas, see charasheet.sqlite3.
+    DATABASES["default"]["ENGINE"] = "charasheet.sqlite3"
+    # Each thread keeps its connection, and thus its page cache and mmap.
+    # Under ASGI, sync code runs on a new thread per request: opt out with
+    # `?conn_max_age=0` in the DATABASE_URL.
+    DATABASES["default"].setdefault("CONN_MAX_AGE", None)
+    DATABASES["default"].setdefault("CONN_HEALTH_CHECKS", True)
 
 ############################################################
 # Cache configuration
 
 CACHES = {
+    # LRU in each process, in front of files shared by the workers, best put
+    # on /dev/shm. See common.cache.
     "default": {
-        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "BACKEND": "common.cache.TieredCache",
+        "LOCATION": str(env("CACHE_LOCATION")),
+        "OPTIONS": {"MAX_ENTRIES": 1000, "SHARED": env("CACHE_SHARED")},
+    },
+    # Used by the {% cache %} template tag. Fragments are keyed by the version
+    # of what they display and never go stale, see character.fragments.
+    "template_fragments": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "template_fragments",
+        "TIMEOUT": None,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
     },
 }
 
 SOLO_CACHE = "default"
 SOLO_CACHE_TIMEOUT = 60 * 10  # 10 mins
 
+# Touched on every rulebook change so that all workers reload their copy,
+# see character.rulebook.
+RULEBOOK_GENERATION_FILE = env("RULEBOOK_GENERATION_FILE")
+
+# SQLite file relaying the live party events between the worker processes,
+# see party.events. When empty, events only reach the publishing process.
+PARTY_EVENTS_DATABASE = env("PARTY_EVENTS_DATABASE")
+
+# Run the hot writes of each process in a single writer thread, the processes
+# taking turns through a lock on the file, see common.writer.
+SQLITE_WRITE_QUEUE = env("SQLITE_WRITE_QUEUE")
+SQLITE_WRITE_LOCK_FILE = env("SQLITE_WRITE_LOCK_FILE")
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -175,7 +226,7 @@ APP_DATA = env("APP_DATA")
 STATIC_URL = "/static/"
 STATIC_ROOT = env("STATIC_ROOT")
 STORAGES = {
-    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "default": {"BACKEND": "common.media.HashedMediaStorage"},
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
     },
@@ -184,6 +235,9 @@ STORAGES = {
 # Medias
 MEDIA_URL = "/media/"
 MEDIA_ROOT = APP_DATA / "media"
+# Internal location of MEDIA_ROOT on the proxy in front, which then sends the
+# files, see common.media. When empty, the files are sent by the workers.
+MEDIA_ACCEL_REDIRECT = env("MEDIA_ACCEL_REDIRECT")
 
 LOGGING = {
     "version": 1,
@@ -227,7 +281,13 @@ DEBUG_TOOLBAR_CONFIG = {
 }
 
 # Authentication configuration.
-AUTHENTICATION_BACKENDS = ("django.contrib.auth.backends.ModelBackend",)
+AUTHENTICATION_BACKENDS = (
+    "common.backends.CachedModelBackend",
+    # Sessions opened before the users were cached.
+    "django.contrib.auth.backends.ModelBackend",
+)
+# Sessions are read from the cache, and only written through to the database.
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
 
 LOGOUT_REDIRECT_URL = "/"
 LOGIN_REDIRECT_URL = "/"
@@ -0,0 +1,41 @@
+"""
+SQLite backend tuned for serving from several workers, see `SQLITE_PRODUCTION`.
+
+Every new connection is configured with the `pragmas` below: in WAL mode the
+readers no longer wait for a writer, and the writers wait for each other
+instead of failing with `database is locked`. Transactions start with
+`BEGIN IMMEDIATE`, so that a transaction reading before writing takes the
+write lock upfront rather than failing to upgrade its read lock.
+
+The pragmas can be overridden with `OPTIONS["pragmas"]`, and the transaction
+mode with `OPTIONS["transaction_mode"]`.
+"""
+
+from django.db.backends.sqlite3 import base
+
+MIB = 1024 * 1024
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    pragmas = {
+        "journal_mode": "WAL",
+        # Durable once checkpointed, never corrupted in WAL mode.
+        "synchronous": "NORMAL",
+        "busy_timeout": 10_000,  # ms
+        "mmap_size": 256 * MIB,
+        "cache_size": -32 * MIB // 1024,  # KiB, per connection
+        "temp_store": "MEMORY",
+    }
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.connection_pragmas = {**self.pragmas, **kwargs.pop("pragmas", {})}
+        if "transaction_mode" not in self.settings_dict["OPTIONS"]:
+            self.transaction_mode = "IMMEDIATE"
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.connection_pragmas.items():
+            connection.execute(f"PRAGMA {name} = {value}")
+        return connection
@@ -15,12 +15,12 @@ Including another URLconf
 """
 
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.auth import logout
 from django.urls import include, path
 from django_registration.backends.activation.views import RegistrationView
 
+from common import media
 from common.forms import RegistrationForm
 from common.views import hello_world
 
@@ -37,10 +37,9 @@ urlpatterns = [
     path("", hello_world, name="hello_world"),
     path("character/", include("character.urls", namespace="character")),
     path("party/", include("party.urls", namespace="party")),
+    path(f"{settings.MEDIA_URL.strip('/')}/<path:path>", media.serve, name="media"),
 ]
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-
 if settings.DEBUG_TOOLBAR:
     urlpatterns.insert(0, path("__debug__/", include("debug_toolbar.urls")))
 
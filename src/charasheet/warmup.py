@@ -0,0 +1,65 @@
+"""
+Warm a process up before it serves its first request.
+
+Run by the gunicorn master before forking its workers (see
+`charasheet.gunicorn_conf`), so that every worker inherits imported modules,
+compiled templates and the rulebook instead of building its own copy.
+"""
+
+import logging
+from pathlib import Path
+
+from django.apps import apps
+from django.db import DatabaseError, connections
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+HOT_TEMPLATES = [
+    "common/base.html",
+    "character/character_details.html",
+    "character/characters_list.html",
+    "party/parties_list.html",
+    "party/party_details.html",
+]
+# Every template of these directories is compiled as well, including
+# character/snippets/characters_list/character_card.html.
+HOT_TEMPLATE_DIRS = [
+    "character/snippets",
+    "party/snippets",
+]
+
+
+def warmup() -> None:
+    """Import the views, compile the hot templates and load the rulebook."""
+    # Resolving the URLconf imports every view and form module.
+    get_resolver().url_patterns  # noqa: B018
+    for name in hot_templates():
+        get_template(name)
+    load_rulebook()
+
+
+def hot_templates() -> list[str]:
+    names = list(HOT_TEMPLATES)
+    for app_config in apps.get_app_configs():
+        templates = Path(app_config.path) / "templates"
+        for directory in HOT_TEMPLATE_DIRS:
+            names += sorted(
+                path.relative_to(templates).as_posix()
+                for path in (templates / directory).rglob("*.html")
+            )
+    return names
+
+
+def load_rulebook() -> None:
+    from character.rulebook import get_rulebook
+
+    try:
+        get_rulebook()
+    except DatabaseError:
+        # The database may not be migrated yet, workers will load it lazily.
+        logger.warning("Couldn't load the rulebook during warmup.", exc_info=True)
+    finally:
+        # Connections must not be shared with the forked workers.
+        connections.close_all()
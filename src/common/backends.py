@@ -0,0 +1,51 @@
+"""
+Authentication backend reading the user of a session from the cache.
+
+Every authenticated request loads its user to check the session. The users
+are kept in the default cache instead, whose local tier answers without any
+I/O, see `common.cache`. The session auth hash is still checked against the
+cached user by `django.contrib.auth.get_user`: saving or deleting a user drops
+its cache entry in every worker, so a password change still ends the other
+sessions right away.
+"""
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+USER_CACHE_TIMEOUT = 5 * 60
+
+
+def user_cache_key(pk) -> str:
+    return f"auth-user:{pk}"
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user
+
+    async def aget_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = await cache.aget(key)
+        if user is None:
+            user = await super().aget_user(user_id)
+            if user is not None:
+                await cache.aset(key, user, USER_CACHE_TIMEOUT)
+        return user
+
+
+def _on_user_change(instance, **kwargs) -> None:  # noqa: ARG001
+    cache.delete(user_cache_key(instance.pk))
+
+
+def connect_signals() -> None:
+    user_model = get_user_model()
+    post_save.connect(_on_user_change, sender=user_model)
+    post_delete.connect(_on_user_change, sender=user_model)
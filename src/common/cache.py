@@ -0,0 +1,230 @@
+"""
+Two-tier cache: an LRU in each process, in front of files shared by the host.
+
+Values are read from an LRU dictionary local to the process, limited to
+`MAX_ENTRIES` entries kept at most `LOCAL_TIMEOUT` seconds. A value missing
+from it is read from the shared tier, a `FileBasedCache` in `LOCATION` that is
+best put on `/dev/shm`, holding about `SHARED_MAX_ENTRIES` entries. With
+`SHARED` set to False, each process only has its local tier.
+
+Like the rulebook's (see `character.rulebook`), the generation of the cache is
+the modification time of a file in `LOCATION`. Every write appends the keys
+written to a log in `LOCATION`, then bumps the generation. A process notices a
+new generation with a single `stat()` per read, and drops from its local tier
+the keys logged since: a value written by a worker, or deleted, is never read
+stale from the local tier of another, and the other values stay there. Once
+the log is larger than `LOG_MAX_BYTES`, or when the cache is cleared, a new
+log is started, and every process drops its whole local tier.
+
+Hits and misses of each tier are counted in `stats`, per process.
+"""
+
+import fcntl
+import os
+import pickle
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+
+MISSING = object()
+# Writes to the shared tier counting its entries, on average.
+CULL_EVERY = 64
+LOG_MAX_BYTES = 1024 * 1024
+
+
+class SharedTier(FileBasedCache):
+    def _cull(self):
+        # Counting the entries lists the directory, by far the cost of a write.
+        if random.randrange(CULL_EVERY) == 0:  # noqa: S311
+            super()._cull()
+
+
+class TieredCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location: str, params: dict) -> None:
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._local_timeout = options.get("LOCAL_TIMEOUT", 60)
+        self._shared = None
+        if options.get("SHARED", True):
+            self._shared = SharedTier(
+                location,
+                {
+                    "KEY_FUNCTION": lambda key, key_prefix, version: key,  # noqa: ARG005
+                    "OPTIONS": {
+                        "MAX_ENTRIES": options.get("SHARED_MAX_ENTRIES", 10_000),
+                        "CULL_FREQUENCY": self._cull_frequency,
+                    },
+                },
+            )
+        directory = Path(location)
+        directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self._generation_file = directory / "generation"
+        self._generation_file.touch()
+        self._generation = self._read_generation()
+        self._log_file = directory / "invalidations"
+        self._log_file.touch()
+        log = self._log_file.stat()
+        self._log_inode, self._log_offset = log.st_ino, log.st_size
+        self._local: OrderedDict[str, tuple[bytes, float | None]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = dict.fromkeys(
+            ["local_hits", "shared_hits", "misses", "invalidations"],
+            0,
+        )
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        pickled = self._get(key)
+        if pickled is MISSING:
+            return default
+        return pickle.loads(pickled)  # noqa: S301
+
+    def _get(self, key: str) -> bytes | object:
+        generation = self._sync_generation()
+        with self._lock:
+            pickled, expiry = self._local.get(key, (MISSING, None))
+            if pickled is not MISSING:
+                if expiry is None or expiry > time.time():
+                    self._local.move_to_end(key)
+                    self.stats["local_hits"] += 1
+                    return pickled
+                del self._local[key]
+        if self._shared is None:
+            self.stats["misses"] += 1
+            return MISSING
+        pickled, expiry = self._shared.get(key, (MISSING, None))
+        if pickled is MISSING or (expiry is not None and expiry <= time.time()):
+            self.stats["misses"] += 1
+            return MISSING
+        self.stats["shared_hits"] += 1
+        with self._lock:
+            # Unless written meanwhile, the value is still the current one.
+            if generation == self._generation:
+                self._set_local(key, pickled, expiry)
+        return pickled
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        expiry = self.get_backend_timeout(timeout)
+        with self._writing(key):
+            self._set_both(key, pickled, expiry)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self._get(self.make_and_validate_key(key, version=version)) is MISSING:
+            self.set(key, value, timeout, version)
+            return True
+        return False
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        pickled = self._get(key)
+        if pickled is MISSING:
+            return False
+        expiry = self.get_backend_timeout(timeout)
+        with self._writing(key):
+            self._set_both(key, pickled, expiry)
+        return True
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._writing(key):
+            deleted = self._local.pop(key, None) is not None
+            if self._shared is not None:
+                deleted = self._shared.delete(key)
+        return deleted
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._get(key) is not MISSING
+
+    def clear(self):
+        with self._writing(restart_log=True):
+            self._local.clear()
+            if self._shared is not None:
+                self._shared.clear()
+
+    def _set_both(self, key: str, pickled: bytes, expiry: float | None) -> None:
+        if self._shared is not None:
+            timeout = None if expiry is None else expiry - time.time()
+            self._shared.set(key, (pickled, expiry), timeout)
+        self._set_local(key, pickled, expiry)
+
+    def _set_local(self, key: str, pickled: bytes, expiry: float | None) -> None:
+        """Keep the value in the local tier, the lock being held."""
+        local_expiry = time.time() + self._local_timeout
+        self._local[key] = (pickled, min(expiry or local_expiry, local_expiry))
+        self._local.move_to_end(key)
+        while len(self._local) > self._max_entries:
+            self._local.popitem(last=False)
+
+    @contextmanager
+    def _writing(self, *keys: str, restart_log: bool = False):
+        """Write, then log the keys and bump the generation for the others."""
+        with (
+            self._lock,
+            self._generation_file.open("r") as generation_file,
+        ):
+            fcntl.flock(generation_file, fcntl.LOCK_EX)
+            try:
+                if self._read_generation() != self._generation:
+                    self._invalidate()
+                yield
+                self._log(keys, restart=restart_log)
+                now = max(time.time_ns(), self._read_generation() + 1)
+                os.utime(self._generation_file, ns=(now, now))
+                self._generation = self._read_generation()
+            finally:
+                fcntl.flock(generation_file, fcntl.LOCK_UN)
+
+    def _sync_generation(self) -> int:
+        generation = self._read_generation()
+        if generation != self._generation:
+            with self._lock:
+                if generation != self._generation:
+                    self._invalidate()
+                    self._generation = generation
+        return generation
+
+    def _invalidate(self) -> None:
+        """Drop the keys logged by the other processes, the lock being held."""
+        with self._log_file.open("rb") as log:
+            inode = os.fstat(log.fileno()).st_ino
+            if inode != self._log_inode:
+                # A new log was started: every key may have changed.
+                self.stats["invalidations"] += len(self._local)
+                self._local.clear()
+                self._log_inode, self._log_offset = inode, 0
+            log.seek(self._log_offset)
+            logged = log.read()
+        # A line being appended meanwhile is read on the next bump.
+        logged = logged[: logged.rfind(b"\n") + 1]
+        self._log_offset += len(logged)
+        for key in logged.decode().splitlines():
+            if self._local.pop(key, None) is not None:
+                self.stats["invalidations"] += 1
+
+    def _log(self, keys: tuple[str, ...], *, restart: bool) -> None:
+        """Log the keys written, the generation file being locked."""
+        # Keys are warned against holding control characters, see validate_key.
+        lines = "".join(f"{key}\n" for key in keys).encode()
+        if restart or self._log_offset + len(lines) > LOG_MAX_BYTES:
+            new_log = self._log_file.with_name(f"{self._log_file.name}.new")
+            new_log.write_bytes(b"")
+            new_log.replace(self._log_file)
+        with self._log_file.open("ab") as log:
+            log.write(lines)
+            log.flush()
+            stat = os.fstat(log.fileno())
+        self._log_inode, self._log_offset = stat.st_ino, stat.st_size
+
+    def _read_generation(self) -> int:
+        return self._generation_file.stat().st_mtime_ns
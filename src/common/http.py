@@ -0,0 +1,26 @@
+"""Parsing of the values of query strings and forms."""
+
+# Largest integer SQLite stores, and thus the largest primary key.
+MAX_INTEGER = 2**63 - 1
+MAX_DIGITS = len(str(MAX_INTEGER))
+# Pages beyond, at any page size, would overflow the OFFSET of the query.
+MAX_PAGE = 2**31
+
+
+def parse_positive_int(value: str | None, maximum: int = MAX_INTEGER) -> int | None:
+    """Return the ASCII digits as an integer in [1, maximum], None otherwise."""
+    # `isdigit()` accepts "²", and long strings are refused by `int()`.
+    if (
+        not value
+        or not value.isascii()
+        or not value.isdecimal()
+        or len(value) > MAX_DIGITS
+    ):
+        return None
+    number = int(value)
+    return number if 0 < number <= maximum else None
+
+
+def get_page(request) -> int:
+    """Return the page number from `?page=`, 1 when missing or invalid."""
+    return parse_positive_int(request.GET.get("page"), maximum=MAX_PAGE) or 1
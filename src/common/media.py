@@ -0,0 +1,203 @@
+"""
+Serve the uploaded media in production, like WhiteNoise does the static files.
+
+URLs of the media carry a hash of their content, `frodo.small.1a2b3c4d5e6f.webp`
+for `frodo.small.webp`, see `HashedMediaStorage`. A file served for the hash
+of its current content never changes: it is cached for a year, as immutable.
+Other URLs, without a hash or with an outdated one, are revalidated with the
+ETag, which is the hash.
+
+`serve` answers `If-None-Match` and `If-Modified-Since`, and a single byte
+range. Files are sent as a `FileResponse`, which gunicorn sends with
+`sendfile()`: the content never goes through Python. With
+`MEDIA_ACCEL_REDIRECT`, the file is sent by the proxy in front instead, with
+an `X-Accel-Redirect` to this internal location of `MEDIA_ROOT`, for instance
+with nginx:
+
+    location /internal-media/ {
+        internal;
+        alias /app/data/media/;
+    }
+
+The hashes are computed once per process, and again when the modification
+time or the size of a file changes.
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+from http import HTTPStatus
+from pathlib import PurePosixPath
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+HASH_LENGTH = 12
+HASHED_NAME = re.compile(
+    rf"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{{{HASH_LENGTH}}})(?P<suffix>\.[^./]+)?$",
+)
+RANGE = re.compile(r"^bytes=(?P<start>\d*)-(?P<end>\d*)$")
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+BLOCK_SIZE = 64 * 1024
+
+# Path of each file, with the modification time, size and hash of its content.
+_hashes: dict[str, tuple[int, int, str]] = {}
+
+
+class HashedMediaStorage(FileSystemStorage):
+    def url(self, name):
+        url = super().url(name)
+        file_hash = content_hash(self, name)
+        if file_hash is None:
+            return url
+        return hashed_name(url, file_hash)
+
+
+def hashed_name(name: str, file_hash: str) -> str:
+    path = PurePosixPath(name)
+    return str(path.with_name(f"{path.stem}.{file_hash}{path.suffix}"))
+
+
+def content_hash(storage: FileSystemStorage, name: str) -> str | None:
+    """Return the hash of the content of the file, None if there is none."""
+    try:
+        path = storage.path(name)
+        stat = os.stat(path)  # noqa: PTH116
+    except (OSError, SuspiciousFileOperation):
+        return None
+    cached = _hashes.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    file_hash = hashlib.sha256()
+    try:
+        with open(path, "rb") as file:  # noqa: PTH123
+            while chunk := file.read(BLOCK_SIZE):
+                file_hash.update(chunk)
+    except OSError:
+        return None
+    digest = file_hash.hexdigest()[:HASH_LENGTH]
+    _hashes[path] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+class FileRange:
+    """Part of a file, read from its current position, see `serve`."""
+
+    def __init__(self, file, length: int) -> None:
+        self.file = file
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        # Sent by gunicorn from the position of the file, for `Content-Length`.
+        return self.file.fileno()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+@require_safe
+def serve(request, path: str):
+    """Serve a file of `MEDIA_ROOT`, by its name or its hashed name."""
+    storage = default_storage
+    name, requested_hash = path, None
+    match = HASHED_NAME.match(PurePosixPath(path).name)
+    if match is not None:
+        unhashed = str(
+            PurePosixPath(path).with_name(match["stem"] + (match["suffix"] or "")),
+        )
+        if content_hash(storage, unhashed) is not None:
+            name, requested_hash = unhashed, match["hash"]
+    file_hash = content_hash(storage, name)
+    if file_hash is None:
+        msg = "No media matches the given query."
+        raise Http404(msg)
+    file_path = storage.path(name)
+    stat = os.stat(file_path)  # noqa: PTH116
+    etag = f'"{file_hash}"'
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(stat.st_mtime),
+    )
+    if response is None:
+        response = _file_response(request, name, file_path, stat.st_size, etag)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    if requested_hash == file_hash:
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=IMMUTABLE_MAX_AGE,
+            immutable=True,
+        )
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def _file_response(request, name: str, file_path: str, size: int, etag: str):
+    content_type, encoding = mimetypes.guess_type(name)
+    if content_type is None or encoding is not None:
+        # Compressed files are sent as they are, not to be decompressed.
+        content_type = "application/octet-stream"
+    if settings.MEDIA_ACCEL_REDIRECT:
+        # The proxy sends the file and answers the ranges, keeping our headers.
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_REDIRECT + quote(name)
+        return response
+    start, end = 0, size - 1
+    byte_range = _requested_range(request, size, etag)
+    if byte_range == "unsatisfiable":
+        response = HttpResponse(status=HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+    if byte_range is not None:
+        start, end = byte_range
+    length = end - start + 1
+    if request.method == "HEAD":
+        response = HttpResponse(content_type=content_type)
+    else:
+        file = open(file_path, "rb")  # noqa: PTH123, SIM115
+        file.seek(start)
+        response = FileResponse(FileRange(file, length), content_type=content_type)
+        response.block_size = BLOCK_SIZE
+    if byte_range is not None:
+        response.status_code = HTTPStatus.PARTIAL_CONTENT
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Content-Length"] = str(length)
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def _requested_range(request, size: int, etag: str):
+    """Return the single byte range requested, if any, or "unsatisfiable"."""
+    header = request.headers.get("Range")
+    if header is None or request.headers.get("If-Range", etag) != etag:
+        return None
+    match = RANGE.match(header.strip())
+    # Several ranges are not supported: the whole file is sent instead.
+    if match is None or not (match["start"] or match["end"]):
+        return None
+    if not match["start"]:
+        # The last bytes of the file.
+        start, end = max(0, size - int(match["end"])), size - 1
+    else:
+        start = int(match["start"])
+        end = min(int(match["end"]), size - 1) if match["end"] else size - 1
+    if start >= size or start > end or size == 0:
+        return "unsatisfiable"
+    return start, end
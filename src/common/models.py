@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import F
 
 
 class User(AbstractUser):
@@ -37,3 +38,39 @@ class DocumentedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class VersionedQuerySet(models.QuerySet):
+    def update(self, **kwargs) -> int:
+        """Update the rows and bump their version, see `VersionedModel`."""
+        kwargs.setdefault("version", F("version") + 1)
+        return super().update(**kwargs)
+
+    def touch(self) -> int:
+        """Bump the version of the rows, e.g. after a change of related rows."""
+        return self.update()
+
+
+class VersionedModel(models.Model):
+    """
+    Model whose version is bumped on every write.
+
+    Rendered fragments and ETags of a row are derived from its version, so
+    writes bypassing `save()` must go through `VersionedQuerySet.update()` or
+    bump the version themselves.
+    """
+
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs) -> None:
+        if not self._state.adding:
+            self.version = F("version") + 1
+            if (update_fields := kwargs.get("update_fields")) is not None:
+                kwargs["update_fields"] = {*update_fields, "version"}
+        super().save(*args, **kwargs)
+        if not isinstance(self.version, int):
+            # Deferred: read back from the database only if it is needed.
+            del self.version
@@ -0,0 +1,57 @@
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import reverse
+from model_bakery import baker
+
+from common.backends import CachedModelBackend
+from common.models import User
+
+
+@pytest.mark.django_db
+def test_user_is_cached(django_assert_num_queries):
+    user = baker.make(User)
+    backend = CachedModelBackend()
+    backend.get_user(user.pk)
+
+    with django_assert_num_queries(0):
+        assert backend.get_user(user.pk) == user
+        assert async_to_sync(backend.aget_user)(user.pk) == user
+
+
+@pytest.mark.django_db
+def test_missing_and_inactive_users_are_not_cached():
+    user = baker.make(User, is_active=False)
+    backend = CachedModelBackend()
+
+    assert backend.get_user(user.pk) is None
+    assert backend.get_user(user.pk + 1) is None
+    user.is_active = True
+    user.save()
+    assert backend.get_user(user.pk) == user
+
+
+@pytest.mark.django_db
+def test_saved_user_is_reloaded():
+    user = baker.make(User, first_name="Bilbo")
+    backend = CachedModelBackend()
+    backend.get_user(user.pk)
+
+    user.first_name = "Frodo"
+    user.save()
+
+    assert backend.get_user(user.pk).first_name == "Frodo"
+
+
+@pytest.mark.django_db
+def test_password_change_ends_other_sessions(client):
+    user = User.objects.create_user("player", password="old")
+    client.force_login(user)
+    url = reverse("character:list")
+    assert client.get(url).status_code == HTTPStatus.OK
+
+    user.set_password("new")
+    user.save()
+
+    assert client.get(url).status_code == HTTPStatus.FOUND
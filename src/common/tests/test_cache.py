@@ -0,0 +1,145 @@
+import pytest
+
+from common.cache import TieredCache
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    def make(**options) -> TieredCache:
+        return TieredCache(str(tmp_path / "cache"), {"OPTIONS": options})
+
+    return make
+
+
+def test_get_set_delete(make_cache):
+    cache = make_cache()
+
+    assert cache.get("key", "default") == "default"
+    cache.set("key", {"value": 1})
+    assert cache.get("key") == {"value": 1}
+    assert cache.add("key", "other") is False
+    assert cache.add("counter", 1) is True
+    assert cache.incr("counter", 2) == 3
+    assert cache.delete("key") is True
+    assert not cache.has_key("key")
+    assert cache.stats == {
+        "local_hits": 3,
+        "shared_hits": 0,
+        "misses": 3,
+        "invalidations": 0,
+    }
+
+
+def test_values_are_copies(make_cache):
+    cache = make_cache()
+    value = {"items": [1]}
+    cache.set("key", value)
+
+    value["items"].append(2)
+    cache.get("key")["items"].append(3)
+
+    assert cache.get("key") == {"items": [1]}
+
+
+def test_values_are_shared_between_processes(make_cache):
+    worker, other_worker = make_cache(), make_cache()
+
+    worker.set("key", "value")
+
+    assert other_worker.get("key") == "value"
+    assert other_worker.get("key") == "value"
+    assert other_worker.stats["shared_hits"] == 1
+    assert other_worker.stats["local_hits"] == 1
+
+
+def test_writes_invalidate_local_tier_of_other_processes(make_cache):
+    worker, other_worker = make_cache(), make_cache()
+    worker.set("key", "value")
+    assert other_worker.get("key") == "value"
+
+    worker.set("key", "new value")
+    assert other_worker.get("key") == "new value"
+    worker.delete("key")
+    assert other_worker.get("key") is None
+
+    assert other_worker.stats["invalidations"] == 2
+
+
+def test_writes_only_invalidate_the_keys_written(make_cache):
+    worker, other_worker = make_cache(), make_cache()
+    worker.set("key", "value")
+    assert other_worker.get("key") == "value"
+
+    worker.set("other_key", "value")
+    worker.delete("other_key")
+
+    assert other_worker.get("key") == "value"
+    assert other_worker.stats["local_hits"] == 1
+    assert other_worker.stats["invalidations"] == 0
+
+
+def test_full_log_invalidates_whole_local_tier(make_cache, monkeypatch):
+    monkeypatch.setattr("common.cache.LOG_MAX_BYTES", 10)
+    worker, other_worker = make_cache(), make_cache()
+    worker.set("key", "value")
+    assert other_worker.get("key") == "value"
+
+    worker.set("other_key", "value")
+
+    assert other_worker.get("key") == "value"
+    assert other_worker.stats["local_hits"] == 0
+    assert other_worker.stats["invalidations"] == 1
+    worker.set("key", "new value")
+    assert other_worker.get("key") == "new value"
+
+
+def test_local_only(make_cache):
+    worker, other_worker = make_cache(SHARED=False), make_cache(SHARED=False)
+    other_worker.set("key", "stale")
+
+    worker.set("key", "value")
+
+    assert worker.get("key") == "value"
+    assert other_worker.get("key") is None
+
+
+def test_local_tier_is_bounded(make_cache):
+    cache = make_cache(MAX_ENTRIES=2)
+    for key in ["a", "b", "c"]:
+        cache.set(key, key)
+
+    assert cache.get("a") == "a"
+
+    assert cache.stats["shared_hits"] == 1
+    assert cache.get("c") == "c"
+    assert cache.stats["local_hits"] == 1
+
+
+def test_local_tier_expires(make_cache):
+    cache = make_cache(LOCAL_TIMEOUT=0)
+    cache.set("key", "value")
+
+    assert cache.get("key") == "value"
+
+    assert cache.stats["shared_hits"] == 1
+
+
+def test_expired_values(make_cache):
+    cache = make_cache()
+    cache.set("key", "value", timeout=0)
+    cache.set("touched", "value")
+
+    assert cache.touch("touched", timeout=0) is True
+    assert cache.get("key") is None
+    assert cache.get("touched") is None
+    assert cache.touch("key") is False
+
+
+def test_clear(make_cache):
+    worker, other_worker = make_cache(), make_cache()
+    worker.set("key", "value")
+    assert other_worker.get("key") == "value"
+
+    worker.clear()
+
+    assert other_worker.get("key") is None
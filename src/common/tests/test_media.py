@@ -0,0 +1,132 @@
+import os
+from http import HTTPStatus
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+CONTENT = b"0123456789" * 10
+
+# Closing a streamed response checks the database connections.
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.fixture
+def url():
+    default_storage.save("maps/shire.png", ContentFile(CONTENT))
+    return default_storage.url("maps/shire.png")
+
+
+def test_url_has_content_hash(url):
+    assert url.startswith("/media/maps/shire.")
+    assert url.endswith(".png")
+    assert url != "/media/maps/shire.png"
+    assert default_storage.url("maps/missing.png") == "/media/maps/missing.png"
+
+    with default_storage.open("maps/shire.png", "wb") as file:
+        file.write(b"new map")
+    stat = os.stat(default_storage.path("maps/shire.png"))  # noqa: PTH116
+    os.utime(
+        default_storage.path("maps/shire.png"),
+        ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9),
+    )
+    assert default_storage.url("maps/shire.png") != url
+
+
+def test_hashed_url_is_immutable(client, url):
+    res = client.get(url)
+
+    assert res.status_code == HTTPStatus.OK
+    assert b"".join(res.streaming_content) == CONTENT
+    assert res["Content-Type"] == "image/png"
+    assert res["Content-Length"] == str(len(CONTENT))
+    assert res["Accept-Ranges"] == "bytes"
+    assert "immutable" in res["Cache-Control"]
+    assert "max-age=31536000" in res["Cache-Control"]
+
+
+@pytest.mark.parametrize("path", ["/media/maps/shire.png", "stale"])
+def test_other_urls_are_revalidated(client, url, path):
+    if path == "stale":
+        path = url.replace(".png", "").rsplit(".", 1)[0] + ".000000000000.png"
+
+    res = client.get(path)
+    res.close()
+
+    assert res.status_code == HTTPStatus.OK
+    assert res["ETag"] == f'"{url.split(".")[-2]}"'
+    assert "no-cache" in res["Cache-Control"]
+    assert "immutable" not in res["Cache-Control"]
+
+
+def test_not_modified(client, url):
+    res = client.get(url)
+    res.close()
+    etag = res["ETag"]
+
+    res = client.get(url, headers={"If-None-Match": etag})
+
+    assert res.status_code == HTTPStatus.NOT_MODIFIED
+    assert res["ETag"] == etag
+    assert "immutable" in res["Cache-Control"]
+
+
+@pytest.mark.parametrize(
+    ("header", "content_range", "content"),
+    [
+        ("bytes=10-19", "bytes 10-19/100", CONTENT[10:20]),
+        ("bytes=95-", "bytes 95-99/100", CONTENT[95:]),
+        ("bytes=-5", "bytes 95-99/100", CONTENT[95:]),
+        ("bytes=90-200", "bytes 90-99/100", CONTENT[90:]),
+    ],
+)
+def test_range(client, url, header, content_range, content):
+    res = client.get(url, headers={"Range": header})
+
+    assert res.status_code == HTTPStatus.PARTIAL_CONTENT
+    assert res["Content-Range"] == content_range
+    assert res["Content-Length"] == str(len(content))
+    assert b"".join(res.streaming_content) == content
+
+
+def test_unsatisfiable_and_ignored_ranges(client, url):
+    res = client.get(url, headers={"Range": "bytes=100-"})
+    assert res.status_code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+    assert res["Content-Range"] == "bytes */100"
+
+    res = client.get(url, headers={"Range": "bytes=0-1,5-6"})
+    res.close()
+    assert res.status_code == HTTPStatus.OK
+
+    res = client.get(url, headers={"Range": "bytes=0-1", "If-Range": '"changed"'})
+    assert res.status_code == HTTPStatus.OK
+    assert b"".join(res.streaming_content) == CONTENT
+
+
+def test_head(client, url):
+    res = client.head(url)
+
+    assert res.status_code == HTTPStatus.OK
+    assert res["Content-Length"] == str(len(CONTENT))
+    assert res.content == b""
+
+
+@pytest.mark.parametrize("path", ["/media/maps/", "/media/../settings.py"])
+def test_not_found(client, url, path):
+    assert client.get(path).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_accel_redirect(client, url, settings):
+    settings.MEDIA_ACCEL_REDIRECT = "/internal-media/"
+
+    res = client.get(url)
+
+    assert res.status_code == HTTPStatus.OK
+    assert res["X-Accel-Redirect"] == "/internal-media/maps/shire.png"
+    assert res.content == b""
+    assert "immutable" in res["Cache-Control"]
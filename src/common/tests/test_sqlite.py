@@ -0,0 +1,72 @@
+import sqlite3
+
+import pytest
+from django.db import connection
+from django.db.utils import load_backend
+
+
+@pytest.fixture
+def production_connection(tmp_path, django_db_blocker):
+    def make(**options):
+        backend = load_backend("charasheet.sqlite3")
+        settings_dict = {
+            **connection.settings_dict,
+            "ENGINE": "charasheet.sqlite3",
+            "NAME": str(tmp_path / "db.sqlite3"),
+            "OPTIONS": options,
+        }
+        wrapper = backend.DatabaseWrapper(settings_dict, alias="production")
+        created.append(wrapper)
+        return wrapper
+
+    created = []
+    # A database of its own, outside of the test database.
+    with django_db_blocker.unblock():
+        yield make
+        for wrapper in created:
+            wrapper.close()
+
+
+def pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+def test_pragmas_are_applied(production_connection):
+    wrapper = production_connection()
+
+    assert pragma(wrapper, "journal_mode") == "wal"
+    assert pragma(wrapper, "synchronous") == 1  # NORMAL
+    assert pragma(wrapper, "busy_timeout") == 10_000
+    assert pragma(wrapper, "temp_store") == 2  # MEMORY
+    assert pragma(wrapper, "foreign_keys") == 1
+
+
+def test_pragmas_can_be_overridden(production_connection):
+    wrapper = production_connection(pragmas={"busy_timeout": 100})
+
+    assert pragma(wrapper, "busy_timeout") == 100
+    assert pragma(wrapper, "journal_mode") == "wal"
+
+
+def test_transactions_take_the_write_lock_upfront(production_connection):
+    wrapper = production_connection()
+    wrapper.ensure_connection()
+    assert wrapper.transaction_mode == "IMMEDIATE"
+
+    wrapper._start_transaction_under_autocommit()  # noqa: SLF001
+    other = sqlite3.connect(wrapper.settings_dict["NAME"], timeout=0)
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            other.execute("BEGIN IMMEDIATE")
+    finally:
+        other.close()
+        wrapper.connection.rollback()
+
+
+def test_transaction_mode_can_be_overridden(production_connection):
+    wrapper = production_connection(transaction_mode="DEFERRED")
+    wrapper.ensure_connection()
+
+    assert wrapper.transaction_mode == "DEFERRED"
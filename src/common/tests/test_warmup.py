@@ -0,0 +1,21 @@
+import pytest
+
+from character.models import Path
+from character.rulebook import get_rulebook
+from charasheet.warmup import hot_templates, warmup
+
+
+def test_hot_templates():
+    templates = hot_templates()
+
+    assert "character/character_details.html" in templates
+    assert "character/snippets/characters_list/character_card.html" in templates
+    assert "party/snippets/effects.html" in templates
+
+
+@pytest.mark.django_db
+def test_warmup_loads_rulebook(initial_data, django_assert_num_queries):
+    warmup()
+
+    with django_assert_num_queries(0):
+        assert get_rulebook().all(Path)
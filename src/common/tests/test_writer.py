@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import IntegrityError, transaction
+from model_bakery import baker
+
+from character import counters
+from character.models import Character
+from common import writer
+from common.models import User
+
+
+@pytest.fixture
+def write_queue(settings, tmp_path):
+    settings.SQLITE_WRITE_QUEUE = True
+    settings.SQLITE_WRITE_LOCK_FILE = tmp_path / "write.lock"
+    return writer.get_writer()
+
+
+def current_thread_name() -> str:
+    return threading.current_thread().name
+
+
+def test_disabled_runs_in_calling_thread():
+    assert writer.get_writer() is None
+    assert writer.write(current_thread_name) == threading.current_thread().name
+
+
+@pytest.mark.django_db(transaction=True)
+def test_writes_run_in_writer_thread(write_queue):
+    name = write_queue.thread.name
+    assert writer.write(current_thread_name) == name
+    assert async_to_sync(writer.awrite)(current_thread_name) == name
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("write_queue")
+def test_writes_within_a_transaction_run_in_it():
+    with transaction.atomic():
+        assert writer.write(current_thread_name) == threading.current_thread().name
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("write_queue")
+def test_failing_write_is_rolled_back_alone():
+    User.objects.create_user("taken")
+
+    def create_users():
+        User.objects.create_user("other")
+        User.objects.create_user("taken")
+
+    with pytest.raises(IntegrityError):
+        writer.write(create_users)
+    writer.write(User.objects.create_user, "third")
+
+    assert set(User.objects.values_list("username", flat=True)) == {"taken", "third"}
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("write_queue")
+def test_concurrent_clicks_through_writer():
+    character = baker.make(Character, health_max=1000, health_remaining=500)
+    queryset = Character.objects.filter(pk=character.pk)
+    clicks, threads_count = 20, 5
+    barrier = threading.Barrier(threads_count)
+
+    def click(change: int) -> None:
+        barrier.wait()
+        for _ in range(clicks):
+            counters.update_counter(queryset, counters.HEALTH, change)
+
+    threads = [
+        threading.Thread(target=click, args=(change,)) for change in [1, 1, 1, -1, -2]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    character.refresh_from_db()
+    assert character.health_remaining == 500 + clicks * (1 + 1 + 1 - 1 - 2)
@@ -0,0 +1,51 @@
+"""Keep the version of `VersionedModel` rows in step with many-to-many changes."""
+
+from django.db import models
+from django.db.models.signals import m2m_changed
+
+from common.models import VersionedModel
+
+_CLEARED_PKS = "_versions_cleared_pks"
+
+
+def connect_relations(*relations) -> None:
+    """Bump the versioned rows on both ends of the given many-to-many fields."""
+    for relation in relations:
+        m2m_changed.connect(_on_relation_change, sender=relation.through)
+
+
+def _on_relation_change(
+    sender,
+    instance,
+    action,
+    model,
+    pk_set,
+    **kwargs,  # noqa: ARG001
+) -> None:
+    if action == "pre_clear":
+        # The cleared rows are unknown once the through rows are gone.
+        if issubclass(model, VersionedModel):
+            instance.__dict__[_CLEARED_PKS] = _related_pks(sender, instance, model)
+        return
+    if action == "post_clear":
+        pk_set = instance.__dict__.pop(_CLEARED_PKS, None)
+    elif action not in {"post_add", "post_remove"}:
+        return
+    if isinstance(instance, VersionedModel):
+        type(instance)._default_manager.filter(pk=instance.pk).touch()  # noqa: SLF001
+        # Deferred: read back from the database only if it is needed.
+        instance.__dict__.pop("version", None)
+    if pk_set and issubclass(model, VersionedModel):
+        model._default_manager.filter(pk__in=pk_set).touch()  # noqa: SLF001
+
+
+def _related_pks(through, instance: models.Model, model) -> set:
+    fields = through._meta.get_fields()  # noqa: SLF001
+    source = next(field for field in fields if field.related_model is type(instance))
+    target = next(field for field in fields if field.related_model is model)
+    return set(
+        through.objects.filter(**{source.name: instance}).values_list(
+            target.attname,
+            flat=True,
+        ),
+    )
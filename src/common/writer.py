@@ -0,0 +1,130 @@
+"""
+Serialization of the hot writes of a process through a single writer thread.
+
+With `SQLITE_WRITE_QUEUE` enabled, the mutation endpoints clicked during a
+fight submit their writes as small closures with `write` or `awrite`, instead
+of writing from every request thread. The writer thread of each process runs
+the queued writes in batches, a batch in a single transaction, and each write
+in a savepoint of its own so that a failing write is rolled back alone. The
+result, or the exception, is handed back to the waiting request once the
+batch is committed.
+
+The writers of the gunicorn workers take turns through an exclusive lock on
+`SQLITE_WRITE_LOCK_FILE`: they wait in the kernel rather than in the polling
+busy handler of SQLite, and the writes queued meanwhile share the next commit.
+
+Writes submitted from within a transaction, or with the queue disabled, run
+directly in the calling thread.
+"""
+
+import asyncio
+import fcntl
+import os
+import queue
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+from contextlib import contextmanager, suppress
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+
+# Writes committed together at most.
+MAX_BATCH = 64
+
+
+class Writer:
+    """Thread running the writes submitted by the other threads of the process."""
+
+    def __init__(self, lock_path: str) -> None:
+        self.lock_path = lock_path
+        self.pid = os.getpid()
+        self.queue: queue.SimpleQueue[tuple[Future, Callable]] = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self.run, name="writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        future = Future()
+        self.queue.put((future, partial(func, *args, **kwargs)))
+        return future
+
+    def run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            with suppress(queue.Empty):
+                while len(batch) < MAX_BATCH:
+                    batch.append(self.queue.get_nowait())
+            self.run_batch(batch)
+
+    def run_batch(self, batch: list[tuple[Future, Callable]]) -> None:
+        outcomes = []
+        try:
+            with self.locked(), transaction.atomic():
+                for future, func in batch:
+                    if future.set_running_or_notify_cancel():
+                        outcomes.append((future, *_call_in_savepoint(func)))
+        except Exception as e:  # Handed to the waiting requests.
+            for future, _func in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for future, result, exception in outcomes:
+                if exception is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(exception)
+        finally:
+            connection.close_if_unusable_or_obsolete()
+
+    @contextmanager
+    def locked(self):
+        """Hold the write lock shared by the processes."""
+        with open(self.lock_path, "a") as lock_file:  # noqa: PTH123
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _call_in_savepoint(func: Callable) -> tuple[object, Exception | None]:
+    try:
+        with transaction.atomic():
+            return func(), None
+    except Exception as e:  # Handed to the waiting request.
+        return None, e
+
+
+_writer: Writer | None = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> Writer | None:
+    """Return the writer of the current process, None when disabled."""
+    global _writer  # noqa: PLW0603
+    if not settings.SQLITE_WRITE_QUEUE:
+        return None
+    # A forked worker doesn't inherit the thread of its parent.
+    if _writer is None or _writer.pid != os.getpid():
+        with _writer_lock:
+            if _writer is None or _writer.pid != os.getpid():
+                _writer = Writer(str(settings.SQLITE_WRITE_LOCK_FILE))
+    return _writer
+
+
+def write(func: Callable, *args, **kwargs):
+    """Call `func` in the writer thread and return its result, see above."""
+    writer = get_writer()
+    if writer is None or connection.in_atomic_block:
+        return func(*args, **kwargs)
+    return writer.submit(func, *args, **kwargs).result()
+
+
+async def awrite(func: Callable, *args, **kwargs):
+    """Async version of `write`, waiting for the writer without a thread."""
+    writer = get_writer()
+    if writer is None:
+        return await sync_to_async(func)(*args, **kwargs)
+    return await asyncio.wrap_future(writer.submit(func, *args, **kwargs))
@@ -1,13 +1,38 @@
 import pytest
+from django.core.cache import caches
 from django.core.management import call_command
 from selenium.webdriver.remote.webdriver import WebDriver
 
+from character import rulebook
+
 
 @pytest.fixture(scope="session", autouse=True)
 def _collectstatic():
     call_command("collectstatic", "--clear", "--noinput", "--verbosity=0")
 
 
+@pytest.fixture(autouse=True)
+def _forget_rulebook():
+    # Test transactions are rolled back: the rulebook of a test is stale after it.
+    rulebook.forget()
+    yield
+    rulebook.forget()
+
+
+@pytest.fixture(autouse=True)
+def _clear_template_fragments():
+    # Primary keys and versions are reused once test transactions are rolled back.
+    yield
+    caches["template_fragments"].clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    # The cache outlives the test database, and is shared with other runs.
+    yield
+    caches["default"].clear()
+
+
 @pytest.fixture
 def live_server(settings, live_server):
     settings.STORAGES = {
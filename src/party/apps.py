@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class PartyConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "party"
+
+    def ready(self) -> None:
+        from party import models
+
+        models.connect_signals()
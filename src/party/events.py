@@ -0,0 +1,206 @@
+"""
+Live events of parties, pushed to the party page with Server-Sent Events.
+
+The counter and state endpoints publish small "character X changed fields Y"
+events, see `publish_character_change`. The party page subscribes to the
+events of its characters through `party:events`, and refreshes the card of a
+changed character instead of reloading the whole page.
+
+Subscribers are kept in memory by each process. With `PARTY_EVENTS_DATABASE`
+set, events are written to that shared SQLite file instead, which every
+process with subscribers polls, so that the workers see each other's events.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterable
+from contextlib import closing, suppress
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+
+HEARTBEAT_INTERVAL = 15
+RETRY_DELAY = 5000  # ms
+POLL_INTERVAL = 0.25
+# Events kept in the shared database, largely enough for a poll interval.
+RETENTION = 1000
+# Events queued for a slow client before the following ones are dropped.
+QUEUE_SIZE = 100
+
+
+class Subscription:
+    """Events of some topics, delivered to a coroutine of an event loop."""
+
+    def __init__(self, broker: "Broker", topics: Iterable[str]) -> None:
+        self.broker = broker
+        self.topics = frozenset(topics)
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def deliver(self, event: dict) -> None:
+        """Queue the event, from any thread."""
+        with suppress(RuntimeError):  # The loop is closed.
+            self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event: dict) -> None:
+        with suppress(asyncio.QueueFull):
+            self.queue.put_nowait(event)
+
+    async def get(self) -> dict:
+        return await self.queue.get()
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """Publish/subscribe of the events by topic, within a process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscriptions: dict[str, set[Subscription]] = defaultdict(set)
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        subscription = Subscription(self, topics)
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscriptions[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscriptions[topic].discard(subscription)
+                if not self._subscriptions[topic]:
+                    del self._subscriptions[topic]
+
+    def has_subscriptions(self) -> bool:
+        return bool(self._subscriptions)
+
+    def publish(self, topic: str, event: dict) -> None:
+        """Deliver the event to the subscribers of the topic, from any thread."""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(topic, ()))
+        for subscription in subscriptions:
+            subscription.deliver(event)
+
+
+class SQLiteFanout:
+    """Relay of the events between processes through a shared SQLite file."""
+
+    def __init__(self, path: str, broker: Broker) -> None:
+        self.path = path
+        self.broker = broker
+        self._relay: asyncio.Task | None = None
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, topic TEXT, payload TEXT)",
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def publish(self, topic: str, event: dict) -> None:
+        with closing(self._connect()) as connection, connection:
+            cursor = connection.execute(
+                "INSERT INTO events (topic, payload) VALUES (?, ?)",
+                (topic, json.dumps(event)),
+            )
+            connection.execute(
+                "DELETE FROM events WHERE id <= ?",
+                (cursor.lastrowid - RETENTION,),
+            )
+
+    def ensure_relay(self) -> None:
+        """Poll the events in the running loop, as long as it has subscribers."""
+        loop = asyncio.get_running_loop()
+        if self._relay is None or self._relay.done() or self._relay.get_loop() != loop:
+            self._relay = loop.create_task(self.relay())
+
+    async def relay(self) -> None:
+        last_id = await asyncio.to_thread(self._read_last_id)
+        while self.broker.has_subscriptions():
+            await asyncio.sleep(POLL_INTERVAL)
+            rows = await asyncio.to_thread(self._read_since, last_id)
+            for event_id, topic, payload in rows:
+                self.broker.publish(topic, json.loads(payload))
+                last_id = event_id
+
+    def _read_last_id(self) -> int:
+        with closing(self._connect()) as connection:
+            row = connection.execute("SELECT MAX(id) FROM events").fetchone()
+            return row[0] or 0
+
+    def _read_since(self, last_id: int) -> list[tuple[int, str, str]]:
+        with closing(self._connect()) as connection:
+            return connection.execute(
+                "SELECT id, topic, payload FROM events WHERE id > ? ORDER BY id",
+                (last_id,),
+            ).fetchall()
+
+
+broker = Broker()
+_fanout: SQLiteFanout | None = None
+_fanout_lock = threading.Lock()
+
+
+def get_fanout() -> SQLiteFanout | None:
+    global _fanout  # noqa: PLW0603
+    if not settings.PARTY_EVENTS_DATABASE:
+        return None
+    if _fanout is None or _fanout.path != settings.PARTY_EVENTS_DATABASE:
+        with _fanout_lock:
+            if _fanout is None or _fanout.path != settings.PARTY_EVENTS_DATABASE:
+                _fanout = SQLiteFanout(settings.PARTY_EVENTS_DATABASE, broker)
+    return _fanout
+
+
+def character_topic(pk: int) -> str:
+    return f"character:{pk}"
+
+
+def publish(topic: str, event: dict) -> None:
+    fanout = get_fanout()
+    if fanout is None:
+        broker.publish(topic, event)
+    else:
+        fanout.publish(topic, event)
+
+
+def publish_character_change(pk: int, fields: Iterable[str]) -> None:
+    """Publish that fields of the character changed, once committed."""
+    event = {"type": "character", "character": pk, "fields": sorted(fields)}
+    transaction.on_commit(partial(publish, character_topic(pk), event))
+
+
+def subscribe(topics: Iterable[str]) -> Subscription:
+    """Subscribe the running event loop to the topics."""
+    subscription = broker.subscribe(topics)
+    if (fanout := get_fanout()) is not None:
+        fanout.ensure_relay()
+    return subscription
+
+
+async def stream(topics: Iterable[str]) -> AsyncIterator[str]:
+    """Yield the events of the topics in the `text/event-stream` format."""
+    subscription = subscribe(topics)
+    try:
+        # Reconnection delay of the client, also flushes the response headers.
+        yield f"retry: {RETRY_DELAY}\n\n"
+        while True:
+            try:
+                async with asyncio.timeout(HEARTBEAT_INTERVAL):
+                    event = await subscription.get()
+            except TimeoutError:
+                # Keeps the connection open through proxies.
+                yield ": heartbeat\n\n"
+            else:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        subscription.close()
@@ -1,18 +1,53 @@
 from django import forms
 from django.core.exceptions import ValidationError
 from django.db.models import Q
+from django.urls import reverse
 
 from character.models import Character
+from common.http import parse_positive_int
 from party.models import BattleEffect, Party
 
 
+class CharacterPicker(forms.SelectMultiple):
+    """
+    Tokens of the selected characters, and a search to add more.
+
+    Unlike a `<select>`, only the selected characters are rendered: the others
+    are searched by name, see `party.views.party_invite_search`.
+    """
+
+    template_name = "party/widgets/character_picker.html"
+    search_url = ""
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context["widget"]["search_url"] = self.search_url
+        context["widget"]["characters"] = self.choices.queryset.filter(
+            pk__in=[
+                pk
+                for value in context["widget"]["value"]
+                if (pk := parse_positive_int(value)) is not None
+            ],
+        ).select_related("player")
+        return context
+
+    def optgroups(self, name, value, attrs=None):  # noqa: ARG002
+        # The choices are all the characters that could be invited.
+        return []
+
+
 class PartyForm(forms.ModelForm):
     def __init__(self, *args, **kwargs) -> None:
         self.original_instance = kwargs.get("instance")
         super().__init__(*args, **kwargs)
-        qs = Character.objects.all()
+        qs = Character.objects.filter(private=False)
+        search_url = reverse("party:invite_search")
         if self.original_instance:
-            qs = qs.filter(
+            search_url = reverse(
+                "party:invite_search",
+                kwargs={"pk": self.original_instance.pk},
+            )
+            qs = Character.objects.filter(
                 Q(private=False)
                 | Q(
                     pk__in=self.original_instance.invited_characters.all().values_list(
@@ -22,22 +57,23 @@ class PartyForm(forms.ModelForm):
                 ),
             )
         self.fields["invited_characters"].queryset = qs
+        self.fields["invited_characters"].widget.search_url = search_url
 
     class Meta:
         model = Party
         fields = ["name", "invited_characters"]
+        widgets = {"invited_characters": CharacterPicker}
 
     def clean_invited_characters(self):
         invited = self.cleaned_data["invited_characters"]
         if not self.original_instance:
             return invited
-        members = self.original_instance.characters.all()
-        for character in invited:
-            if character in members:
-                self.add_error(
-                    "invited_characters",
-                    ValidationError(f"{character} is already a group member."),
-                )
+        # Only the submitted characters are looked up among the members.
+        for character in invited.filter(parties=self.original_instance):
+            self.add_error(
+                "invited_characters",
+                ValidationError(f"{character} is already a group member."),
+            )
         return invited
 
 
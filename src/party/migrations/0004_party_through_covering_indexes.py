@@ -0,0 +1,36 @@
+from django.db import migrations
+
+THROUGH_TABLES = ["party_party_characters", "party_party_invited_characters"]
+
+
+def create_index_sql(table: str) -> str:
+    return (
+        f'CREATE INDEX "{table}_character_party_idx" '
+        f'ON "{table}" ("character_id", "party_id");'
+    )
+
+
+def drop_index_sql(table: str) -> str:
+    return f'DROP INDEX "{table}_character_party_idx";'
+
+
+class Migration(migrations.Migration):
+    """
+    Covering indexes for the access-control EXISTS subqueries.
+
+    The auto-created through tables only index (party_id, character_id),
+    so looking up the parties of a character needs a lookup in the table
+    itself. These indexes answer it from the index alone.
+    """
+
+    dependencies = [
+        ("party", "0003_battleeffect"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=create_index_sql(table),
+            reverse_sql=drop_index_sql(table),
+        )
+        for table in THROUGH_TABLES
+    ]
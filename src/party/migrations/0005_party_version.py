@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("party", "0004_party_through_covering_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="party",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -1,41 +1,78 @@
 from django.db import models
-from django.db.models import F, Q
+from django.db.models import Exists, F, OuterRef, Q, Subquery, Sum
+from django.db.models.signals import post_delete, post_save
 from django.urls import reverse
 from django_extensions.db.models import TimeStampedModel
 
-from character.models import Character
-from common.models import UniquelyNamedModel, UniquelyNamedModelManager
+from common import writer
+from common.models import (
+    UniquelyNamedModel,
+    UniquelyNamedModelManager,
+    VersionedModel,
+    VersionedQuerySet,
+)
 
 
-class PartyQuerySet(models.QuerySet):
+class PartyQuerySet(VersionedQuerySet):
     def managed_by(self, user):
         return self.filter(game_master=user)
 
     def played_by(self, user):
-        return self.filter(characters__in=Character.objects.filter(player=user))
+        return self.filter(_has_character_of(user))
 
     def played_or_mastered_by(self, user):
-        return self.filter(
-            Q(game_master=user)
-            | Q(characters__in=Character.objects.filter(player=user)),
-        ).distinct()
+        return self.filter(Q(game_master=user) | _has_character_of(user))
 
     def related_to(self, user):
         return self.filter(
             Q(game_master=user)
-            | Q(characters__in=Character.objects.filter(player=user))
-            | Q(invited_characters__in=Character.objects.filter(player=user)),
-        ).distinct()
+            | _has_character_of(user)
+            | _has_character_of(user, invited=True),
+        )
 
     def invited_to(self, user):
-        return self.filter(invited_characters__in=Character.objects.filter(player=user))
+        return self.filter(_has_character_of(user, invited=True))
+
+    def with_change_token(self):
+        """
+        Annotate the sums of the versions of the characters and invites.
+
+        Along with the version of the party, bumped when its members change,
+        they change whenever anything shown on the party page does.
+        """
+        return self.annotate(
+            characters_version=_sum_of_versions(Party.characters),
+            invites_version=_sum_of_versions(Party.invited_characters),
+        )
+
+
+def _has_character_of(user, *, invited: bool = False) -> Exists:
+    """Correlated EXISTS over the characters of the user in the outer party."""
+    field = Party.invited_characters if invited else Party.characters
+    return Exists(
+        field.through.objects.filter(party_id=OuterRef("pk"), character__player=user),
+    )
+
+
+def _sum_of_versions(field) -> Subquery:
+    return Subquery(
+        field.through.objects.filter(party_id=OuterRef("pk"))
+        .values("party_id")
+        .annotate(total=Sum("character__version"))
+        .values("total"),
+    )
 
 
 class PartyManager(UniquelyNamedModelManager):
     pass
 
 
-class Party(UniquelyNamedModel, TimeStampedModel, models.Model):  # noqa: DJ008
+class Party(  # noqa: DJ008
+    VersionedModel,
+    UniquelyNamedModel,
+    TimeStampedModel,
+    models.Model,
+):
     game_master = models.ForeignKey(
         "common.User",
         on_delete=models.PROTECT,
@@ -65,17 +102,29 @@ class Party(UniquelyNamedModel, TimeStampedModel, models.Model):  # noqa: DJ008
         return reverse("party:details", kwargs={"pk": self.pk})
 
     def reset_stats(self):
-        for character in self.characters.all():
-            character.reset_stats()
+        self.characters.all().reset_stats()
 
 
 class BattleEffectQuerySet(models.QuerySet):
+    def update(self, **kwargs) -> int:
+        """Update the effects and bump the version of their parties."""
+        party_ids = set(self.values_list("party_id", flat=True))
+        count = super().update(**kwargs)
+        Party.objects.filter(pk__in=party_ids).touch()
+        return count
+
     def increase_rounds(self):
         self.temporary().update(remaining_rounds=F("remaining_rounds") + 1)
 
+    async def aincrease_rounds(self):
+        await writer.awrite(self.increase_rounds)
+
     def decrease_rounds(self):
         self.active().update(remaining_rounds=F("remaining_rounds") - 1)
 
+    async def adecrease_rounds(self):
+        await writer.awrite(self.decrease_rounds)
+
     def active(self):
         return self.filter(remaining_rounds__gt=0)
 
@@ -132,3 +181,13 @@ class BattleEffect(TimeStampedModel, models.Model):
         if self.remaining_rounds >= max_display_percent or self.remaining_rounds < 0:
             return 100
         return self.remaining_rounds / max_display_percent * 100
+
+
+def _on_effect_change(instance: BattleEffect, **kwargs) -> None:  # noqa: ARG001
+    # Effects are shown on the page of their party.
+    Party.objects.filter(pk=instance.party_id).touch()
+
+
+def connect_signals() -> None:
+    post_save.connect(_on_effect_change, sender=BattleEffect)
+    post_delete.connect(_on_effect_change, sender=BattleEffect)
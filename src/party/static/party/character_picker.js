@@ -0,0 +1,28 @@
+// Invite characters with the picker of the party form (see party.forms).
+//
+// A search result, marked with `data-invite-character`, holds the token of its
+// character in a `<template>`: clicking it adds the token, and its hidden
+// input, to the picker. The button of a token, `data-uninvite-character`,
+// removes it. Enter in the search field does not submit the form.
+(function () {
+    document.addEventListener("click", function (event) {
+        const result = event.target.closest("[data-invite-character]");
+        if (result) {
+            const picker = result.closest(".character-picker");
+            const token = result.querySelector("template").content.cloneNode(true);
+            picker.querySelector(".character-tokens").append(token);
+            result.remove();
+            return;
+        }
+        const remove = event.target.closest("[data-uninvite-character]");
+        if (remove) {
+            remove.closest(".character-token").remove();
+        }
+    });
+
+    document.addEventListener("keydown", function (event) {
+        if (event.key === "Enter" && event.target.matches(".character-picker input")) {
+            event.preventDefault();
+        }
+    });
+})();
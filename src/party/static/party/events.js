@@ -0,0 +1,29 @@
+// Refresh the cards of the characters changed by other players or the GM.
+//
+// The party page subscribes to the Server-Sent Events of its characters
+// (see party.events) at the `data-events-url` of an element. Each event names
+// a changed character: its card, marked with `data-character-card`, is sent a
+// `character-changed` event, on which it fetches and swaps itself with htmx.
+(function () {
+    function subscribe(url) {
+        const source = new EventSource(url);
+        source.addEventListener("character", function (event) {
+            const data = JSON.parse(event.data);
+            const cards = document.querySelectorAll(
+                `[data-character-card="${data.character}"]`,
+            );
+            cards.forEach(function (card) {
+                htmx.trigger(card, "character-changed", data);
+            });
+        });
+    }
+
+    document.addEventListener("DOMContentLoaded", function () {
+        if (typeof EventSource === "undefined") {
+            return;
+        }
+        document.querySelectorAll("[data-events-url]").forEach(function (element) {
+            subscribe(element.dataset.eventsUrl);
+        });
+    });
+})();
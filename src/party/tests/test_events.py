@@ -0,0 +1,154 @@
+import asyncio
+import json
+import threading
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncClient
+from django.urls import reverse
+from model_bakery import baker
+
+from character.models import Character, HarmfulState
+from common.models import User
+from party import events
+from party.models import Party
+
+
+async def next_event(topics, action=None) -> dict:
+    subscription = events.subscribe(topics)
+    try:
+        if action is not None:
+            await sync_to_async(action)()
+        async with asyncio.timeout(2):
+            return await subscription.get()
+    finally:
+        subscription.close()
+
+
+def test_broker_delivers_from_other_threads():
+    topic = events.character_topic(1)
+
+    def publish():
+        thread = threading.Thread(
+            target=events.publish,
+            args=(topic, {"type": "character", "character": 1}),
+        )
+        thread.start()
+        thread.join()
+
+    event = async_to_sync(next_event)([topic], publish)
+
+    assert event == {"type": "character", "character": 1}
+    assert not events.broker.has_subscriptions()
+
+
+@pytest.mark.django_db
+def test_counter_and_state_changes_are_published(
+    client,
+    django_capture_on_commit_callbacks,
+):
+    character = baker.make(Character, health_max=10, health_remaining=10)
+    state = baker.make(HarmfulState)
+    client.force_login(character.player)
+    topics = [events.character_topic(character.pk)]
+
+    def change_health():
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(
+                reverse("character:apply", kwargs={"pk": character.pk}),
+                {"health_remaining": "-1", "mana_remaining": "max"},
+            )
+
+    def add_state():
+        with django_capture_on_commit_callbacks(execute=True):
+            client.get(
+                reverse(
+                    "character:add_state",
+                    kwargs={"pk": character.pk, "state_pk": state.pk},
+                ),
+            )
+
+    assert async_to_sync(next_event)(topics, change_health) == {
+        "type": "character",
+        "character": character.pk,
+        "fields": ["health_remaining", "mana_remaining"],
+    }
+    assert async_to_sync(next_event)(topics, add_state)["fields"] == ["states"]
+
+
+def test_sqlite_fanout_relays_events_of_other_processes(settings, tmp_path):
+    settings.PARTY_EVENTS_DATABASE = str(tmp_path / "events.sqlite3")
+    topic = events.character_topic(1)
+    other_process = events.SQLiteFanout(settings.PARTY_EVENTS_DATABASE, None)
+
+    def publish():
+        other_process.publish(topic, {"type": "character", "character": 1})
+
+    event = async_to_sync(next_event)([topic], publish)
+
+    assert event == {"type": "character", "character": 1}
+
+
+@pytest.mark.django_db
+def test_events_stream(django_capture_on_commit_callbacks):
+    character = baker.make(Character)
+    party = baker.make(Party, characters=[character])
+    url = reverse("party:events", kwargs={"pk": party.pk})
+
+    async def read_stream() -> list[str]:
+        client = AsyncClient()
+        await client.aforce_login(party.game_master)
+        response = await client.get(url)
+        assert response["Content-Type"] == "text/event-stream"
+        content = aiter(response.streaming_content)
+        chunks = [await anext(content)]
+        await sync_to_async(publish)()
+        chunks.append(await anext(content))
+        await content.aclose()
+        return [chunk.decode() for chunk in chunks]
+
+    def publish():
+        with django_capture_on_commit_callbacks(execute=True):
+            events.publish_character_change(character.pk, ["health_remaining"])
+
+    retry, event = async_to_sync(read_stream)()
+
+    assert retry == f"retry: {events.RETRY_DELAY}\n\n"
+    name, data = event.strip().split("\n")
+    assert name == "event: character"
+    assert json.loads(data.removeprefix("data: "))["character"] == character.pk
+    assert not events.broker.has_subscriptions()
+
+
+@pytest.mark.django_db
+def test_events_need_asgi_and_access(client):
+    party = baker.make(Party)
+    stranger = baker.make(User)
+    url = reverse("party:events", kwargs={"pk": party.pk})
+
+    async def get_events():
+        client = AsyncClient()
+        await client.aforce_login(stranger)
+        return await client.get(url)
+
+    assert client.get(url).status_code == HTTPStatus.NO_CONTENT
+    assert async_to_sync(get_events)().status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_character_card(client):
+    character = baker.make(Character, name="Gandalf")
+    party = baker.make(Party, characters=[character])
+    client.force_login(party.game_master)
+
+    res = client.get(
+        reverse(
+            "party:character_card",
+            kwargs={"pk": party.pk, "character_pk": character.pk},
+        ),
+    )
+
+    assert res.status_code == HTTPStatus.OK
+    assert "Gandalf" in res.content.decode()
+    assert f'data-character-card="{character.pk}"' in res.content.decode()
@@ -6,7 +6,6 @@ from model_bakery import baker
 from pytest_django.live_server_helper import LiveServer
 from selenium.webdriver.common.by import By
 from selenium.webdriver.firefox.webdriver import WebDriver
-from selenium.webdriver.support.select import Select
 from selenium.webdriver.support.wait import WebDriverWait
 
 from character.models import Character, Profile
@@ -30,8 +29,11 @@ def test_add_character_to_existing_group(selenium: WebDriver, live_server: LiveS
         By.CSS_SELECTOR,
         f".party[data-id='{party.pk}'] .edit",
     ).click()
-    invited = Select(selenium.find_element(By.ID, "id_invited_characters"))
-    invited.select_by_index(0)
+    selenium.find_element(By.ID, "id_invited_characters").send_keys(character.name)
+    WebDriverWait(selenium, 3).until(
+        lambda driver: driver.find_elements(By.CSS_SELECTOR, "[data-invite-character]"),
+    )
+    selenium.find_element(By.CSS_SELECTOR, "[data-invite-character]").click()
     selenium.find_element(By.CSS_SELECTOR, "[type=submit]").click()
 
     assert selenium.current_url == live_server.url + reverse("party:list")
@@ -0,0 +1,140 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+from model_bakery import baker
+
+from character.models import Character
+from common.models import User
+from party.forms import PartyForm
+from party.models import Party
+from party.views import INVITE_SEARCH_PAGE_SIZE
+
+
+def search(client, url, **params) -> list[str]:
+    res = client.get(url, params)
+    assert res.status_code == HTTPStatus.OK
+    return [character.name for character in res.context["characters"]]
+
+
+@pytest.mark.django_db
+def test_name_starts_with():
+    for name in ["Aragorn", "arwen", "Boromir", "Ar%"]:
+        baker.make(Character, name=name)
+
+    characters = Character.objects.name_starts_with("AR")
+
+    assert [character.name for character in characters] == ["Ar%", "Aragorn", "arwen"]
+    assert list(Character.objects.name_starts_with("ar%")) == [
+        Character.objects.get(name="Ar%"),
+    ]
+
+
+@pytest.mark.django_db
+def test_invite_search(client):
+    gm = User.objects.create_user("gm")
+    party = baker.make(Party, game_master=gm)
+    member, invited, _ = baker.make(
+        Character,
+        name=iter(["Merry", "Meriadoc", "Merlin"]),
+        _quantity=3,
+    )
+    party.characters.add(member)
+    baker.make(Character, name="Mervyn", private=True)
+    client.force_login(gm)
+    url = reverse("party:invite_search", kwargs={"pk": party.pk})
+
+    assert search(client, url) == []
+    assert search(client, url, q="mer") == ["Meriadoc", "Merlin"]
+    assert search(client, url, q="mer", invited_characters=[invited.pk]) == [
+        "Merlin",
+    ]
+    assert search(client, reverse("party:invite_search"), q="mer") == [
+        "Meriadoc",
+        "Merlin",
+        "Merry",
+    ]
+
+
+@pytest.mark.django_db
+def test_invite_search_is_paginated(client):
+    user = User.objects.create_user("gm")
+    baker.make(
+        Character,
+        name=iter(f"Hobbit {i:02}" for i in range(INVITE_SEARCH_PAGE_SIZE + 1)),
+        _quantity=INVITE_SEARCH_PAGE_SIZE + 1,
+    )
+    client.force_login(user)
+    url = reverse("party:invite_search")
+
+    res = client.get(url, {"q": "hobbit"})
+    assert len(res.context["characters"]) == INVITE_SEARCH_PAGE_SIZE
+    assert res.context["next_page"] == 2
+
+    res = client.get(url, {"q": "hobbit", "page": 2})
+    assert [character.name for character in res.context["characters"]] == [
+        "Hobbit 10",
+    ]
+    assert res.context["next_page"] is None
+
+
+@pytest.mark.django_db
+def test_invite_search_ignores_invalid_numbers(client):
+    baker.make(Character, name="Hobbit")
+    client.force_login(User.objects.create_user("gm"))
+    url = reverse("party:invite_search")
+
+    for page in ["²", "0", "-1", "9" * 5000]:
+        assert search(client, url, q="hob", page=page) == ["Hobbit"]
+    assert search(client, url, q="hob", invited_characters=["²", "9" * 30]) == [
+        "Hobbit",
+    ]
+
+
+@pytest.mark.django_db
+def test_invite_search_of_other_party(client):
+    party = baker.make(Party)
+    client.force_login(User.objects.create_user("player"))
+
+    res = client.get(reverse("party:invite_search", kwargs={"pk": party.pk}))
+
+    assert res.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_party_form_renders_only_invited_characters(django_assert_num_queries):
+    party = baker.make(Party)
+    invited = baker.make(Character, name="Sam", private=True)
+    party.invited_characters.add(invited)
+    baker.make(Character, name="Rosie")
+
+    form = PartyForm(instance=party)
+    with django_assert_num_queries(1):
+        html = form.as_div()
+
+    assert "Sam" in html
+    assert "Rosie" not in html
+
+
+@pytest.mark.django_db
+def test_party_form_validates_invited_characters():
+    party = baker.make(Party)
+    member, invited, private = baker.make(
+        Character,
+        private=iter([False, False, True]),
+        _quantity=3,
+    )
+    party.characters.add(member)
+
+    form = PartyForm({"name": "Fellowship", "invited_characters": [invited.pk]})
+    assert form.is_valid()
+    form = PartyForm({"name": "Fellowship", "invited_characters": [private.pk]})
+    assert not form.is_valid()
+    form = PartyForm(
+        {"name": party.name, "invited_characters": [member.pk]},
+        instance=party,
+    )
+    assert not form.is_valid()
+    assert form.errors["invited_characters"] == [
+        f"{member} is already a group member.",
+    ]
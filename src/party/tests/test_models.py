@@ -1,8 +1,8 @@
 from model_bakery import baker
 
-from character.models import Character
+from character.models import Character, Profile
 from common.models import User
-from party.models import Party
+from party.models import BattleEffect, Party
 
 
 def test_party_managed_by(db):
@@ -28,3 +28,79 @@ def test_party_played_by(db):
     related_to = Party.objects.played_by(player)
     assert len(related_to) == 1
     assert related_to[0] == expected
+
+
+def test_party_related_to_without_duplicates(db):
+    player = User.objects.create_user("player")
+    characters = baker.make(Character, player=player, _quantity=2)
+    party = Party.objects.create(name="some name", game_master=player)
+    party.characters.add(*characters)
+    party.invited_characters.add(baker.make(Character, player=player))
+
+    assert list(Party.objects.related_to(player)) == [party]
+
+
+def test_character_managed_by_without_duplicates(db):
+    game_master = User.objects.create_user("game_master")
+    character = baker.make(Character)
+    for name in ["first", "second"]:
+        party = Party.objects.create(name=name, game_master=game_master)
+        party.characters.add(character)
+
+    assert list(Character.objects.managed_by(game_master)) == [character]
+    assert list(Character.objects.friendly_to(game_master)) == [character]
+
+
+def test_party_reset_stats_single_query(db, django_assert_num_queries):
+    profile = baker.make(
+        Profile,
+        mana_max_compute=Profile.ManaMax.DOUBLE_LEVEL,
+        magical_strength=Profile.MagicalStrength.WISDOM,
+    )
+    characters = baker.make(
+        Character,
+        profile=profile,
+        level=3,
+        value_wisdom=14,
+        bonus_wisdom=0,
+        value_charisma=15,
+        bonus_charisma=1,
+        health_max=12,
+        health_remaining=1,
+        mana_remaining=0,
+        luck_points_remaining=0,
+        recovery_points_remaining=0,
+        _quantity=3,
+    )
+    outsider = baker.make(Character, health_max=12, health_remaining=1)
+    party = baker.make(Party)
+    party.characters.add(*characters)
+
+    with django_assert_num_queries(1):
+        party.reset_stats()
+
+    for character in characters:
+        character.refresh_from_db()
+        assert character.health_remaining == character.health_max
+        assert character.mana_remaining == character.mana_max == 8
+        assert character.luck_points_remaining == character.luck_points_max
+        assert character.recovery_points_remaining == character.recovery_points_max
+    outsider.refresh_from_db()
+    assert outsider.health_remaining == 1
+
+
+def test_party_version_follows_members_and_effects(db):
+    character = baker.make(Character)
+    party = baker.make(Party)
+
+    character.parties.add(party)
+    baker.make(BattleEffect, party=party, remaining_rounds=2)
+    party.effects.decrease_rounds()
+
+    party.refresh_from_db()
+    assert party.version == 4
+    tokens = Party.objects.with_change_token().filter(pk=party.pk)
+    assert tokens.values_list("characters_version", "invites_version").get() == (
+        2,
+        None,
+    )
@@ -6,8 +6,16 @@ app_name = "party"
 urlpatterns = [
     path("", views.parties_list, name="list"),
     path("create/", views.party_create, name="create"),
+    path("invites/", views.party_invite_search, name="invite_search"),
+    path("<int:pk>/invites/", views.party_invite_search, name="invite_search"),
     path("<int:pk>/", views.party_details, name="details"),
     path("<int:pk>/change/", views.party_change, name="change"),
+    path("<int:pk>/events/", views.party_events, name="events"),
+    path(
+        "<int:pk>/card/<int:character_pk>/",
+        views.party_character_card,
+        name="character_card",
+    ),
     path("<int:pk>/delete/", views.party_delete, name="delete"),
     path("<int:pk>/reset_stats/", views.party_reset_stats, name="reset_stats"),
     path("<int:pk>/add_effect/", views.party_add_effect, name="add_effect"),
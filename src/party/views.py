@@ -1,9 +1,26 @@
+from http import HTTPStatus
+
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.http import require_GET, require_http_methods
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Prefetch, Q, aprefetch_related_objects
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseForbidden,
+    StreamingHttpResponse,
+)
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect, render
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET, require_http_methods
+from django_htmx.http import trigger_client_event
 
+from character.conditional import party_etag
 from character.models import Character, HarmfulState
+from character.rulebook import get_rulebook
+from common.http import get_page, parse_positive_int
+from party import events
 from party.forms import BattleEffectForm, PartyForm
 from party.models import BattleEffect, Party
 
@@ -13,8 +30,8 @@ from party.models import BattleEffect, Party
 def parties_list(request):
     context = {
         "managed_parties": Party.objects.managed_by(request.user),
-        "played_parties": Party.objects.played_by(request.user).distinct(),
-        "invited_to": Party.objects.invited_to(request.user).distinct(),
+        "played_parties": Party.objects.played_by(request.user),
+        "invited_to": Party.objects.invited_to(request.user),
     }
     return render(request, "party/parties_list.html", context)
 
@@ -36,17 +53,120 @@ def party_create(request):
     return render(request, "party/party_form.html", context)
 
 
+INVITE_SEARCH_PAGE_SIZE = 10
+
+
+@require_GET
+@login_required
+def party_invite_search(request, pk=None):
+    """Characters that can be invited to the party, whose name starts with `q`."""
+    characters = Character.objects.filter(private=False).exclude(
+        pk__in=[
+            character_pk
+            for value in request.GET.getlist("invited_characters")
+            if (character_pk := parse_positive_int(value)) is not None
+        ],
+    )
+    if pk is not None:
+        party = get_object_or_404(Party.objects.managed_by(request.user), pk=pk)
+        characters = characters.exclude(parties=party)
+    query = request.GET.get("q", "").strip()
+    page = get_page(request)
+    results = []
+    if query:
+        start = (page - 1) * INVITE_SEARCH_PAGE_SIZE
+        results = list(
+            characters.name_starts_with(query)
+            .select_related("player")
+            .only("name", "player__username")[
+                start : start + INVITE_SEARCH_PAGE_SIZE + 1
+            ],
+        )
+    context = {
+        "characters": results[:INVITE_SEARCH_PAGE_SIZE],
+        "next_page": page + 1 if len(results) > INVITE_SEARCH_PAGE_SIZE else None,
+        "query": query,
+        "name": "invited_characters",
+    }
+    return render(request, "party/snippets/invite_results.html", context)
+
+
 @require_GET
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=party_etag)
 def party_details(request, pk):
-    party = get_object_or_404(Party.objects.related_to(request.user), pk=pk)
+    # States are only queried by the cards missing from the fragment cache.
+    characters = Character.objects.with_rulebook()
+    party = get_object_or_404(
+        Party.objects.related_to(request.user).prefetch_related(
+            Prefetch("characters", queryset=characters),
+            Prefetch("invited_characters", queryset=characters),
+        ),
+        pk=pk,
+    )
     context = {
         "party": party,
-        "all_states": HarmfulState.objects.all(),
+        "all_states": get_rulebook().all(HarmfulState),
     }
     return render(request, "party/party_details.html", context)
 
 
+async def party_events(request, pk):
+    """Stream the changes of the characters of the party, see `party.events`."""
+    if not isinstance(request, ASGIRequest):
+        # A stream would hold a WSGI worker thread. 204 stops EventSource retries.
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponseForbidden()
+    party = await Party.objects.related_to(user).filter(pk=pk).afirst()
+    if party is None:
+        msg = "No Party matches the given query."
+        raise Http404(msg)
+    characters = Character.objects.filter(Q(parties=party) | Q(invites=party))
+    topics = [
+        events.character_topic(character_pk)
+        async for character_pk in characters.values_list("pk", flat=True).distinct()
+    ]
+    response = StreamingHttpResponse(
+        events.stream(topics),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@require_GET
+@login_required
+def party_character_card(request, pk, character_pk):
+    party = get_object_or_404(
+        Party.objects.related_to(request.user).prefetch_related(
+            "characters",
+            "invited_characters",
+        ),
+        pk=pk,
+    )
+    character = get_object_or_404(
+        Character.objects.filter(Q(parties=party) | Q(invites=party))
+        .distinct()
+        .with_rulebook(),
+        pk=character_pk,
+    )
+    context = {
+        "party": party,
+        "character": character,
+        "all_states": get_rulebook().all(HarmfulState),
+    }
+    response = render(
+        request,
+        "character/snippets/characters_list/character_card.html",
+        context,
+    )
+    return trigger_client_event(response, "refresh_tooltips", after="swap")
+
+
 @require_http_methods(["GET", "POST"])
 @login_required
 def party_delete(request, pk):
@@ -95,18 +215,36 @@ def party_add_effect(request, pk):
 
 @require_GET
 @login_required
-def party_increase_rounds(request, pk):
-    party = get_object_or_404(Party.objects.played_or_mastered_by(request.user), pk=pk)
-    party.effects.increase_rounds()
-    return render(request, "party/snippets/effects.html", {"party": party})
+async def party_increase_rounds(request, pk):
+    party = await _get_played_party(request, pk)
+    await party.effects.aincrease_rounds()
+    return await _render_effects(request, party)
 
 
 @require_GET
 @login_required
-def party_decrease_rounds(request, pk):
-    party = get_object_or_404(Party.objects.played_or_mastered_by(request.user), pk=pk)
-    party.effects.decrease_rounds()
-    return render(request, "party/snippets/effects.html", {"party": party})
+async def party_decrease_rounds(request, pk):
+    party = await _get_played_party(request, pk)
+    await party.effects.adecrease_rounds()
+    return await _render_effects(request, party)
+
+
+async def _get_played_party(request, pk) -> Party:
+    user = await request.auser()
+    return await aget_object_or_404(Party.objects.played_or_mastered_by(user), pk=pk)
+
+
+async def _render_effects(request, party: Party):
+    """Render the effects of the party without further queries."""
+    await aprefetch_related_objects(
+        [party],
+        Prefetch("effects", queryset=BattleEffect.objects.select_related("created_by")),
+    )
+    return await sync_to_async(render)(
+        request,
+        "party/snippets/effects.html",
+        {"party": party},
+    )
 
 
 @require_GET
@@ -137,7 +275,7 @@ def party_change(request, pk):
 @require_http_methods(["GET", "POST"])
 @login_required
 def party_leave(request, pk, character_pk):
-    party = get_object_or_404(Party.objects.played_by(request.user).distinct(), pk=pk)
+    party = get_object_or_404(Party.objects.played_by(request.user), pk=pk)
     character = get_object_or_404(
         Character.objects.owned_by(request.user),
         pk=character_pk,
@@ -153,7 +291,7 @@ def party_leave(request, pk, character_pk):
 @require_GET
 @login_required
 def party_join(request, pk, character_pk):
-    party = get_object_or_404(Party.objects.invited_to(request.user).distinct(), pk=pk)
+    party = get_object_or_404(Party.objects.invited_to(request.user), pk=pk)
     character = get_object_or_404(
         Character.objects.owned_by(request.user),
         pk=character_pk,
@@ -167,7 +305,7 @@ def party_join(request, pk, character_pk):
 @require_GET
 @login_required
 def party_refuse(request, pk, character_pk):
-    party = get_object_or_404(Party.objects.invited_to(request.user).distinct(), pk=pk)
+    party = get_object_or_404(Party.objects.invited_to(request.user), pk=pk)
     character = get_object_or_404(
         Character.objects.owned_by(request.user),
         pk=character_pk,